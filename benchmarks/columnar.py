@@ -0,0 +1,55 @@
+import gc
+import random
+import sys
+import timeit
+import tracemalloc
+
+from cuddle import KDLEncoder, dumps, loads, loads_columnar
+
+
+# Decodes a telemetry-style document of many sibling nodes of the same shape, as a tree of
+# nodes and as a columnar document, and compares their memory use and decoding and encoding
+# times.
+
+random.seed(0)
+
+
+def make_doc(count: int) -> str:
+    lines = []
+    for i in range(count):
+        value = round(random.uniform(0, 100), 2)
+        lines.append(f'sample ts={1634428800 + i} value={value} unit="ms"')
+    return "\n".join(lines) + "\n"
+
+
+def measure_memory(decode, s: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    doc = decode(s)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del doc
+    return after - before
+
+
+def main(count: int = 100000):
+    s = make_doc(count)
+    encoder = KDLEncoder()
+    targets = (
+        ("nodes", loads, dumps),
+        ("columnar", loads_columnar, encoder.encode_columnar),
+    )
+
+    print(f"{count} nodes")
+    print(f"{'target':<10} {'bytes/node':>11} {'decode s':>9} {'encode s':>9}")
+    for name, decode, encode in targets:
+        size = measure_memory(decode, s)
+        decode_time = min(timeit.repeat(lambda: decode(s), number=1, repeat=3))
+        doc = decode(s)
+        encode_time = min(timeit.repeat(lambda: encode(doc), number=1, repeat=3))
+        print(f"{name:<10} {size / count:>11.0f} {decode_time:>9.3f} {encode_time:>9.3f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+
+# Measures the cost of starting up with cuddle, the way a short-lived command-line tool would:
+# importing it, and importing it and then decoding and encoding a small document with each
+# engine. Each case runs in a fresh interpreter under -X importtime.
+
+cases = (
+    ("import", "import cuddle"),
+    ("native", "import cuddle; cuddle.dumps(cuddle.loads('node 1 key=\"value\"'))"),
+    (
+        "tatsu",
+        "import cuddle; cuddle.dumps(cuddle.loads('node 1 key=\"value\"', engine='tatsu'))",
+    ),
+)
+
+
+def import_times(code: str) -> Tuple[Dict[str, int], int]:
+    # The cumulative import time in microseconds of every module the code imported, and the
+    # total of all of them.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    times = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+        # Nested imports are indented, and already counted in their parents' times.
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return times, total
+
+
+def main(repeat: int = 10):
+    print(f"{'case':<8} {'cuddle ms':>10} {'total ms':>9} {'modules':>8}")
+    for name, code in cases:
+        runs = [import_times(code) for _ in range(repeat)]
+        times, _ = min(runs, key=lambda run: run[0]["cuddle"])
+        total = min(run[1] for run in runs)
+        print(f"{name:<8} {times['cuddle'] / 1000:>10.1f} {total / 1000:>9.1f} {len(times):>8}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,58 @@
+import gc
+import random
+import sys
+import timeit
+import tracemalloc
+
+from cuddle import loads
+
+
+# Decodes a document where a few hundred node names and property keys repeat many times,
+# with each way of interning identifiers, and compares the memory the documents take and how
+# long looking nodes up by name takes.
+
+random.seed(0)
+
+
+def make_doc(count: int) -> str:
+    names = [f"metric-{i}" for i in range(200)]
+    keys = [f"dimension-{i}" for i in range(50)]
+    lines = []
+    for i in range(count):
+        props = " ".join(f"{key}={i % 7}" for key in random.sample(keys, 3))
+        lines.append(f"(gauge){random.choice(names)} {props} {{ sample {i}; }}")
+    return "\n".join(lines) + "\n"
+
+
+def measure(s: str, mode) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    doc = loads(s, intern_identifiers=mode)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del doc
+    return after - before
+
+
+def main(count: int = 50000):
+    s = make_doc(count)
+    print(f"{count * 2} nodes")
+    print(f"{'interning':<10} {'MiB':>8} {'decode s':>9} {'lookup ms':>10}")
+    for mode in (False, True, "sys"):
+        size = measure(s, mode)
+        decode = min(timeit.repeat(lambda: loads(s, intern_identifiers=mode), number=1, repeat=3))
+        # Scans the nodes the way the name index does when it's built. Comparing two names
+        # that are the same string returns without looking at their characters.
+        nodes = loads(s, intern_identifiers=mode).nodes.nodes
+        lookup = min(
+            timeit.repeat(
+                lambda: [node for node in nodes if node.name == "metric-7"], number=10, repeat=5
+            )
+        )
+        label = repr(mode)
+        print(f"{label:<10} {size / 2**20:>8.1f} {decode:>9.3f} {lookup * 100:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,28 @@
+import timeit
+from pathlib import Path
+
+from cuddle.lexer import tokenize
+
+
+# Tokenizes tests/complex.kdl repeated to growing sizes. Tokenizing is linear, so the rate
+# should stay about the same as the input grows.
+
+base = (Path(__file__).parent.parent / "tests" / "complex.kdl").read_text(encoding="utf-8")
+repeats = (200, 400, 800, 1600)
+
+
+def drain(s: str) -> None:
+    for _ in tokenize(s):
+        pass
+
+
+def main():
+    print(f"{'chars':>9} {'seconds':>9} {'chars/s':>10}")
+    for count in repeats:
+        s = base * count
+        seconds = min(timeit.repeat(lambda: drain(s), number=1, repeat=3))
+        print(f"{len(s):>9} {seconds:>9.4f} {len(s) / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import gc
+import sys
+import tracemalloc
+
+from cuddle import loads
+
+
+# Measures how much memory decoded documents take per node, for documents of leaf nodes with
+# no entries, leaf nodes with one argument and nodes with a child each.
+
+
+def make_doc(kind: str, count: int) -> str:
+    if kind == "bare":
+        return "leaf\n" * count
+    elif kind == "argument":
+        return "".join(f"leaf {i}\n" for i in range(count))
+    return "parent { child; }\n" * (count // 2)
+
+
+def measure(s: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    doc = loads(s)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del doc
+    return after - before
+
+
+def main(count: int = 200000):
+    print(f"{'document':<10} {'nodes':>8} {'MiB':>8} {'bytes/node':>11}")
+    for kind in ("bare", "argument", "nested"):
+        size = measure(make_doc(kind, count))
+        print(f"{kind:<10} {count:>8} {size / 2**20:>8.1f} {size / count:>11.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,41 @@
+import sys
+import timeit
+
+from cuddle import Node, NodeList
+
+
+# Looks nodes up by name in a long list, comparing the name index against the linear scan that
+# get_nodes_by_name() used to do.
+
+
+def make_nodes(count: int, distinct: int) -> NodeList:
+    return NodeList([Node(f"node-{i % distinct}", None) for i in range(count)])
+
+
+def scan_by_name(nodes: NodeList, name: str) -> list:
+    return [node for node in nodes.nodes if node.name == name]
+
+
+def main(count: int = 50000):
+    distinct = count // 10
+    nodes = make_nodes(count, distinct)
+    names = [f"node-{i}" for i in range(0, distinct, distinct // 100)]
+
+    scan = min(
+        timeit.repeat(lambda: [scan_by_name(nodes, name) for name in names], number=1, repeat=5)
+    )
+    index = min(
+        timeit.repeat(
+            lambda: [list(nodes.get_nodes_by_name(name)) for name in names], number=1, repeat=5
+        )
+    )
+    build = min(timeit.repeat(lambda: NodeList(nodes.nodes)._get_index(), number=1, repeat=5))
+
+    print(f"{len(names)} lookups among {count} nodes")
+    print(f"{'linear scan':<12} {scan / len(names) * 1e6:>10.1f} us/lookup")
+    print(f"{'index':<12} {index / len(names) * 1e6:>10.1f} us/lookup")
+    print(f"{'index build':<12} {build * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,42 @@
+import random
+import sys
+import timeit
+
+from cuddle import loads
+
+
+# Decodes a document of rows of numeric arguments, like a matrix or a time series, and reports
+# how many values are decoded per second.
+
+random.seed(0)
+
+
+def make_doc(rows: int) -> str:
+    lines = []
+    for _ in range(rows):
+        ints = " ".join(str(random.randint(-(10**6), 10**6)) for _ in range(10))
+        floats = " ".join(repr(random.uniform(-1e3, 1e3)) for _ in range(10))
+        other = (
+            f"0x{random.randint(0, 2**32):x} 0o{random.randint(0, 8**8):o} "
+            f"0b{random.randint(0, 255):b} 1_000_000 6.02e23"
+        )
+        lines.append(f"row {ints} {floats} {other}")
+    return "\n".join(lines) + "\n"
+
+
+values_per_row = 25
+
+
+def main(engines=("native", "tatsu")):
+    print(f"{'engine':<8} {'values':>8} {'seconds':>9} {'values/s':>10}")
+    for engine in engines:
+        # The TatSu engine is far slower, so give it less to do.
+        rows = 2000 if engine == "native" else 100
+        doc = make_doc(rows)
+        seconds = min(timeit.repeat(lambda: loads(doc, engine=engine), number=1, repeat=15))
+        values = rows * values_per_row
+        print(f"{engine:<8} {values:>8} {seconds:>9.5f} {values / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(tuple(sys.argv[1:]) or ("native", "tatsu"))
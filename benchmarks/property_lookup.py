@@ -0,0 +1,45 @@
+import sys
+import timeit
+
+from cuddle import Document, Node, NodeList
+
+
+# Looks nodes up by a property value in documents of growing size, walking the whole document
+# and then with a property index.
+
+
+def make_doc(services: int) -> Document:
+    nodes = []
+    for i in range(services):
+        users = [Node("user", None, properties={"id": i * 10 + j}) for j in range(10)]
+        nodes.append(Node("service", None, properties={"name": f"service-{i}"}, children=users))
+    return Document(NodeList(nodes))
+
+
+def main(sizes=(100, 1000, 10000)):
+    print(f"{'nodes':>8} {'walk us':>10} {'index us':>10} {'build ms':>10}")
+    for services in sizes:
+        doc = make_doc(services)
+        ids = list(range(0, services * 10, max(1, services // 10)))
+
+        walk = min(
+            timeit.repeat(
+                lambda: [doc.find_nodes("user", "id", i) for i in ids], number=1, repeat=3
+            )
+        )
+        build = min(timeit.repeat(lambda: doc.build_index(["id"]), number=1, repeat=3))
+        index = min(
+            timeit.repeat(
+                lambda: [doc.find_nodes("user", "id", i) for i in ids], number=1, repeat=5
+            )
+        )
+        doc.drop_index()
+
+        nodes = services * 11
+        walk_us = walk / len(ids) * 1e6
+        index_us = index / len(ids) * 1e6
+        print(f"{nodes:>8} {walk_us:>10.1f} {index_us:>10.2f} {build * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or (100, 1000, 10000))
@@ -0,0 +1,38 @@
+import sys
+import timeit
+
+from cuddle import Document, Node, NodeList
+
+
+# Runs queries that indexes can answer against documents of growing size, once with a second
+# selector that matches nothing, which makes the query walk the whole document, and once on
+# its own, which lets it use the name index or a property index.
+
+
+def make_doc(services: int) -> Document:
+    nodes = []
+    for i in range(services):
+        users = [Node("user", None, properties={"id": i * 10 + j}) for j in range(10)]
+        config = Node("config", None, children=[Node("setting", None) for _ in range(10)])
+        nodes.append(Node("service", None, properties={"name": f"svc-{i}"}, children=users))
+        nodes.append(config)
+    return Document(NodeList(nodes))
+
+
+def main(sizes=(100, 1000, 10000)):
+    print(f"{'nodes':>8} {'query':<24} {'walk ms':>9} {'index ms':>9}")
+    for services in sizes:
+        doc = make_doc(services)
+        doc.build_index(["id"])
+        queries = (
+            f"user[id={services * 5}]",
+            "top() > service > user",
+        )
+        for query in queries:
+            walk = min(timeit.repeat(lambda: doc.query(f"{query} || missing"), number=1, repeat=3))
+            index = min(timeit.repeat(lambda: doc.query(query), number=1, repeat=3))
+            print(f"{services * 22:>8} {query:<24} {walk * 1e3:>9.2f} {index * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or (100, 1000, 10000))
@@ -0,0 +1,49 @@
+import copy
+import sys
+import timeit
+
+from cuddle import loads
+
+
+# Keeps a version of a document after every change, by deep-copying a mutable document and by
+# path copying a frozen one, and compares the time per version.
+
+
+def make_doc(count: int) -> str:
+    lines = []
+    for i in range(count):
+        lines.append(f'service "svc{i}" {{\n    listen port={8000 + i}\n    replicas 1\n}}')
+    return "\n".join(lines) + "\n"
+
+
+def main(count: int = 2000, versions: int = 50):
+    doc = loads(make_doc(count))
+    frozen = doc.freeze()
+
+    def deep_copies():
+        current = doc
+        history = []
+        for i in range(versions):
+            current = copy.deepcopy(current)
+            current.nodes[i % count].children[1].arguments[0] = i
+            history.append(current)
+        return history
+
+    def frozen_versions():
+        current = frozen
+        history = []
+        for i in range(versions):
+            current = current.update_in(
+                (i % count, "replicas"), lambda node: node.replace(arguments=(i,))
+            )
+            history.append(current)
+        return history
+
+    print(f"{count} services, {versions} versions")
+    for name, make_history in (("deepcopy", deep_copies), ("frozen", frozen_versions)):
+        elapsed = min(timeit.repeat(make_history, number=1, repeat=3))
+        print(f"{name:<10} {elapsed / versions * 1e6:>10.1f} us/version")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,39 @@
+import sys
+import timeit
+
+from cuddle import loads
+
+
+# Decodes documents holding a single long raw or escaped string at doubling lengths. The time
+# per character should stay flat as the strings grow.
+
+sizes = (16_384, 65_536, 262_144, 1_048_576)
+line = "SELECT * FROM \"table\" WHERE name = 'x';\n"
+
+
+def make_docs(size: int):
+    raw = (line * (size // len(line) + 1))[:size]
+    escaped = raw.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return {
+        "raw": f'node r#"{raw}"#\n',
+        "escaped": f'node "{escaped}"\n',
+    }
+
+
+def main(engines=("native", "tatsu")):
+    print(f"{'engine':<8} {'kind':<8} {'chars':>9} {'seconds':>9} {'ns/char':>8}")
+    for engine in engines:
+        for size in sizes:
+            for kind, doc in make_docs(size).items():
+                number = max(1, 1_048_576 // size)
+                seconds = min(
+                    timeit.repeat(lambda: loads(doc, engine=engine), number=number, repeat=3)
+                )
+                seconds /= number
+                print(
+                    f"{engine:<8} {kind:<8} {size:>9} {seconds:>9.5f} {seconds / size * 1e9:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main(tuple(sys.argv[1:]) or ("native", "tatsu"))
@@ -1,15 +1,40 @@
 from __future__ import annotations
 
+import mmap
+import os
 from functools import partial
 from os import PathLike
-from typing import IO, Optional, Type, Union
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
+from ._compiled import CompiledCache, load_compiled
+from ._parser import iter_complete_chunks
+from .cache import CacheStats, CopyMode, ParseCache
 from .decoder import (
     BoolFactory,
+    Buffer,
+    FactoryTypeParam,
     FloatFactory,
+    InternMode,
     IntFactory,
     KDLDecoder,
+    NodePath,
+    NodePredicate,
+    NodeSelector,
     NullFactory,
+    ParseEvent,
+    ParserEngine,
     StrFactory,
     default_bool_parser,
     default_float_parser,
@@ -25,10 +50,19 @@ from .encoder import (
     default_value_encoder,
     extended_value_encoder,
 )
-from .exception import KDLDecodeError, KDLEncodeTypeError
+from .exception import KDLDecodeError, KDLEncodeTypeError, KQLSyntaxError
+from .lazy import LazyArguments, LazyProperties, LazyValue
+from .registry import TypeDecoder, TypeEncoder, TypeRegistry, ValueKind, default_registry
 from .structure import Document, Node, NodeList
 
 
+if TYPE_CHECKING:
+    from .columnar import ColumnarDocument, ColumnarNode
+    from .frozen import FrozenDocument, FrozenNode
+    from .index import PropertyIndex
+    from .query import Query, compile_query
+
+
 __version__ = "1.0.6"
 
 
@@ -71,8 +105,83 @@ def dump(
             fp.write(chunk)
 
 
+def dumpb(
+    doc: Document,
+    /,
+    *,
+    cls=None,
+    value_encoder: Optional[ValueEncoder] = None,
+) -> bytes:
+    if cls is None:
+        cls = KDLEncoder
+
+    encoder = cls(value_encoder=value_encoder)
+    return encoder.encode_binary(doc)
+
+
+def loadb(
+    data: Buffer,
+    /,
+    *,
+    cls=None,
+    parse_null: Optional[NullFactory] = None,
+    parse_bool: Optional[BoolFactory] = None,
+    parse_int: Optional[IntFactory] = None,
+    parse_float: Optional[FloatFactory] = None,
+    parse_str: Optional[StrFactory] = None,
+    ignore_unknown_types: bool = False,
+    node_factory: Type[Node] = Node,
+    node_list_factory: Type[NodeList] = NodeList,
+) -> Document:
+    if cls is None:
+        cls = KDLDecoder
+
+    decoder = cls(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+        ignore_unknown_types=ignore_unknown_types,
+        node_factory=node_factory,
+        node_list_factory=node_list_factory,
+    )
+    return decoder.decode_binary(data)
+
+
+def loads_columnar(
+    s: Union[str, Buffer],
+    /,
+    *,
+    cls=None,
+    parse_null: Optional[NullFactory] = None,
+    parse_bool: Optional[BoolFactory] = None,
+    parse_int: Optional[IntFactory] = None,
+    parse_float: Optional[FloatFactory] = None,
+    parse_str: Optional[StrFactory] = None,
+    ignore_unknown_types: bool = False,
+    engine: ParserEngine = "native",
+) -> ColumnarDocument:
+    if not isinstance(s, str):
+        s = str(s, "utf-8")
+
+    if cls is None:
+        cls = KDLDecoder
+
+    decoder = cls(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+        ignore_unknown_types=ignore_unknown_types,
+        engine=engine,
+    )
+    return decoder.decode_columnar(s)
+
+
 def loads(
-    s: Union[str, bytes],
+    s: Union[str, Buffer],
     /,
     *,
     cls=None,
@@ -84,9 +193,16 @@ def loads(
     ignore_unknown_types: bool = False,
     node_factory: Type[Node] = Node,
     node_list_factory: Type[NodeList] = NodeList,
+    engine: ParserEngine = "native",
+    workers: Optional[int] = 1,
+    cache: Optional[ParseCache] = None,
+    select: Optional[NodeSelector] = None,
+    lazy: bool = False,
+    intern_identifiers: InternMode = True,
 ) -> Document:
-    if isinstance(s, bytes):
-        s = s.decode("utf-8")
+    if not isinstance(s, str):
+        # str() decodes any buffer in place, without first copying it to bytes.
+        s = str(s, "utf-8")
 
     if cls is None:
         cls = KDLDecoder
@@ -100,8 +216,18 @@ def loads(
         ignore_unknown_types=ignore_unknown_types,
         node_factory=node_factory,
         node_list_factory=node_list_factory,
+        engine=engine,
+        cache=cache,
+        lazy=lazy,
+        intern_identifiers=intern_identifiers,
     )
-    return decoder.decode(s)
+    # Selectors can be arbitrary callables, which can't always be sent to worker processes,
+    # so selective decoding always happens in this one.
+    if select is not None:
+        return decoder.decode(s, select=select)
+    if workers == 1:
+        return decoder.decode(s)
+    return decoder.decode_parallel(s, workers=workers)
 
 
 def load(
@@ -117,7 +243,49 @@ def load(
     ignore_unknown_types: bool = False,
     node_factory: Type[Node] = Node,
     node_list_factory: Type[NodeList] = NodeList,
+    engine: ParserEngine = "native",
+    workers: Optional[int] = 1,
+    cache: Optional[ParseCache] = None,
+    compiled_cache: CompiledCache = False,
+    select: Optional[NodeSelector] = None,
+    lazy: bool = False,
+    intern_identifiers: InternMode = True,
 ) -> Document:
+    compiled = compiled_cache is not False
+    if compiled:
+        # Compiled files are kept next to or keyed on the source file, and hold whole
+        # documents. They make parsing in parallel unnecessary, so workers is ignored.
+        if not isinstance(fp, PathLike):
+            raise ValueError("compiled_cache needs a path, not a file object.")
+        if select is not None:
+            raise ValueError("compiled_cache can't be used with select.")
+
+    if isinstance(fp, PathLike) and (
+        compiled or (cache is not None and workers == 1 and select is None)
+    ):
+        if cls is None:
+            cls = KDLDecoder
+
+        decoder = cls(
+            parse_null=parse_null,
+            parse_bool=parse_bool,
+            parse_int=parse_int,
+            parse_float=parse_float,
+            parse_str=parse_str,
+            ignore_unknown_types=ignore_unknown_types,
+            node_factory=node_factory,
+            node_list_factory=node_list_factory,
+            engine=engine,
+            cache=cache,
+            lazy=lazy,
+            intern_identifiers=intern_identifiers,
+        )
+        if cache is not None:
+            return cache.load(  # type: ignore[return-value]
+                decoder, fp, compiled_cache=compiled_cache
+            )
+        return load_compiled(decoder, fp, compiled_cache)
+
     _loads = partial(
         loads,
         cls=cls,
@@ -129,6 +297,12 @@ def load(
         ignore_unknown_types=ignore_unknown_types,
         node_factory=node_factory,
         node_list_factory=node_list_factory,
+        engine=engine,
+        workers=workers,
+        cache=cache,
+        select=select,
+        lazy=lazy,
+        intern_identifiers=intern_identifiers,
     )
 
     if isinstance(fp, PathLike):
@@ -138,16 +312,295 @@ def load(
         return _loads(fp.read())
 
 
-plain_str_parser: StrFactory = lambda _, val: val
+def load_mapped(
+    path: Union[str, PathLike],
+    /,
+    *,
+    chunk_size: int = 1048576,
+    cls=None,
+    parse_null: Optional[NullFactory] = None,
+    parse_bool: Optional[BoolFactory] = None,
+    parse_int: Optional[IntFactory] = None,
+    parse_float: Optional[FloatFactory] = None,
+    parse_str: Optional[StrFactory] = None,
+    ignore_unknown_types: bool = False,
+    node_factory: Type[Node] = Node,
+    node_list_factory: Type[NodeList] = NodeList,
+    engine: ParserEngine = "native",
+) -> Document:
+    if cls is None:
+        cls = KDLDecoder
+
+    decoder = cls(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+        ignore_unknown_types=ignore_unknown_types,
+        node_factory=node_factory,
+        node_list_factory=node_list_factory,
+        engine=engine,
+    )
+
+    with open(path, mode="rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped.
+            return decoder.decode_buffer(f.read(), chunk_size=chunk_size)
+        with mapped:
+            return decoder.decode_buffer(mapped, chunk_size=chunk_size)
+
+
+def iterload(
+    fp: Union[IO[str], PathLike],
+    /,
+    *,
+    chunk_size: int = 65536,
+    cls=None,
+    parse_null: Optional[NullFactory] = None,
+    parse_bool: Optional[BoolFactory] = None,
+    parse_int: Optional[IntFactory] = None,
+    parse_float: Optional[FloatFactory] = None,
+    parse_str: Optional[StrFactory] = None,
+    ignore_unknown_types: bool = False,
+    node_factory: Type[Node] = Node,
+    node_list_factory: Type[NodeList] = NodeList,
+    engine: ParserEngine = "native",
+) -> Iterator[Node]:
+    if cls is None:
+        cls = KDLDecoder
+
+    decoder = cls(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+        ignore_unknown_types=ignore_unknown_types,
+        node_factory=node_factory,
+        node_list_factory=node_list_factory,
+        engine=engine,
+    )
+
+    for chunk in _iter_complete_chunks(fp, chunk_size):
+        yield from decoder.decode(chunk)
+
+
+def iterparse(
+    source: Union[str, bytes, IO[str], PathLike],
+    /,
+    *,
+    chunk_size: int = 65536,
+    cls=None,
+    parse_null: Optional[NullFactory] = None,
+    parse_bool: Optional[BoolFactory] = None,
+    parse_int: Optional[IntFactory] = None,
+    parse_float: Optional[FloatFactory] = None,
+    parse_str: Optional[StrFactory] = None,
+    ignore_unknown_types: bool = False,
+    engine: ParserEngine = "native",
+) -> Iterator[ParseEvent]:
+    if cls is None:
+        cls = KDLDecoder
+
+    decoder = cls(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+        ignore_unknown_types=ignore_unknown_types,
+        engine=engine,
+    )
+
+    if isinstance(source, bytes):
+        source = source.decode("utf-8")
+    if isinstance(source, str):
+        yield from decoder.iterparse(source)
+        return
+
+    for chunk in _iter_complete_chunks(source, chunk_size):
+        yield from decoder.iterparse(chunk)
+
+
+def _iter_complete_chunks(fp: Union[IO[str], PathLike], chunk_size: int) -> Iterator[str]:
+    if isinstance(fp, PathLike):
+        with open(fp, mode="r", encoding="utf-8") as f:
+            yield from iter_complete_chunks(f.read, chunk_size)
+    else:
+        yield from iter_complete_chunks(fp.read, chunk_size)
+
+
+def load_many(
+    paths: Iterable[Union[str, PathLike]],
+    /,
+    *,
+    workers: Optional[int] = None,
+    cls=None,
+    parse_null: Optional[NullFactory] = None,
+    parse_bool: Optional[BoolFactory] = None,
+    parse_int: Optional[IntFactory] = None,
+    parse_float: Optional[FloatFactory] = None,
+    parse_str: Optional[StrFactory] = None,
+    ignore_unknown_types: bool = False,
+    node_factory: Type[Node] = Node,
+    node_list_factory: Type[NodeList] = NodeList,
+    engine: ParserEngine = "native",
+) -> List[Union[Document, Exception]]:
+    if cls is None:
+        cls = KDLDecoder
+
+    decoder = cls(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+        ignore_unknown_types=ignore_unknown_types,
+        node_factory=node_factory,
+        node_list_factory=node_list_factory,
+        engine=engine,
+    )
+    return _run_batch(partial(_load_one, decoder), list(paths), workers)
+
+
+def dump_many(
+    pairs: Iterable[Tuple[Document, Union[str, PathLike]]],
+    /,
+    *,
+    workers: Optional[int] = None,
+    cls=None,
+    indent: Union[str, int, None] = None,
+    value_encoder: Optional[ValueEncoder] = None,
+) -> List[Optional[Exception]]:
+    if cls is None:
+        cls = KDLEncoder
+
+    encoder = cls(indent=indent, value_encoder=value_encoder)
+    return _run_batch(partial(_dump_one, encoder), list(pairs), workers)
+
+
+# Batches smaller than this aren't worth the cost of starting worker processes.
+_min_parallel_batch = 8
+
+
+def _load_one(decoder: KDLDecoder, path: Union[str, PathLike], /) -> Union[Document, Exception]:
+    try:
+        with open(path, mode="r", encoding="utf-8") as f:
+            return decoder.decode(f.read())
+    except Exception as e:
+        return e
+
+
+def _dump_one(
+    encoder: KDLEncoder,
+    pair: Tuple[Document, Union[str, PathLike]],
+    /,
+) -> Optional[Exception]:
+    doc, path = pair
+    try:
+        with open(path, mode="w", encoding="utf-8") as f:
+            f.write(encoder.encode(doc))
+    except Exception as e:
+        return e
+    return None
+
+
+def _run_chunk(func: Callable[[Any], Any], chunk: List[Any], /) -> List[Any]:
+    return [func(item) for item in chunk]
+
+
+def _run_batch(func: Callable[[Any], Any], items: List[Any], workers: Optional[int]) -> List[Any]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(items))
+    if workers <= 1 or len(items) < _min_parallel_batch:
+        return _run_chunk(func, items)
+
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Fail early if the configuration can't be sent to the workers, rather than reporting
+    # the same error for every item.
+    pickle.dumps(func)
+
+    # A few chunks per worker keeps the workers evenly loaded without paying for a round
+    # trip per item.
+    chunk_size = -(-len(items) // (workers * 4))
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    results: List[Any] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_chunk, func, chunk) for chunk in chunks]
+        for future, chunk in zip(futures, chunks):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # The results of this chunk couldn't be sent back.
+                results.extend([e] * len(chunk))
+    return results
+
+
+def __getattr__(name: str) -> Any:
+    # The query engine and property indexes are imported on first use, to keep importing
+    # cuddle cheap.
+    if name in ("Query", "compile_query"):
+        from . import query
+
+        return getattr(query, name)
+    elif name == "PropertyIndex":
+        from .index import PropertyIndex
+
+        return PropertyIndex
+    elif name in ("ColumnarDocument", "ColumnarNode"):
+        from . import columnar
+
+        return getattr(columnar, name)
+    elif name in ("FrozenDocument", "FrozenNode"):
+        from . import frozen
+
+        return getattr(frozen, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# A plain function rather than a lambda, so decoders using it can be pickled.
+def plain_str_parser(_: FactoryTypeParam, val: str) -> Any:
+    return val
 
 
 __all__ = (
     "dump",
+    "dump_many",
+    "dumpb",
     "dumps",
+    "iterload",
+    "iterparse",
     "load",
+    "loadb",
+    "load_many",
+    "load_mapped",
     "loads",
+    "loads_columnar",
     "KDLDecoder",
     "KDLDecodeError",
+    "ParseCache",
+    "CacheStats",
+    "CopyMode",
+    "ParserEngine",
+    "InternMode",
+    "ParseEvent",
+    "NodePath",
+    "NodePredicate",
+    "NodeSelector",
+    "LazyArguments",
+    "LazyProperties",
+    "LazyValue",
+    "PropertyIndex",
+    "Query",
+    "KQLSyntaxError",
+    "compile_query",
     "plain_str_parser",
     "default_null_parser",
     "default_bool_parser",
@@ -161,7 +614,16 @@ __all__ = (
     "ValueEncoderResult",
     "default_value_encoder",
     "extended_value_encoder",
+    "TypeRegistry",
+    "TypeDecoder",
+    "TypeEncoder",
+    "ValueKind",
+    "default_registry",
     "Document",
     "Node",
     "NodeList",
+    "ColumnarDocument",
+    "ColumnarNode",
+    "FrozenDocument",
+    "FrozenNode",
 )
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import struct
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from ._parser import ParseFailure, ValueDecoder, scan_value
+from .encoder import ValueEncoder, _floatstr, _format_identifier, _intstr
+from .exception import KDLDecodeError, KDLEncodeTypeError
+from .structure import Document, Node, NodeList
+
+
+# The binary format starts with a magic number and a format version, followed by a string
+# table and then the nodes. Every count and length is an unsigned LEB128 varint.
+#
+#   string table: count, then each string as its UTF-8 length and bytes
+#   node list:    count, then each node
+#   node:         name index, type index + 1 (0 for none), argument count, arguments,
+#                 property count, properties (key index and value), child node list
+#   value:        tag byte, then the type index if the tag has the typed flag set, then
+#                 the payload for that tag
+#
+# Node names, property keys and type annotations go in the string table. Integers are
+# zigzag varints and floats are little-endian doubles. Any other number is kept as its
+# literal text with its kind, so it decodes exactly as it would from the text format.
+magic = b"KDLB\x01"
+
+_tag_null = 0
+_tag_true = 1
+_tag_false = 2
+_tag_int = 3
+_tag_float = 4
+_tag_string = 5
+_tag_number = 6
+_tag_typed = 0x80
+
+_number_kinds = ("decimal", "hex", "octal", "binary")
+_number_kind_codes = {kind: code for code, kind in enumerate(_number_kinds)}
+_double = struct.Struct("<d")
+
+
+def _write_uint(out: bytearray, n: int, /) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write_str(out: bytearray, val: str, /) -> None:
+    data = val.encode("utf-8")
+    _write_uint(out, len(data))
+    out += data
+
+
+def make_binary_encoder(_value_encoder: ValueEncoder) -> Callable[[Document], bytes]:
+    def encode(doc: Document, /) -> bytes:
+        strings: Dict[str, int] = {}
+        body = bytearray()
+        write_uint = _write_uint
+        write_str = _write_str
+
+        def string_index(val: str, /) -> int:
+            idx = strings.get(val)
+            if idx is None:
+                idx = strings[val] = len(strings)
+            return idx
+
+        def write_tag(tag: int, val_type: Optional[str], /) -> None:
+            if val_type is None:
+                body.append(tag)
+            else:
+                body.append(tag | _tag_typed)
+                write_uint(body, string_index(val_type))
+
+        def write_value(val: Any, /) -> None:
+            result = _value_encoder(val, _format_identifier)
+            if result is None:
+                raise KDLEncodeTypeError(
+                    f"Object of type {val.__class__.__name__} is not KDL serializable"
+                )
+
+            if not isinstance(result, str):
+                val_type, val_string = result
+                write_tag(_tag_string, val_type)
+                write_str(body, val_string)
+                return
+
+            # Plain numbers and keywords are stored directly; anything else the value encoder
+            # came up with is scanned like the text parser would scan it.
+            val_class = val.__class__
+            if val_class is int and result == _intstr(val):
+                body.append(_tag_int)
+                write_uint(body, val << 1 if val >= 0 else (-val << 1) - 1)
+                return
+            elif val_class is float and result == _floatstr(val):
+                body.append(_tag_float)
+                body.extend(_double.pack(val))
+                return
+            elif result == "null":
+                body.append(_tag_null)
+                return
+            elif result == "true":
+                body.append(_tag_true)
+                return
+            elif result == "false":
+                body.append(_tag_false)
+                return
+
+            try:
+                val_type, kind, raw_value, end = scan_value(result, 0)
+            except ParseFailure:
+                end = -1
+            if end != len(result):
+                raise KDLEncodeTypeError(f"Value encoder returned invalid KDL {result!r}.")
+
+            if kind == "string":
+                write_tag(_tag_string, val_type)
+                write_str(body, raw_value)
+            elif kind == "null":
+                write_tag(_tag_null, val_type)
+            elif kind == "boolean":
+                write_tag(_tag_true if raw_value == "true" else _tag_false, val_type)
+            else:
+                write_tag(_tag_number, val_type)
+                body.append(_number_kind_codes[kind])
+                write_str(body, raw_value)
+
+        def write_nodes(nodes: Union[NodeList, Sequence[Node]], /) -> None:
+            write_uint(body, len(nodes))
+            for node in nodes:
+                write_uint(body, string_index(node.name))
+                if node.node_type is None:
+                    body.append(0)
+                else:
+                    write_uint(body, string_index(node.node_type) + 1)
+
+                arguments = node._arguments or ()
+                write_uint(body, len(arguments))
+                for val in arguments:
+                    write_value(val)
+
+                properties = node._properties or {}
+                write_uint(body, len(properties))
+                for key, val in properties.items():
+                    write_uint(body, string_index(key))
+                    write_value(val)
+
+                write_nodes(node._children or ())
+
+        write_nodes(doc.nodes)
+
+        out = bytearray(magic)
+        write_uint(out, len(strings))
+        for val in strings:
+            write_str(out, val)
+        out += body
+        return bytes(out)
+
+    return encode
+
+
+def make_binary_decoder(
+    _decode_value: ValueDecoder,
+    _default_factories: bool,
+    _node_factory: Type[Node],
+    _node_list_factory: Type[NodeList],
+) -> Callable[[bytes], Document]:
+    unpack_double = _double.unpack_from
+    _custom_nodes = _node_factory is not Node
+    _custom_children = _custom_nodes or _node_list_factory is not NodeList
+
+    def read_uint(data: bytes, pos: int, /) -> Tuple[int, int]:
+        result = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, pos
+            shift += 7
+
+    def read_str(data: bytes, pos: int, /) -> Tuple[str, int]:
+        length = data[pos]
+        if length < 0x80:
+            pos += 1
+        else:
+            length, pos = read_uint(data, pos)
+        end = pos + length
+        return data[pos:end].decode("utf-8"), end
+
+    def read_value(data: bytes, pos: int, strings: List[str], /) -> Tuple[Any, int]:
+        tag = data[pos]
+        pos += 1
+
+        val_type: Optional[str] = None
+        if tag & _tag_typed:
+            tag &= ~_tag_typed
+            idx, pos = read_uint(data, pos)
+            val_type = strings[idx]
+
+        # With the default factories, untyped values decode to themselves.
+        plain = val_type is None and _default_factories
+
+        if tag == _tag_string:
+            string, pos = read_str(data, pos)
+            if plain:
+                return string, pos
+            return _decode_value(val_type, "string", string), pos
+        elif tag == _tag_int:
+            zigzag = data[pos]
+            if zigzag < 0x80:
+                pos += 1
+            else:
+                zigzag, pos = read_uint(data, pos)
+            val = zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+            if plain:
+                return val, pos
+            return _decode_value(val_type, "decimal", _intstr(val)), pos
+        elif tag == _tag_float:
+            val = unpack_double(data, pos)[0]
+            if plain:
+                return val, pos + 8
+            return _decode_value(val_type, "decimal", _floatstr(val)), pos + 8
+        elif tag == _tag_null:
+            if plain:
+                return None, pos
+            return _decode_value(val_type, "null", "null"), pos
+        elif tag == _tag_true:
+            if plain:
+                return True, pos
+            return _decode_value(val_type, "boolean", "true"), pos
+        elif tag == _tag_false:
+            if plain:
+                return False, pos
+            return _decode_value(val_type, "boolean", "false"), pos
+        elif tag == _tag_number:
+            kind = _number_kinds[data[pos]]
+            raw_value, pos = read_str(data, pos + 1)
+            return _decode_value(val_type, kind, raw_value), pos
+
+        raise KDLDecodeError(f"Unknown value tag {tag} at offset {pos - 1}.")
+
+    def read_nodes(data: bytes, pos: int, strings: List[str], /) -> Tuple[List[Node], int]:
+        count, pos = read_uint(data, pos)
+        nodes = []
+        for _ in range(count):
+            idx, pos = read_uint(data, pos)
+            name = strings[idx]
+            idx, pos = read_uint(data, pos)
+            node_type = strings[idx - 1] if idx else None
+
+            count, pos = read_uint(data, pos)
+            args = []
+            for _ in range(count):
+                val, pos = read_value(data, pos, strings)
+                args.append(val)
+
+            count, pos = read_uint(data, pos)
+            props = {}
+            for _ in range(count):
+                idx, pos = read_uint(data, pos)
+                props[strings[idx]], pos = read_value(data, pos, strings)
+
+            children, pos = read_nodes(data, pos, strings)
+            nodes.append(
+                _node_factory(
+                    name,
+                    node_type,
+                    arguments=args if args or _custom_nodes else None,
+                    properties=props if props or _custom_nodes else None,
+                    children=_node_list_factory(children) if children or _custom_children else None,
+                )
+            )
+        return nodes, pos
+
+    def decode(data: bytes, /) -> Document:
+        if not data.startswith(magic):
+            raise KDLDecodeError("Not a binary KDL document.")
+
+        try:
+            count, pos = read_uint(data, len(magic))
+            strings = []
+            for _ in range(count):
+                val, pos = read_str(data, pos)
+                strings.append(val)
+
+            nodes, pos = read_nodes(data, pos, strings)
+        except (IndexError, UnicodeDecodeError, struct.error) as e:
+            raise KDLDecodeError("Failed to decode the binary document.") from e
+
+        if pos != len(data):
+            raise KDLDecodeError("Unexpected data after the end of the binary document.")
+        return Document(_node_list_factory(nodes))
+
+    return decode
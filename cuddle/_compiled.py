@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import marshal
+import os
+import struct
+import sys
+from os import PathLike
+from typing import TYPE_CHECKING, Any, List, Optional, Union
+
+from ._parser import ParseEvent, ParseFailure, make_event_parser
+from .exception import KDLDecodeError
+from .structure import Document, Node, NodeList
+
+
+if TYPE_CHECKING:
+    from .decoder import KDLDecoder
+
+
+# Compiled files hold the parse events of a document with the values left undecoded, so one
+# compiled file serves decoders with any factory settings. The header records the size and
+# modification time of the source file the events were compiled from, and since marshal's
+# format can change between Python versions, the interpreter and marshal version that wrote it.
+_magic = b"KDLC"
+_format_version = 2
+_header = struct.Struct("<4sII32sqq")
+_interpreter = (
+    sys.implementation.cache_tag or f"{sys.implementation.name}-{sys.hexversion:x}"
+).encode("utf-8")
+
+CompiledCache = Union[bool, str, PathLike]
+
+
+def _raw_value(val_type: Optional[str], kind: str, raw_value: str, /) -> Any:
+    return val_type, kind, raw_value
+
+
+_parse_raw_events = make_event_parser(_raw_value)
+
+
+def compiled_path(path: Union[str, PathLike], cache_location: CompiledCache, /) -> str:
+    path = os.fspath(path)
+    if isinstance(cache_location, bool):
+        # Next to the source, like .pyc files used to be.
+        return path + "c" if path.endswith(".kdl") else path + ".kdlc"
+
+    import hashlib
+
+    # Sources from different directories can share a name, so the cache directory keys
+    # compiled files on the absolute path of their source too.
+    digest = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=8).hexdigest()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.fspath(cache_location), f"{stem}.{digest}.kdlc")
+
+
+def load_compiled(
+    decoder: KDLDecoder,
+    path: Union[str, PathLike],
+    cache_location: CompiledCache,
+    /,
+) -> Document:
+    stat = os.stat(path)
+    target = compiled_path(path, cache_location)
+
+    events = _read_compiled(target, stat)
+    if events is None:
+        with open(path, mode="r", encoding="utf-8") as f:
+            s = f.read()
+        try:
+            events = list(_parse_raw_events(s))
+        except ParseFailure as e:
+            raise KDLDecodeError("Failed to parse the document.") from e
+        _write_compiled(target, stat, events)
+
+    return _build_document(decoder, events)
+
+
+def _read_compiled(target: str, stat: os.stat_result, /) -> Optional[List[ParseEvent]]:
+    expected = _pack_header(stat)
+    try:
+        with open(target, mode="rb") as f:
+            if f.read(_header.size) != expected:
+                return None
+            events = marshal.loads(f.read())
+    except (OSError, ValueError, EOFError, TypeError):
+        # A missing, unreadable or corrupt compiled file is simply compiled again.
+        return None
+    return events if _valid_events(events) else None
+
+
+def _valid_events(events: Any, /) -> bool:
+    # Anything but a list of well-formed events, with every node that starts ending again, is
+    # treated like a corrupt file.
+    if events.__class__ is not list:
+        return False
+    depth = 0
+    for event in events:
+        if event.__class__ is not tuple:
+            return False
+        length = len(event)
+        kind = event[0] if length else None
+        if kind == "argument" and length == 2:
+            val = event[1]
+        elif kind == "property" and length == 3 and event[1].__class__ is str:
+            val = event[2]
+        elif kind == "start_node" and length == 3 and event[1].__class__ is str:
+            if event[2] is not None and event[2].__class__ is not str:
+                return False
+            depth += 1
+            continue
+        elif kind == "end_node" and length == 1 and depth > 0:
+            depth -= 1
+            continue
+        else:
+            return False
+        # The value's type annotation, kind and text.
+        if (
+            val.__class__ is not tuple
+            or len(val) != 3
+            or (val[0] is not None and val[0].__class__ is not str)
+            or val[1].__class__ is not str
+            or val[2].__class__ is not str
+        ):
+            return False
+    return depth == 0
+
+
+def _pack_header(stat: os.stat_result, /) -> bytes:
+    return _header.pack(
+        _magic, _format_version, marshal.version, _interpreter, stat.st_mtime_ns, stat.st_size
+    )
+
+
+def _write_compiled(target: str, stat: os.stat_result, events: List[ParseEvent], /) -> None:
+    data = _pack_header(stat) + marshal.dumps(events)
+
+    import tempfile
+
+    # Write to a temporary file and move it into place, so a concurrent reader never sees a
+    # partly written file. Failing to write is not an error, the cache is only an optimisation.
+    directory = os.path.dirname(target) or "."
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, mode="wb") as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def _build_document(decoder: KDLDecoder, events: List[ParseEvent], /) -> Document:
+    plan = decoder._get_plan()
+    decode_value = plan.decode_entry
+    node_factory = plan.node_factory
+    node_list_factory = decoder.node_list_factory
+    custom_nodes = node_factory is not Node
+    custom_children = custom_nodes or node_list_factory is not NodeList
+    intern = plan.intern
+
+    nodes: List[Node] = []
+    stack: List[Any] = []
+    args: List[Any] = []
+    props: dict = {}
+    for event in events:
+        kind = event[0]
+        if kind == "argument":
+            val_type, val_kind, raw = event[1]
+            if intern is not None and val_type is not None:
+                val_type = intern(val_type)
+            args.append(decode_value(val_type, val_kind, raw))
+        elif kind == "property":
+            key = event[1]
+            val_type, val_kind, raw = event[2]
+            if intern is not None:
+                key = intern(key)
+                if val_type is not None:
+                    val_type = intern(val_type)
+            props[key] = decode_value(val_type, val_kind, raw)
+        elif kind == "start_node":
+            stack.append((event[1], event[2], args, props, nodes))
+            args = []
+            props = {}
+            nodes = []
+        else:
+            name, node_type, parent_args, parent_props, siblings = stack.pop()
+            if intern is not None:
+                name = intern(name)
+                if node_type is not None:
+                    node_type = intern(node_type)
+            node = node_factory(
+                name,
+                node_type,
+                arguments=args if args or custom_nodes else None,
+                properties=props if props or custom_nodes else None,
+                children=node_list_factory(nodes) if nodes or custom_children else None,
+            )
+            siblings.append(node)
+            args, props, nodes = parent_args, parent_props, siblings
+    return Document(node_list_factory(nodes))
@@ -0,0 +1,634 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple, Type
+
+from ._escaping import named_escapes
+from .structure import Node, NodeList
+
+
+ValueDecoder = Callable[[Optional[str], str, str], Any]
+Entry = Tuple[Optional[str], Optional[str], str, str]
+ParseEvent = Tuple[Any, ...]
+Interner = Callable[[str], str]
+
+# Identifiers are interned in a table of this many entries at most.
+max_interned = 65536
+
+
+# Maps each identifier to the first string it was seen as, so that equal node names, property
+# keys and type annotations share one string. Hits are a plain dictionary lookup. The table
+# is emptied when it's full, so a long-lived decoder doesn't keep every identifier it has ever
+# seen alive.
+class InternTable(Dict[str, str]):
+    __slots__ = ()
+
+    def __missing__(self, key: str) -> str:
+        if len(self) >= max_interned:
+            self.clear()
+        self[key] = key
+        return key
+
+
+_ws_chars = "\t \u00A0\u1680\u2000-\u200A\u202F\u205F\u3000\uFFEF"
+_newline_chars = "\r\n\u0085\u000C\u2028\u2029"
+_non_identifier_chars = r'/\\(){}<>;\[\]=,"'
+
+ws_re = re.compile(f"[{_ws_chars}]+")
+newline_re = re.compile(f"\r\n|[{_newline_chars}]")
+linespace_re = re.compile(f"(?:[{_ws_chars}{_newline_chars}]|//[^{_newline_chars}]*)+")
+line_comment_re = re.compile(f"//[^{_newline_chars}]*")
+single_line_comment_re = re.compile(f"{line_comment_re.pattern}(?:{newline_re.pattern})?")
+block_comment_re = re.compile(r"/\*|\*/")
+bare_identifier_re = re.compile(
+    f"[^+\\-0-9{_non_identifier_chars}{_newline_chars}{_ws_chars}]"
+    f"[^{_non_identifier_chars}{_newline_chars}{_ws_chars}]*"
+)
+number_re = re.compile(
+    r"(?P<hex>[+-]?0x[0-9a-fA-F][0-9a-fA-F_]*)"
+    r"|(?P<octal>[+-]?0o[0-7][0-7_]*)"
+    r"|(?P<binary>[+-]?0b[01][01_]*)"
+    r"|(?P<decimal>[+-]?[0-9][0-9_]*(?:\.[0-9][0-9_]*)?(?:[eE][+-]?[0-9][0-9_]*)?)"
+)
+# The body of an escaped string, without its quotes. Backslashes that don't start a valid
+# escape are kept as they are.
+escaped_string_body = r'[^"\\]*(?:\\.[^"\\]*)*'
+escaped_string_re = re.compile(f'"({escaped_string_body})"', re.DOTALL)
+escape_re = re.compile(r'\\(?:([\\/bfnrt"])|u\{([0-9a-fA-F]{1,6})\})')
+raw_string_start_re = re.compile(r'r(#*)"')
+boundary_re = re.compile('"|/\\*|//|\\\\|[{};]|' + newline_re.pattern)
+
+keywords = {"true": "boolean", "false": "boolean", "null": "null"}
+
+
+class ParseFailure(Exception):
+    def __init__(self, message: str, pos: int):
+        super().__init__(f"{message} (at offset {pos})")
+        self.pos = pos
+
+
+def _unescape_match(match: re.Match) -> str:
+    named = match.group(1)
+    if named is not None:
+        return named_escapes[named]
+    return chr(int(match.group(2), 16))
+
+
+def unescape_string(val: str, /) -> str:
+    if "\\" in val:
+        return escape_re.sub(_unescape_match, val)
+    return val
+
+
+def _block_comment_end(s: str, pos: int, /) -> int:
+    search = block_comment_re.search
+    while True:
+        match = search(s, pos)
+        if match is None:
+            return -1
+        if match.group() == "*/":
+            return match.end()
+
+        end = _block_comment_end(s, match.end())
+        if end == -1:
+            # An unterminated nested comment doesn't count as one, so its opening
+            # slash may instead be followed by the end of this comment.
+            start = match.start() + 1
+            return start + 2 if s.startswith("*/", start) else -1
+        pos = end
+
+
+def skip_block_comment(s: str, pos: int, /) -> int:
+    end = _block_comment_end(s, pos + 2)
+    if end == -1:
+        raise ParseFailure("Unterminated block comment", pos)
+    return end
+
+
+def skip_ws(s: str, pos: int, /) -> int:
+    while True:
+        match = ws_re.match(s, pos)
+        if match is not None:
+            pos = match.end()
+        if s.startswith("/*", pos):
+            pos = skip_block_comment(s, pos)
+        else:
+            return pos
+
+
+def skip_linespace(s: str, pos: int, /) -> int:
+    while True:
+        match = linespace_re.match(s, pos)
+        if match is not None:
+            pos = match.end()
+        if s.startswith("/*", pos):
+            pos = skip_block_comment(s, pos)
+        else:
+            return pos
+
+
+# Line continuation: '\' {ws} (single_line_comment | newline)
+def scan_escline(s: str, pos: int, /) -> int:
+    end = skip_ws(s, pos + 1)
+    match = single_line_comment_re.match(s, end) or newline_re.match(s, end)
+    if match is None:
+        return -1
+    return match.end()
+
+
+def skip_node_space(s: str, pos: int, /) -> int:
+    while True:
+        pos = skip_ws(s, pos)
+        if not s.startswith("\\", pos):
+            return pos
+        end = scan_escline(s, pos)
+        if end == -1:
+            return pos
+        pos = end
+
+
+def scan_node_terminator(s: str, pos: int, /) -> int:
+    if pos == len(s):
+        return pos
+    char = s[pos]
+    if char == ";":
+        return pos + 1
+    if s.startswith("//", pos):
+        return single_line_comment_re.match(s, pos).end()  # type: ignore[union-attr]
+    match = newline_re.match(s, pos)
+    if match is None:
+        raise ParseFailure("Expected end of node", pos)
+    return match.end()
+
+
+def scan_escaped_string(s: str, pos: int, /) -> Tuple[str, int]:
+    match = escaped_string_re.match(s, pos)
+    if match is None:
+        raise ParseFailure("Unterminated string", pos)
+    return unescape_string(match.group(1)), match.end()
+
+
+def scan_raw_string(s: str, pos: int, hashes: str, /) -> Tuple[str, int]:
+    start = pos + len(hashes) + 2
+    fence = '"' + hashes
+    end = s.find(fence, start)
+    if end == -1:
+        raise ParseFailure("EOF while reading raw string", pos)
+    after = end + len(fence)
+    if s.startswith("#", after):
+        raise ParseFailure("Too many # characters when closing raw string", after)
+    return s[start:end], after
+
+
+def scan_string(s: str, pos: int, /) -> Optional[Tuple[str, int]]:
+    if s.startswith('"', pos):
+        return scan_escaped_string(s, pos)
+    if s.startswith("r", pos):
+        match = raw_string_start_re.match(s, pos)
+        if match is not None:
+            return scan_raw_string(s, pos, match.group(1))
+    return None
+
+
+def scan_identifier(s: str, pos: int, /) -> Tuple[str, int]:
+    string = scan_string(s, pos)
+    if string is not None:
+        return string
+
+    match = bare_identifier_re.match(s, pos)
+    if match is None:
+        raise ParseFailure("Expected identifier", pos)
+    ident = match.group()
+    if ident in keywords:
+        raise ParseFailure(f"Illegal bare identifier {ident!r}", pos)
+    return ident, match.end()
+
+
+def scan_type(s: str, pos: int, /) -> Tuple[str, int]:
+    # The caller has already confirmed the opening parenthesis.
+    ident, pos = scan_identifier(s, pos + 1)
+    if not s.startswith(")", pos):
+        raise ParseFailure("Expected ')' after type annotation", pos)
+    return ident, pos + 1
+
+
+# Returns the type annotation, the literal kind, the raw literal and the end offset.
+def scan_value(s: str, pos: int, /) -> Tuple[Optional[str], str, str, int]:
+    val_type: Optional[str] = None
+    if s.startswith("(", pos):
+        val_type, pos = scan_type(s, pos)
+
+    # The group that matched a number is its kind.
+    match = number_re.match(s, pos)
+    if match is not None:
+        return val_type, match.lastgroup, match.group(), match.end()  # type: ignore[return-value]
+
+    string = scan_string(s, pos)
+    if string is not None:
+        return val_type, "string", string[0], string[1]
+
+    match = bare_identifier_re.match(s, pos)
+    if match is not None:
+        kind = keywords.get(match.group())
+        if kind is not None:
+            return val_type, kind, match.group(), match.end()
+
+    raise ParseFailure("Expected value", pos)
+
+
+# Same as scan_value(), prefixed with the property key (or None for arguments).
+def scan_arg_or_prop(s: str, pos: int, /) -> Tuple[Optional[str], Optional[str], str, str, int]:
+    # Numbers are by far the most common arguments in data-heavy documents, and can't be
+    # property keys.
+    match = number_re.match(s, pos)
+    if match is not None:
+        return None, None, match.lastgroup, match.group(), match.end()  # type: ignore[return-value]
+
+    string = scan_string(s, pos)
+    if string is not None:
+        key, end = string
+        if s.startswith("=", end):
+            return (key,) + scan_value(s, end + 1)
+        return None, None, "string", key, end
+
+    if not s.startswith("(", pos):
+        match = bare_identifier_re.match(s, pos)
+        if match is not None:
+            key = match.group()
+            kind = keywords.get(key)
+            if kind is not None:
+                return None, None, kind, key, match.end()
+            end = match.end()
+            if not s.startswith("=", end):
+                raise ParseFailure("Expected '=' after property key", end)
+            return (key,) + scan_value(s, end + 1)
+
+    return (None,) + scan_value(s, pos)
+
+
+# Returns whether the block is slashdashed, and the offset just past the brace (or -1).
+def scan_children_start(s: str, pos: int, /) -> Tuple[bool, int]:
+    if s.startswith("{", pos):
+        return False, pos + 1
+    if s.startswith("/-", pos):
+        brace = skip_node_space(s, pos + 2)
+        if s.startswith("{", brace):
+            return True, brace + 1
+    return False, -1
+
+
+# Scans a node up to (but not including) its children block. Returns whether the node is
+# slashdashed, its type annotation, its name, its (non-slashdashed) arguments and properties
+# in the form returned by scan_arg_or_prop(), and the end offset.
+def scan_node_head(s: str, pos: int, /) -> Tuple[bool, Optional[str], str, List[Entry], int]:
+    commented = False
+    if s.startswith("/-", pos):
+        commented = True
+        pos = skip_ws(s, pos + 2)
+
+    node_type: Optional[str] = None
+    if s.startswith("(", pos):
+        node_type, pos = scan_type(s, pos)
+    name, pos = scan_identifier(s, pos)
+
+    entries: List[Entry] = []
+    end = len(s)
+    while True:
+        start = skip_node_space(s, pos)
+        if start == pos or start == end:
+            break
+        char = s[start]
+        if char == "{" or char == ";" or s.startswith("//", start):
+            break
+        if newline_re.match(s, start) is not None:
+            break
+
+        entry_commented = False
+        if s.startswith("/-", start):
+            if scan_children_start(s, start)[1] != -1:
+                break
+            entry_commented = True
+            start = skip_node_space(s, start + 2)
+
+        key, val_type, kind, raw_value, pos = scan_arg_or_prop(s, start)
+        if not entry_commented:
+            entries.append((key, val_type, kind, raw_value))
+
+    return commented, node_type, name, entries, pos
+
+
+def skip_node(s: str, pos: int, /) -> int:
+    return skip_node_tail(s, scan_node_head(s, pos)[4])
+
+
+# Skips the children block (if any) and terminator following the end of scan_node_head().
+def skip_node_tail(s: str, pos: int, /) -> int:
+    start = scan_children_start(s, skip_node_space(s, pos))[1]
+    if start != -1:
+        pos = skip_nodes(s, start)
+    return scan_node_terminator(s, skip_node_space(s, pos))
+
+
+# Skips the contents of a children block, returning the offset just past its closing brace.
+def skip_nodes(s: str, pos: int, /) -> int:
+    end = len(s)
+    while True:
+        pos = skip_linespace(s, pos)
+        if pos == end:
+            raise ParseFailure("Expected '}' to close children block", pos)
+        if s[pos] == "}":
+            return pos + 1
+        pos = skip_node(s, pos)
+
+
+# Yields the offset just past each top-level node terminator (and each blank line between
+# nodes), which are the points a document can be split at without changing its meaning.
+# Scanning stops at the first construct that is unterminated, so callers can hand the
+# scanner an incomplete document.
+def iter_boundaries(s: str, /) -> Iterator[int]:
+    pos = 0
+    depth = 0
+    search = boundary_re.search
+    while True:
+        match = search(s, pos)
+        if match is None:
+            return
+
+        token = match.group()
+        start = match.start()
+        pos = match.end()
+        if token == '"':
+            hashes = 0
+            while start - hashes > 0 and s[start - hashes - 1] == "#":
+                hashes += 1
+            if start - hashes > 0 and s[start - hashes - 1] == "r":
+                close = s.find('"' + "#" * hashes, pos)
+                if close == -1:
+                    return
+                pos = close + 1 + hashes
+            else:
+                string_match = escaped_string_re.match(s, start)
+                if string_match is None:
+                    return
+                pos = string_match.end()
+        elif token == "/*":
+            pos = _block_comment_end(s, pos)
+            if pos == -1:
+                return
+        elif token == "//":
+            pos = line_comment_re.match(s, start).end()  # type: ignore[union-attr]
+        elif token == "\\":
+            try:
+                pos = scan_escline(s, start)
+            except ParseFailure:
+                # A block comment in the line continuation that hasn't been closed yet.
+                return
+            if pos == -1:
+                return
+        elif token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+        elif depth == 0:
+            yield pos
+
+
+# Splits text read through the given callable into pieces that each hold only complete
+# top-level nodes, so they can be parsed independently.
+def iter_complete_chunks(read: Callable[[int], str], chunk_size: int, /) -> Iterator[str]:
+    buffer = ""
+    read_size = chunk_size
+    while True:
+        chunk = read(read_size)
+        if not chunk:
+            if buffer:
+                yield buffer
+            return
+
+        buffer += chunk
+        boundary = 0
+        for boundary in iter_boundaries(buffer):
+            pass
+
+        if boundary == 0:
+            # Reading progressively more when a node spans several chunks keeps the
+            # total cost of rescanning the buffer linear in the size of that node.
+            read_size *= 2
+            continue
+
+        read_size = chunk_size
+        complete, buffer = buffer[:boundary], buffer[boundary:]
+        yield complete
+
+
+# Splits s into pieces that each hold only complete top-level nodes. All pieces but the last
+# are at least min_size characters long.
+def split_complete_chunks(s: str, min_size: int, /) -> List[str]:
+    chunks = []
+    start = 0
+    for boundary in iter_boundaries(s):
+        if boundary - start >= min_size:
+            chunks.append(s[start:boundary])
+            start = boundary
+
+    if start < len(s):
+        chunks.append(s[start:])
+    return chunks
+
+
+# What a selective parser does with a node, given the names of its ancestors and its name:
+# skip it entirely, look for selected nodes among its children, or build it.
+select_skip = 0
+select_descend = 1
+select_build = 2
+NodeMatcher = Callable[[Tuple[str, ...], str], int]
+
+
+def make_parser(
+    _decode_value: ValueDecoder,
+    _node_factory: Type[Node],
+    _node_list_factory: Type[NodeList],
+    _match: Optional[NodeMatcher] = None,
+    _intern: Optional[Interner] = None,
+) -> Callable[[str], List[Node]]:
+    # Nodes from custom factories always get their containers, even empty ones.
+    _custom_nodes = _node_factory is not Node
+    _custom_children = _custom_nodes or _node_list_factory is not NodeList
+
+    def parse_node(s: str, pos: int, /) -> Tuple[Optional[Node], int]:
+        commented, node_type, name, entries, pos = scan_node_head(s, pos)
+        if commented:
+            return None, skip_node_tail(s, pos)
+        return build_node(s, node_type, name, entries, pos)
+
+    def build_node(
+        s: str,
+        node_type: Optional[str],
+        name: str,
+        entries: List[Entry],
+        pos: int,
+        /,
+    ) -> Tuple[Node, int]:
+        args = []
+        props = {}
+        if _intern is None:
+            for key, val_type, kind, raw_value in entries:
+                if key is None:
+                    args.append(_decode_value(val_type, kind, raw_value))
+                else:
+                    props[key] = _decode_value(val_type, kind, raw_value)
+        else:
+            name = _intern(name)
+            if node_type is not None:
+                node_type = _intern(node_type)
+            for key, val_type, kind, raw_value in entries:
+                if val_type is not None:
+                    val_type = _intern(val_type)
+                if key is None:
+                    args.append(_decode_value(val_type, kind, raw_value))
+                else:
+                    props[_intern(key)] = _decode_value(val_type, kind, raw_value)
+
+        children: List[Node] = []
+        children_commented, start = scan_children_start(s, skip_node_space(s, pos))
+        if children_commented:
+            pos = skip_nodes(s, start)
+        elif start != -1:
+            children, pos = parse_nodes(s, start, True)
+
+        pos = scan_node_terminator(s, skip_node_space(s, pos))
+        # Empty arguments, properties and children are left for the node to allocate if they're
+        # ever used, unless the nodes or node lists are of a custom class.
+        node = _node_factory(
+            name,
+            node_type,
+            arguments=args if args or _custom_nodes else None,
+            properties=props if props or _custom_nodes else None,
+            children=_node_list_factory(children) if children or _custom_children else None,
+        )
+        return node, pos
+
+    def parse_nodes(s: str, pos: int, nested: bool, /) -> Tuple[List[Node], int]:
+        nodes: List[Node] = []
+        end = len(s)
+        while True:
+            pos = skip_linespace(s, pos)
+            if pos == end:
+                if nested:
+                    raise ParseFailure("Expected '}' to close children block", pos)
+                return nodes, pos
+            if nested and s[pos] == "}":
+                return nodes, pos + 1
+
+            node, pos = parse_node(s, pos)
+            if node is not None:
+                nodes.append(node)
+
+    def parse(s: str, /) -> List[Node]:
+        return parse_nodes(s, 0, False)[0]
+
+    if _match is None:
+        return parse
+
+    match = _match
+
+    # Only selected nodes are built. Everything else is scanned over without decoding any
+    # values, and nodes that can't contain a selected node are skipped as a whole.
+    def select_node(s: str, pos: int, path: Tuple[str, ...], selected: List[Node], /) -> int:
+        commented, node_type, name, entries, pos = scan_node_head(s, pos)
+        if commented:
+            return skip_node_tail(s, pos)
+
+        action = match(path, name)
+        if action == select_build:
+            node, pos = build_node(s, node_type, name, entries, pos)
+            selected.append(node)
+            return pos
+        elif action == select_skip:
+            return skip_node_tail(s, pos)
+
+        children_commented, start = scan_children_start(s, skip_node_space(s, pos))
+        if children_commented:
+            pos = skip_nodes(s, start)
+        elif start != -1:
+            pos = select_nodes(s, start, path + (name,), selected)
+        return scan_node_terminator(s, skip_node_space(s, pos))
+
+    def select_nodes(s: str, pos: int, path: Tuple[str, ...], selected: List[Node], /) -> int:
+        end = len(s)
+        nested = bool(path)
+        while True:
+            pos = skip_linespace(s, pos)
+            if pos == end:
+                if nested:
+                    raise ParseFailure("Expected '}' to close children block", pos)
+                return pos
+            if nested and s[pos] == "}":
+                return pos + 1
+            pos = select_node(s, pos, path, selected)
+
+    def parse_selected(s: str, /) -> List[Node]:
+        selected: List[Node] = []
+        select_nodes(s, 0, (), selected)
+        return selected
+
+    return parse_selected
+
+
+def make_event_parser(
+    _decode_value: ValueDecoder,
+    _intern: Optional[Interner] = None,
+) -> Callable[[str], Iterator[ParseEvent]]:
+    def iter_node_events(s: str, pos: int, /) -> Generator[ParseEvent, None, int]:
+        commented, node_type, name, entries, pos = scan_node_head(s, pos)
+        if commented:
+            return skip_node_tail(s, pos)
+
+        if _intern is not None:
+            name = _intern(name)
+            if node_type is not None:
+                node_type = _intern(node_type)
+            entries = [
+                (
+                    key if key is None else _intern(key),
+                    val_type if val_type is None else _intern(val_type),
+                    kind,
+                    raw_value,
+                )
+                for key, val_type, kind, raw_value in entries
+            ]
+
+        yield ("start_node", name, node_type)
+        for key, val_type, kind, raw_value in entries:
+            if key is None:
+                yield ("argument", _decode_value(val_type, kind, raw_value))
+            else:
+                yield ("property", key, _decode_value(val_type, kind, raw_value))
+
+        children_commented, start = scan_children_start(s, skip_node_space(s, pos))
+        if children_commented:
+            pos = skip_nodes(s, start)
+        elif start != -1:
+            end = len(s)
+            pos = start
+            while True:
+                pos = skip_linespace(s, pos)
+                if pos == end:
+                    raise ParseFailure("Expected '}' to close children block", pos)
+                if s[pos] == "}":
+                    pos += 1
+                    break
+                pos = yield from iter_node_events(s, pos)
+
+        pos = scan_node_terminator(s, skip_node_space(s, pos))
+        yield ("end_node",)
+        return pos
+
+    def iterparse(s: str, /) -> Iterator[ParseEvent]:
+        pos = skip_linespace(s, 0)
+        end = len(s)
+        while pos != end:
+            pos = yield from iter_node_events(s, pos)
+            pos = skip_linespace(s, pos)
+
+    return iterparse
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, List, Optional, Sequence, Type
+
+import tatsu.exceptions
+from tatsu.ast import AST
+from tatsu.contexts import tatsumasu
+
+from ._parser import (
+    Interner,
+    ParseFailure,
+    ValueDecoder,
+    escaped_string_body,
+    number_re,
+    unescape_string,
+)
+from .exception import KDLDecodeError
+from .grammar import KdlParser as BaseKdlParser
+from .grammar import KdlSemantics as BaseKdlSemantics
+from .structure import Node, NodeList
+
+
+# Everything that depends on TatSu lives here, so it's only imported once the TatSu engine
+# is actually used.
+
+
+escaped_string_pattern = f"(?s){escaped_string_body}"
+
+
+class KDLParser(BaseKdlParser):
+    @tatsumasu()
+    def _escaped_string_(self):
+        # The grammar matches escaped strings one character at a time, which is very slow for
+        # long strings. Match the whole body at once instead and unescape it in one go later.
+        self._token('"')
+        self._pattern(escaped_string_pattern)
+        self.name_last_node("escstring")
+        self._token('"')
+        self._define(["escstring"], [])
+
+    @tatsumasu()
+    def _number_(self):
+        # The grammar builds numbers out of many small rules and fragments. The native parser's
+        # pattern matches exactly the same literals in one go, and names their kind.
+        match = number_re.match(self._tokenizer.text, self._tokenizer.pos)
+        if match is None:
+            self._error("expecting <number>")
+            # This is only to satisfy the type-checker
+            return  # pragma: no cover
+        kind = match.lastgroup
+        self._token(match.group())
+        self.name_last_node(kind)
+        self._define([kind], [])
+
+    @tatsumasu()
+    def _raw_string_hash_(self):
+        start_hash_depth = 0
+        peek_char = self._tokenizer.peek(start_hash_depth)
+        while peek_char == "#":
+            start_hash_depth += 1
+            peek_char = self._tokenizer.peek(start_hash_depth)
+        if start_hash_depth > 0:
+            self._token("#" * start_hash_depth)
+
+        if peek_char != '"':
+            self._error("malformed raw string")
+        self._token('"')
+
+        text = self._tokenizer.text
+        pos = self._tokenizer.pos
+        end = text.find('"' + "#" * start_hash_depth, pos)
+        if end == -1:
+            self._token(text[pos:])
+            self._error("EOF while reading raw string")
+
+        self._token(text[pos:end])
+        self._token('"')
+        if start_hash_depth > 0:
+            self._token("#" * start_hash_depth)
+
+        if self._tokenizer.peek(0) == "#":
+            self._error("too many # characters when closing raw string")
+
+    @tatsumasu()
+    def _raw_string_quotes_(self):
+        # It shouldn't actually be possible to trigger this.
+        self._error("total parsing failure")  # pragma: no cover
+
+
+class KDLParserSemanticActions(BaseKdlSemantics):
+    def bare_identifier(self, ast):
+        bare = "".join(ast)
+        if bare in ("true", "false", "null"):
+            raise tatsu.exceptions.FailedSemantics(f"Illegal bare identifier {bare!r}.")
+        return bare
+
+    def raw_string_hash(self, ast):
+        if len(ast) == 3:
+            return ast[1]
+        elif len(ast) == 5:
+            return ast[2]
+
+        # It shouldn't actually be possible to trigger this.
+        raise tatsu.exceptions.FailedSemantics(f"Invalid raw string {ast!r}.")  # pragma: no cover
+
+
+def _make_ast_parser() -> KDLParser:
+    ast_parser = KDLParser(whitespace="", semantics=KDLParserSemanticActions(), parseinfo=False)
+    ast_parser_config = getattr(ast_parser, "config", None)
+    if ast_parser_config:
+        # Work around BC break in Tatsu 5.7
+        ast_parser_config.comments_re = None
+        ast_parser_config.eol_comments_re = None
+    return ast_parser
+
+
+# TatSu parsers keep the state of the current parse on the instance, so each thread
+# needs its own.
+_thread_local = threading.local()
+
+
+def _get_ast_parser() -> KDLParser:
+    ast_parser = getattr(_thread_local, "ast_parser", None)
+    if ast_parser is None:
+        ast_parser = _thread_local.ast_parser = _make_ast_parser()
+    return ast_parser
+
+
+exists: Callable[[AST, str], bool] = (
+    lambda ast, name: ast is not None and name in ast and ast[name] is not None
+)
+
+
+def _make_ast_decoder(
+    _decode_value: ValueDecoder,
+    _node_factory: Type[Node],
+    _node_list_factory: Type[NodeList],
+    _intern: Optional[Interner],
+):
+    _custom_nodes = _node_factory is not Node
+    _custom_children = _custom_nodes or _node_list_factory is not NodeList
+
+    def parse_string(ast: AST, /):
+        if not exists(ast, "escstring"):
+            return ast["rawstring"]
+
+        return unescape_string(ast["escstring"])
+
+    def parse_identifier(ast: AST, /) -> str:
+        if exists(ast, "bare"):
+            ident = ast["bare"]
+        else:
+            ident = parse_string(ast["string"])
+        return ident if _intern is None else _intern(ident)
+
+    def parse_value(ast: AST, /) -> Any:
+        val = ast["value"]
+        val_type: Optional[str] = None
+        if exists(ast, "type"):
+            val_type = parse_identifier(ast["type"])
+
+        if exists(val, "null"):
+            return _decode_value(val_type, "null", val["null"])
+        elif exists(val, "boolean"):
+            return _decode_value(val_type, "boolean", val["boolean"])
+        elif exists(val, "hex"):
+            return _decode_value(val_type, "hex", val["hex"])
+        elif exists(val, "octal"):
+            return _decode_value(val_type, "octal", val["octal"])
+        elif exists(val, "binary"):
+            return _decode_value(val_type, "binary", val["binary"])
+        elif exists(val, "decimal"):
+            return _decode_value(val_type, "decimal", val["decimal"])
+        elif exists(val, "escstring") or exists(val, "rawstring"):
+            return _decode_value(val_type, "string", parse_string(val))
+        else:
+            # It shouldn't actually be possible to trigger this.
+            raise KDLDecodeError(f"Unknown AST node! Internal failure: {val!r}")  # pragma: no cover
+
+    def parse_args_and_props(ast: Sequence[AST], /):
+        args = []
+        props = {}
+        for elem in ast:
+            if exists(elem, "commented"):
+                continue
+            if exists(elem, "prop"):
+                props[parse_identifier(elem["prop"]["name"])] = parse_value(elem["prop"]["value"])
+            else:
+                args.append(parse_value(elem["value"]))
+        return props, args
+
+    def parse_node(ast: AST, /) -> Optional[Node]:
+        if len(ast) == 0 or exists(ast, "commented"):
+            return None
+
+        name = parse_identifier(ast["name"])
+        args = []
+        props = {}
+        children = []
+
+        if exists(ast, "args_and_props"):
+            props, args = parse_args_and_props(ast["args_and_props"])
+
+        if exists(ast, "children") and not exists(ast["children"], "commented"):
+            children = parse_nodes(ast["children"]["children"])
+
+        node_type: Optional[str] = None
+        if exists(ast, "type"):
+            node_type = parse_identifier(ast["type"])
+
+        return _node_factory(
+            name,
+            node_type,
+            arguments=args if args or _custom_nodes else None,
+            properties=props if props or _custom_nodes else None,
+            children=_node_list_factory(children) if children or _custom_children else None,
+        )
+
+    def parse_nodes(ast: Sequence[AST], /) -> List[Node]:
+        # TODO: Figure out why empty documents are so strangely handled
+        if ast[0] == [None]:
+            return []
+        elif (
+            isinstance(ast[0], list)
+            and len(ast[0]) > 0
+            and (
+                isinstance(ast[0][0], str)
+                or (isinstance(ast[0][0], tuple) and len(ast[0][0]) > 0 and ast[0][0][0] == "//")
+            )
+        ):
+            return []
+
+        nodes = map(parse_node, ast)
+        return list(filter(None, nodes))
+
+    return parse_nodes
+
+
+def make_tatsu_parser(
+    _decode_value: ValueDecoder,
+    _node_factory: Type[Node],
+    _node_list_factory: Type[NodeList],
+    _intern: Optional[Interner] = None,
+) -> Callable[[str], List[Node]]:
+    decode_ast = _make_ast_decoder(_decode_value, _node_factory, _node_list_factory, _intern)
+
+    def parse(s: str, /) -> List[Node]:
+        try:
+            ast = _get_ast_parser().parse(s)
+        except tatsu.exceptions.ParseException as e:
+            raise ParseFailure(str(e), getattr(e, "pos", 0)) from e
+        return decode_ast(ast)
+
+    return parse
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from os import PathLike
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ._compiled import CompiledCache, load_compiled
+from .structure import Document
+
+
+if TYPE_CHECKING:
+    from .decoder import KDLDecoder
+    from .frozen import FrozenDocument
+
+
+# Whether cached documents are copied on the way out, shared as they are, or kept and shared
+# as immutable FrozenDocuments.
+CopyMode = Union[bool, Literal["frozen"]]
+CachedDocument = Union[Document, "FrozenDocument"]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+
+class ParseCache:
+    def __init__(
+        self,
+        *,
+        max_entries: Optional[int] = 128,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        copy: CopyMode = True,
+    ):
+        if copy not in (True, False, "frozen"):
+            raise ValueError(f"Unknown copy mode {copy!r}.")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.copy = copy
+
+        # Each entry holds the cached value, its approximate size and whether the value is
+        # a pickled document rather than the document itself.
+        self._entries: OrderedDict[Hashable, Tuple[Any, int, bool]] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    # Only the settings are pickled, so a decoder sent to another process gets an empty cache.
+    def __reduce__(self) -> Tuple[Any, ...]:
+        settings = partial(
+            ParseCache, max_entries=self.max_entries, max_bytes=self.max_bytes, copy=self.copy
+        )
+        return settings, ()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, self._evictions, len(self._entries), self._size
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def decode(self, decoder: KDLDecoder, s: str, /) -> CachedDocument:
+        import hashlib
+
+        data = s.encode("utf-8", "surrogatepass")
+        key = ("digest", hashlib.blake2b(data).digest(), _decoder_key(decoder))
+        return self._get_or_decode(
+            key, lambda: (decoder._decode_document(s), len(data)), decoder.lazy
+        )
+
+    def load(
+        self,
+        decoder: KDLDecoder,
+        path: Union[str, PathLike],
+        /,
+        *,
+        compiled_cache: CompiledCache = False,
+    ) -> CachedDocument:
+        def decode_file() -> Tuple[Document, int]:
+            if compiled_cache is not False:
+                return load_compiled(decoder, path, compiled_cache), stat.st_size
+
+            with open(path, mode="r", encoding="utf-8") as f:
+                s = f.read()
+            return decoder._decode_document(s), len(s)
+
+        # An unchanged file is served from the cache without being read at all. On a miss,
+        # a compiled copy of the file is used if there's one.
+        stat = os.stat(path)
+        key = (
+            "path",
+            os.path.abspath(path),
+            stat.st_mtime_ns,
+            stat.st_size,
+            _decoder_key(decoder),
+        )
+        return self._get_or_decode(key, decode_file, decoder.lazy)
+
+    def _get_or_decode(
+        self,
+        key: Hashable,
+        decode: Callable[[], Tuple[Document, int]],
+        lazy: bool,
+        /,
+    ) -> CachedDocument:
+        import copy as copy_module
+        import pickle
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+
+        if entry is not None:
+            value, _, pickled = entry
+            if pickled:
+                return pickle.loads(value)
+            elif self.copy is True:
+                return copy_module.deepcopy(value)
+            return value
+
+        # Decode outside of the lock, so other threads aren't held up by a slow parse.
+        doc, size = decode()
+        if self.copy == "frozen":
+            # Frozen documents can't be changed, so every hit can share the same one.
+            frozen = doc.freeze()
+            self._store(key, (frozen, size, False))
+            return frozen
+        elif self.copy and lazy:
+            # Pickling a lazy document would decode all of its values. Copies keep them as
+            # they are, so that they're still only decoded, and fail, when they're used.
+            entry = copy_module.deepcopy(doc), size, False
+        elif self.copy:
+            try:
+                # Unpickling a document is much faster than deep-copying it, and the
+                # pickle's length gives a good measure of the document's size.
+                value = pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL)
+                entry = value, len(value), True
+            except Exception:
+                # Some of the document's values can't be pickled.
+                entry = copy_module.deepcopy(doc), size, False
+        else:
+            entry = doc, size, False
+        self._store(key, entry)
+        return doc
+
+    def _store(self, key: Hashable, entry: Tuple[Any, int, bool], /) -> None:
+        size = entry[1]
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._size -= old_entry[1]
+            self._entries[key] = entry
+            self._size += size
+
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                _, evicted_entry = self._entries.popitem(last=False)
+                self._size -= evicted_entry[1]
+                self._evictions += 1
+
+
+def _decoder_key(decoder: KDLDecoder, /) -> Hashable:
+    # Everything that changes what the decoder produces; the engine doesn't.
+    return (
+        type(decoder),
+        decoder.parse_null,
+        decoder.parse_bool,
+        decoder.parse_int,
+        decoder.parse_float,
+        decoder.parse_str,
+        decoder.ignore_unknown_types,
+        decoder.node_factory,
+        decoder.node_list_factory,
+        decoder.lazy,
+    )
+
+
+__all__ = (
+    "CachedDocument",
+    "CacheStats",
+    "CopyMode",
+    "ParseCache",
+)
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from ._parser import ParseEvent
+from .structure import Document, Node, NodeList
+
+
+# A document stored as parallel columns rather than as one object per node, for documents
+# with a great many nodes. Nodes are numbered in document order, so the descendants of a node
+# are the nodes from just after it up to its entry in `ends`. Node names, type annotations and
+# property keys are indexes into `strings`, and argument and property values are indexes
+# into `values`. The arguments of node i are arg_values[arg_starts[i]:arg_starts[i + 1]], or
+# up to the end of arg_values for the last node, and likewise for properties.
+class ColumnarDocument:
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self.values: List[Any] = []
+
+        self.names = array("I")
+        # -1 for nodes without a type annotation.
+        self.types = array("i")
+        # -1 for top-level nodes.
+        self.parents = array("i")
+        self.ends = array("I")
+
+        self.arg_starts = array("I")
+        self.arg_values = array("I")
+        self.prop_starts = array("I")
+        self.prop_keys = array("I")
+        self.prop_values = array("I")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[ColumnarNode]:
+        # The top-level nodes.
+        ends = self.ends
+        index = 0
+        count = len(ends)
+        while index < count:
+            yield ColumnarNode(self, index)
+            index = ends[index]
+
+    def __repr__(self) -> str:
+        return f"ColumnarDocument({list(self)!r})"
+
+    def node(self, index: int, /) -> ColumnarNode:
+        if not 0 <= index < len(self.names):
+            raise IndexError("Node index out of range.")
+        return ColumnarNode(self, index)
+
+    def to_document(
+        self,
+        *,
+        node_factory: Type[Node] = Node,
+        node_list_factory: Type[NodeList] = NodeList,
+    ) -> Document:
+        custom_nodes = node_factory is not Node
+        custom_children = custom_nodes or node_list_factory is not NodeList
+        ends = self.ends
+        top_level: List[Node] = []
+        # The nodes that haven't ended yet, with their children so far. Each node is made once
+        # all of its children have been.
+        stack: List[Tuple[int, List[Node]]] = []
+        for index in range(len(self.names)):
+            stack.append((index, []))
+            while stack and ends[stack[-1][0]] == index + 1:
+                node_index, children = stack.pop()
+                arguments = self._arguments(node_index)
+                properties = self._properties(node_index)
+                node = node_factory(
+                    self.strings[self.names[node_index]],
+                    self._node_type(node_index),
+                    arguments=arguments if arguments or custom_nodes else None,
+                    properties=properties if properties or custom_nodes else None,
+                    children=node_list_factory(children) if children or custom_children else None,
+                )
+                (stack[-1][1] if stack else top_level).append(node)
+        return Document(node_list_factory(top_level))
+
+    def _node_type(self, index: int, /) -> Optional[str]:
+        node_type = self.types[index]
+        return None if node_type == -1 else self.strings[node_type]
+
+    def _span(self, starts: array, index: int, total: int, /) -> range:
+        end = starts[index + 1] if index + 1 < len(starts) else total
+        return range(starts[index], end)
+
+    def _arguments(self, index: int, /) -> List[Any]:
+        values = self.values
+        arg_values = self.arg_values
+        span = self._span(self.arg_starts, index, len(arg_values))
+        return [values[arg_values[i]] for i in span]
+
+    def _properties(self, index: int, /) -> Dict[str, Any]:
+        strings = self.strings
+        values = self.values
+        prop_keys = self.prop_keys
+        prop_values = self.prop_values
+        span = self._span(self.prop_starts, index, len(prop_keys))
+        return {strings[prop_keys[i]]: values[prop_values[i]] for i in span}
+
+
+# A read-only view of one node of a ColumnarDocument. Its arguments, properties and children
+# are put together each time they're asked for.
+class ColumnarNode:
+    __slots__ = ("document", "index")
+
+    def __init__(self, document: ColumnarDocument, index: int, /):
+        self.document = document
+        self.index = index
+
+    def __repr__(self) -> str:
+        details = [f"name={self.name!r}"]
+        if self.node_type:
+            details.append(f"type={self.node_type!r}")
+        arguments = self.arguments
+        if arguments:
+            details.append(f"arguments={arguments!r}")
+        properties = self.properties
+        if properties:
+            details.append(f"properties={properties!r}")
+        children = self.children
+        if children:
+            details.append(f"children={children!r}")
+        return f"ColumnarNode({', '.join(details)})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ColumnarNode):
+            return self.document is other.document and self.index == other.index
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self.document), self.index))
+
+    def __iter__(self):
+        raise TypeError("KDL nodes are not iterable.")
+
+    def __getitem__(self, name: Union[int, str]) -> Any:
+        if isinstance(name, int):
+            return self.arguments[name]
+        else:
+            return self.properties[name]
+
+    @property
+    def name(self) -> str:
+        doc = self.document
+        return doc.strings[doc.names[self.index]]
+
+    @property
+    def node_type(self) -> Optional[str]:
+        return self.document._node_type(self.index)
+
+    @property
+    def arguments(self) -> List[Any]:
+        return self.document._arguments(self.index)
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        return self.document._properties(self.index)
+
+    @property
+    def children(self) -> List[ColumnarNode]:
+        doc = self.document
+        ends = doc.ends
+        children = []
+        index = self.index + 1
+        end = ends[self.index]
+        while index < end:
+            children.append(ColumnarNode(doc, index))
+            index = ends[index]
+        return children
+
+    @property
+    def parent(self) -> Optional[ColumnarNode]:
+        parent = self.document.parents[self.index]
+        return None if parent == -1 else ColumnarNode(self.document, parent)
+
+
+_shared_classes = frozenset((str, int, bool, float, type(None)))
+
+
+def build_columnar(events: Iterable[ParseEvent], /) -> ColumnarDocument:
+    doc = ColumnarDocument()
+    strings = doc.strings
+    values = doc.values
+    names = doc.names
+    types = doc.types
+    parents = doc.parents
+    ends = doc.ends
+    arg_starts = doc.arg_starts
+    arg_values = doc.arg_values
+    prop_starts = doc.prop_starts
+    prop_keys = doc.prop_keys
+    prop_values = doc.prop_values
+
+    string_indexes: Dict[str, int] = {}
+    # Equal values of different classes, like 1, 1.0 and true, are kept apart.
+    value_indexes: Dict[type, Dict[Any, int]] = {}
+
+    def string_index(val: str, /) -> int:
+        idx = string_indexes.get(val)
+        if idx is None:
+            idx = string_indexes[val] = len(strings)
+            strings.append(val)
+        return idx
+
+    def value_index(val: Any, /) -> int:
+        cls = val.__class__
+        if cls is float:
+            # 0.0 and -0.0 are equal, their reprs aren't.
+            key = repr(val)
+        elif cls in _shared_classes:
+            key = val
+        else:
+            # Equal values like 1.0 and 1.00 decimals or date-times in different zones
+            # aren't the same value, so only values whose equality means identity are
+            # shared.
+            values.append(val)
+            return len(values) - 1
+        indexes = value_indexes.get(cls)
+        if indexes is None:
+            indexes = value_indexes[cls] = {}
+        idx = indexes.get(key)
+        if idx is None:
+            idx = indexes[key] = len(values)
+            values.append(val)
+        return idx
+
+    open_nodes: List[int] = []
+    for event in events:
+        kind = event[0]
+        if kind == "argument":
+            arg_values.append(value_index(event[1]))
+        elif kind == "property":
+            prop_keys.append(string_index(event[1]))
+            prop_values.append(value_index(event[2]))
+        elif kind == "start_node":
+            names.append(string_index(event[1]))
+            types.append(-1 if event[2] is None else string_index(event[2]))
+            parents.append(open_nodes[-1] if open_nodes else -1)
+            # Filled in when the node ends.
+            ends.append(0)
+            arg_starts.append(len(arg_values))
+            prop_starts.append(len(prop_keys))
+            open_nodes.append(len(names) - 1)
+        else:
+            ends[open_nodes.pop()] = len(names)
+    return doc
+
+
+__all__ = (
+    "ColumnarDocument",
+    "ColumnarNode",
+)
@@ -1,19 +1,54 @@
 from __future__ import annotations
 
+import codecs
+import os
+import sys
 from functools import partial
-from typing import Any, Callable, List, Optional, Sequence, Type
-
-import tatsu.exceptions
-from tatsu.ast import AST
-from tatsu.contexts import tatsumasu
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
-from ._escaping import named_escapes
+from ._binary import make_binary_decoder
+from ._parser import (
+    Interner,
+    InternTable,
+    NodeMatcher,
+    ParseEvent,
+    ParseFailure,
+    ValueDecoder,
+    iter_complete_chunks,
+    make_event_parser,
+    make_parser,
+    select_build,
+    select_descend,
+    select_skip,
+    split_complete_chunks,
+)
+from .cache import ParseCache
 from .exception import KDLDecodeError
-from .grammar import KdlParser as BaseKdlParser
-from .grammar import KdlSemantics as BaseKdlSemantics
+from .lazy import make_lazy_node_factory, make_lazy_value_decoder
+from .registry import default_registry
 from .structure import Document, Node, NodeList
 
 
+if TYPE_CHECKING:
+    from .columnar import ColumnarDocument
+
 FactoryTypeParam = Optional[str]
 NullFactory = Callable[[FactoryTypeParam, str], Any]
 BoolFactory = Callable[[FactoryTypeParam, str], Any]
@@ -21,15 +56,17 @@ IntFactory = Callable[[FactoryTypeParam, str, int], Any]
 FloatFactory = Callable[[FactoryTypeParam, str], Any]
 StrFactory = Callable[[FactoryTypeParam, str], Any]
 
+ParserEngine = Literal["native", "tatsu"]
+# True interns identifiers in a table of the decoder's own, and "sys" with sys.intern().
+InternMode = Union[bool, Literal["sys"]]
+Buffer = Union[bytes, bytearray, memoryview]
 
-def _strflatten(iterable) -> str:
-    result = ""
-    for item in iterable:
-        if isinstance(item, str):
-            result += item
-        else:
-            result += _strflatten(item)
-    return result
+# The names of a node's ancestors, starting from the top level.
+NodePath = Tuple[str, ...]
+NodePredicate = Callable[[NodePath, str], bool]
+# Either a predicate on a node's path and name, or the paths of the nodes to select, written
+# as "parent/child" strings or sequences of names.
+NodeSelector = Union[NodePredicate, Iterable[Union[str, Sequence[str]]]]
 
 
 def _clean_nondecimal_number(raw_value: str) -> str:
@@ -42,266 +79,197 @@ def _clean_nondecimal_number(raw_value: str) -> str:
     return sanitised_value
 
 
-class KDLParser(BaseKdlParser):
-    @tatsumasu()
-    def _raw_string_hash_(self):
-        start_hash_depth = 0
-        peek_char = self._tokenizer.peek(start_hash_depth)
-        while peek_char == "#":
-            start_hash_depth += 1
-            peek_char = self._tokenizer.peek(start_hash_depth)
-        if start_hash_depth > 0:
-            self._token("#" * start_hash_depth)
-
-        if peek_char != '"':
-            self._error("malformed raw string")
-        self._token('"')
-
-        inside_raw_str = ""
-        while True:
-            peek_char = self._tokenizer.peek(len(inside_raw_str))
-            if peek_char is None:
-                self._token(inside_raw_str)
-                self._error("EOF while reading raw string")
-                # This is only to satisfy the type-checker
-                continue  # pragma: no cover
-            elif peek_char != '"':
-                inside_raw_str += peek_char
-                continue
-
-            sub_inside_raw_str = '"'
-            end_hash_depth = 0
-            while True:
-                peek_char = self._tokenizer.peek(len(inside_raw_str) + len(sub_inside_raw_str))
-                if peek_char != "#":
-                    break
-                sub_inside_raw_str += "#"
-                end_hash_depth += 1
-
-            if end_hash_depth < start_hash_depth:
-                inside_raw_str += sub_inside_raw_str
-                continue
-
-            self._token(inside_raw_str)
-            self._token('"')
-            if end_hash_depth > 0:
-                self._token("#" * end_hash_depth)
-
-            if end_hash_depth == start_hash_depth:
-                return
-            else:
-                self._error("too many # characters when closing raw string")
-
-    @tatsumasu()
-    def _raw_string_quotes_(self):
-        # It shouldn't actually be possible to trigger this.
-        self._error("total parsing failure")  # pragma: no cover
-
-
-class KDLParserSemanticActions(BaseKdlSemantics):
-    def bare_identifier(self, ast):
-        bare = "".join(ast)
-        if bare in ("true", "false", "null"):
-            raise tatsu.exceptions.FailedSemantics(f"Illegal bare identifier {bare!r}.")
-        return bare
-
-    def raw_string_hash(self, ast):
-        if len(ast) == 3:
-            return ast[1]
-        elif len(ast) == 5:
-            return ast[2]
-
-        # It shouldn't actually be possible to trigger this.
-        raise tatsu.exceptions.FailedSemantics(f"Invalid raw string {ast!r}.")  # pragma: no cover
-
-    def decimal(self, ast):
-        flat_value = _strflatten(ast["decimal"])
-        dict.__setitem__(ast, "decimal", flat_value)
-        return ast
-
-    def hex(self, ast):  # noqa: A003
-        flat_value = _strflatten(ast["hex"])
-        dict.__setitem__(ast, "hex", flat_value)
-        return ast
-
-    def octal(self, ast):
-        flat_value = _strflatten(ast["octal"])
-        dict.__setitem__(ast, "octal", flat_value)
-        return ast
+_blank = object()
 
-    def binary(self, ast):
-        flat_value = _strflatten(ast["binary"])
-        dict.__setitem__(ast, "binary", flat_value)
-        return ast
 
+_int_bases = {"decimal": 10, "hex": 16, "octal": 8, "binary": 2}
 
-ast_parser = KDLParser(whitespace="", semantics=KDLParserSemanticActions(), parseinfo=False)
-ast_parser_config = getattr(ast_parser, "config", None)
-if ast_parser_config:
-    # Work around BC break in Tatsu 5.7
-    ast_parser_config.comments_re = None
-    ast_parser_config.eol_comments_re = None
 
+# What a value decodes to when its factory returns _blank and that's allowed.
+def _fallback_value(kind: str, sanitised_value: str, /) -> Any:
+    if kind == "string":
+        return sanitised_value
+    elif kind == "float":
+        return float(sanitised_value)
+    elif kind == "boolean":
+        return sanitised_value == "true"
+    elif kind == "null":
+        return None
+    return int(sanitised_value, _int_bases[kind])
 
-exists: Callable[[AST, str], bool] = (
-    lambda ast, name: ast is not None and name in ast and ast[name] is not None
-)
 
-_blank = object()
+def _uses_default_factories(
+    _null_factory: NullFactory,
+    _bool_factory: BoolFactory,
+    _int_factory: IntFactory,
+    _float_factory: FloatFactory,
+    _str_factory: StrFactory,
+) -> bool:
+    return (
+        _null_factory is default_null_parser
+        and _bool_factory is default_bool_parser
+        and _int_factory is default_int_parser
+        and _float_factory is default_float_parser
+        and _str_factory is default_str_parser
+    )
 
 
-def _make_decoder(
+def _make_value_decoder(
     _null_factory: NullFactory,
     _bool_factory: BoolFactory,
     _int_factory: IntFactory,
     _float_factory: FloatFactory,
     _str_factory: StrFactory,
     _ignore_unknown_types: bool,
-    _node_factory: Type[Node],
-    _node_list_factory: Type[NodeList],
-):
-    def parse_string(ast: AST, /):
-        if not exists(ast, "escstring"):
-            return ast["rawstring"]
-
-        val = ""
-        for elem in ast["escstring"]:
-            if exists(elem, "char"):
-                val += elem["char"]
-            elif exists(elem, "escape"):
-                esc = elem["escape"]
-                if exists(esc, "named"):
-                    val += named_escapes[esc["named"]]
-                else:
-                    val += chr(int(esc["unichar"], 16))
-            else:
-                # It shouldn't actually be possible to trigger this.
-                raise KDLDecodeError(
-                    f"Improperly parsed string {ast['escstring']!r}."
-                )  # pragma: no cover
-
-        return val
-
-    def parse_identifier(ast: AST, /) -> str:
-        if exists(ast, "bare"):
-            return ast["bare"]
-
-        return parse_string(ast["string"])
-
-    def parse_value(ast: AST, /) -> Any:
-        val = ast["value"]
-        val_type: Optional[str] = None
-        if exists(ast, "type"):
-            val_type = parse_identifier(ast["type"])
-
-        fallback_factory: Callable[[str], Any]
-        if exists(val, "null"):
-            raw_value = val["null"]
-            sanitised_value = raw_value
-            retval = _null_factory(val_type, sanitised_value)
-            fallback_factory = lambda x: None
-        elif exists(val, "boolean"):
-            raw_value = val["boolean"]
+) -> ValueDecoder:
+    def decode_value(val_type: Optional[str], kind: str, raw_value: str, /) -> Any:
+        if kind == "string":
             sanitised_value = raw_value
-            retval = _bool_factory(val_type, sanitised_value)
-            fallback_factory = lambda x: x == "true"
-        elif exists(val, "hex"):
-            raw_value = val["hex"]
-            sanitised_value = _clean_nondecimal_number(raw_value)
-            retval = _int_factory(val_type, sanitised_value, 16)
-            fallback_factory = partial(int, base=16)
-        elif exists(val, "octal"):
-            raw_value = val["octal"]
-            sanitised_value = _clean_nondecimal_number(raw_value)
-            retval = _int_factory(val_type, sanitised_value, 8)
-            fallback_factory = partial(int, base=8)
-        elif exists(val, "binary"):
-            raw_value = val["binary"]
-            sanitised_value = _clean_nondecimal_number(raw_value)
-            retval = _int_factory(val_type, sanitised_value, 2)
-            fallback_factory = partial(int, base=2)
-        elif exists(val, "decimal"):
-            raw_value = val["decimal"]
+            retval = _str_factory(val_type, sanitised_value)
+        elif kind == "decimal":
             sanitised_value = raw_value.replace("_", "")
             if "." in sanitised_value or "e" in sanitised_value or "E" in sanitised_value:
                 retval = _float_factory(val_type, sanitised_value)
-                fallback_factory = float
+                kind = "float"
             else:
                 retval = _int_factory(val_type, sanitised_value, 10)
-                fallback_factory = partial(int, base=10)
-        elif exists(val, "escstring") or exists(val, "rawstring"):
-            raw_value = parse_string(val)
+        elif kind == "boolean":
             sanitised_value = raw_value
-            retval = _str_factory(val_type, sanitised_value)
-            fallback_factory = lambda x: x
+            retval = _bool_factory(val_type, sanitised_value)
+        elif kind == "null":
+            sanitised_value = raw_value
+            retval = _null_factory(val_type, sanitised_value)
+        elif kind in _int_bases:
+            sanitised_value = _clean_nondecimal_number(raw_value)
+            retval = _int_factory(val_type, sanitised_value, _int_bases[kind])
         else:
             # It shouldn't actually be possible to trigger this.
-            raise KDLDecodeError(f"Unknown AST node! Internal failure: {val!r}")  # pragma: no cover
+            raise KDLDecodeError(
+                f"Unknown value kind {kind!r}! Internal failure."
+            )  # pragma: no cover
 
         if retval is not _blank:
             return retval
 
         if val_type is None or _ignore_unknown_types:
-            return fallback_factory(sanitised_value)
+            return _fallback_value(kind, sanitised_value)
 
         if val_type is not None:
             raise KDLDecodeError(f"Failed to decode value {raw_value!r} with type {val_type!r}.")
         else:
             raise KDLDecodeError(f"Failed to decode value {raw_value!r}.")
 
-    def parse_args_and_props(ast: Sequence[AST], /):
-        args = []
-        props = {}
-        for elem in ast:
-            if exists(elem, "commented"):
-                continue
-            if exists(elem, "prop"):
-                props[parse_identifier(elem["prop"]["name"])] = parse_value(elem["prop"]["value"])
-            else:
-                args.append(parse_value(elem["value"]))
-        return props, args
+    if not _uses_default_factories(
+        _null_factory, _bool_factory, _int_factory, _float_factory, _str_factory
+    ):
+        return decode_value
 
-    def parse_node(ast: AST, /) -> Optional[Node]:
-        if len(ast) == 0 or exists(ast, "commented"):
+    # The default factories turn untyped values into the obvious Python values, so those can
+    # be decoded directly.
+    def decode_default_value(val_type: Optional[str], kind: str, raw_value: str, /) -> Any:
+        if val_type is not None:
+            return decode_value(val_type, kind, raw_value)
+
+        if kind == "string":
+            return raw_value
+        elif kind == "decimal":
+            if "_" in raw_value:
+                raw_value = raw_value.replace("_", "")
+            if "." in raw_value or "e" in raw_value or "E" in raw_value:
+                return float(raw_value)
+            return int(raw_value, 10)
+        elif kind == "boolean":
+            return raw_value == "true"
+        elif kind == "null":
             return None
-
-        name = parse_identifier(ast["name"])
-        args = []
-        props = {}
-        children = []
-
-        if exists(ast, "args_and_props"):
-            props, args = parse_args_and_props(ast["args_and_props"])
-
-        if exists(ast, "children") and not exists(ast["children"], "commented"):
-            children = parse_nodes(ast["children"]["children"])
-
-        node_type: Optional[str] = None
-        if exists(ast, "type"):
-            node_type = parse_identifier(ast["type"])
-
-        return _node_factory(
-            name, node_type, arguments=args, properties=props, children=_node_list_factory(children)
-        )
-
-    def parse_nodes(ast: Sequence[AST], /) -> List[Node]:
-        # TODO: Figure out why empty documents are so strangely handled
-        if ast[0] == [None]:
-            return []
-        elif (
-            isinstance(ast[0], list)
-            and len(ast[0]) > 0
-            and (
-                isinstance(ast[0][0], str)
-                or (isinstance(ast[0][0], tuple) and len(ast[0][0]) > 0 and ast[0][0][0] == "//")
-            )
-        ):
-            return []
-
-        nodes = map(parse_node, ast)
-        return list(filter(None, nodes))
-
-    return parse_nodes
+        # int() accepts the 0x, 0o and 0b prefixes when given the matching base.
+        return int(raw_value.replace("_", ""), _int_bases[kind])
+
+    return decode_default_value
+
+
+class _DecoderPlan(NamedTuple):
+    settings: Tuple[Any, ...]
+    default_factories: bool
+    decode_value: ValueDecoder
+    # What values and nodes are built with, which differ from decode_value and the decoder's
+    # node factory in lazy mode.
+    decode_entry: ValueDecoder
+    node_factory: Type[Node]
+    intern: Optional[Interner]
+    parse: Callable[[str], List[Node]]
+    iterparse: Callable[[str], Iterator[ParseEvent]]
+
+
+def _make_node_matcher(select: NodeSelector, /) -> NodeMatcher:
+    if callable(select):
+        predicate = select
+
+        # Any node might have a selected descendant.
+        def match_predicate(path: NodePath, name: str, /) -> int:
+            return select_build if predicate(path, name) else select_descend
+
+        return match_predicate
+
+    targets: Set[NodePath] = set()
+    prefixes: Set[NodePath] = set()
+    for path in select:
+        names = tuple(path.strip("/").split("/")) if isinstance(path, str) else tuple(path)
+        if not names or names == ("",):
+            raise ValueError("Node paths must contain at least one node name.")
+        targets.add(names)
+        prefixes.update(names[:i] for i in range(1, len(names)))
+
+    def match_paths(path: NodePath, name: str, /) -> int:
+        node_path = path + (name,)
+        if node_path in targets:
+            return select_build
+        elif node_path in prefixes:
+            return select_descend
+        return select_skip
+
+    return match_paths
+
+
+def _select_built_nodes(
+    nodes: Iterable[Node],
+    match: NodeMatcher,
+    path: NodePath,
+    selected: List[Node],
+    /,
+) -> None:
+    for node in nodes:
+        action = match(path, node.name)
+        if action == select_build:
+            selected.append(node)
+        elif action == select_descend:
+            _select_built_nodes(node._children or (), match, path + (node.name,), selected)
+
+
+def _iter_node_events(nodes: Iterable[Node], /) -> Iterator[ParseEvent]:
+    for node in nodes:
+        yield ("start_node", node.name, node.node_type)
+        for arg in node._arguments or ():
+            yield ("argument", arg)
+        for key, val in (node._properties or {}).items():
+            yield ("property", key, val)
+        yield from _iter_node_events(node._children or ())
+        yield ("end_node",)
+
+
+def _make_buffer_reader(view: memoryview, /) -> Callable[[int], str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pos = 0
+
+    def read(size: int, /) -> str:
+        nonlocal pos
+        # Four bytes always complete at least one character, so only the end of the buffer
+        # produces an empty string.
+        with view[pos : pos + max(size, 4)] as chunk:
+            pos += len(chunk)
+            return decoder.decode(chunk, final=len(chunk) == 0)
+
+    return read
 
 
 def default_null_parser(val_type: FactoryTypeParam, val: str) -> Any:
@@ -325,29 +293,20 @@ def default_int_parser(val_type: FactoryTypeParam, val: str, base: int) -> Any:
     if val_type is None:
         return int(val, base=base)
 
-    int_val_types = ("i8", "i16", "i32", "i64")
-    uint_val_types = ("u8", "u16", "u32", "u64")
-    size_val_types = ("isize", "usize")
-
-    if val_type in int_val_types or val_type in uint_val_types or val_type in size_val_types:
-        return int(val, base=base)
+    decoder = default_registry.get_decoder("int", val_type)
+    if decoder is not None:
+        return decoder(val, base)
 
     return _blank
 
 
 def default_float_parser(val_type: FactoryTypeParam, val: str) -> Any:
-    float_val_types = ("f32", "f64")
-    decimal_val_types = ("decimal64", "decimal128")
-
     if val_type is None:
         return float(val)
 
-    if val_type in float_val_types:
-        return float(val)
-    elif val_type in decimal_val_types:
-        from decimal import Decimal
-
-        return Decimal(val)
+    decoder = default_registry.get_decoder("float", val_type)
+    if decoder is not None:
+        return decoder(val)
 
     return _blank
 
@@ -356,46 +315,9 @@ def default_str_parser(val_type: FactoryTypeParam, val: str) -> Any:
     if val_type is None:
         return val
 
-    if val_type == "base64":
-        from base64 import b64decode
-
-        return b64decode(val, validate=True)
-    elif val_type == "date-time" or val_type == "datetime":
-        from datetime import datetime
-
-        return datetime.fromisoformat(val)
-    elif val_type == "date":
-        from datetime import date
-
-        return date.fromisoformat(val)
-    elif val_type == "time":
-        from datetime import time
-
-        return time.fromisoformat(val)
-    elif val_type == "decimal":
-        from decimal import Decimal
-
-        return Decimal(val)
-    elif val_type == "ipv4":
-        from ipaddress import IPv4Address
-
-        return IPv4Address(val)
-    elif val_type == "ipv6":
-        from ipaddress import IPv6Address
-
-        return IPv6Address(val)
-    elif val_type == "regex":
-        from re import compile as re_compile
-
-        return re_compile(val)
-    elif val_type == "url":
-        from urllib.parse import urlparse
-
-        return urlparse(val)
-    elif val_type == "uuid":
-        from uuid import UUID
-
-        return UUID(val)
+    decoder = default_registry.get_decoder("string", val_type)
+    if decoder is not None:
+        return decoder(val)
 
     return _blank
 
@@ -412,7 +334,16 @@ class KDLDecoder:
         ignore_unknown_types: bool = False,
         node_factory: Type[Node] = Node,
         node_list_factory: Type[NodeList] = NodeList,
+        engine: ParserEngine = "native",
+        cache: Optional[ParseCache] = None,
+        lazy: bool = False,
+        intern_identifiers: InternMode = True,
     ):
+        if engine not in ("native", "tatsu"):
+            raise ValueError(f"Unknown parser engine {engine!r}.")
+        if intern_identifiers not in (True, False, "sys"):
+            raise ValueError(f"Unknown identifier interning mode {intern_identifiers!r}.")
+
         self.parse_null: NullFactory = parse_null or default_null_parser
         self.parse_bool: BoolFactory = parse_bool or default_bool_parser
         self.parse_int: IntFactory = parse_int or default_int_parser
@@ -421,14 +352,24 @@ class KDLDecoder:
         self.ignore_unknown_types = ignore_unknown_types
         self.node_factory = node_factory
         self.node_list_factory = node_list_factory
-
-    def decode(self, s: str, /) -> Document:
-        try:
-            ast = ast_parser.parse(s)
-        except tatsu.exceptions.ParseException as e:
-            raise KDLDecodeError("Failed to parse the document.") from e
-
-        decoder = _make_decoder(
+        self.engine: ParserEngine = engine
+        self.cache = cache
+        self.lazy = lazy
+        self.intern_identifiers = intern_identifiers
+
+        self._plan: Optional[_DecoderPlan] = None
+        self._get_plan()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Plans are made of closures, which can't be pickled. They're rebuilt on first use.
+        state = self.__dict__.copy()
+        state["_plan"] = None
+        return state
+
+    def _get_plan(self) -> _DecoderPlan:
+        # Everything the decoder needs is put together once and reused for as long as its
+        # settings stay the same.
+        settings = (
             self.parse_null,
             self.parse_bool,
             self.parse_int,
@@ -437,13 +378,180 @@ class KDLDecoder:
             self.ignore_unknown_types,
             self.node_factory,
             self.node_list_factory,
+            self.engine,
+            self.lazy,
+            self.intern_identifiers,
+        )
+        plan = self._plan
+        if plan is not None and plan.settings == settings:
+            return plan
+
+        value_decoder = _make_value_decoder(
+            self.parse_null,
+            self.parse_bool,
+            self.parse_int,
+            self.parse_float,
+            self.parse_str,
+            self.ignore_unknown_types,
+        )
+        default_factories = _uses_default_factories(
+            self.parse_null, self.parse_bool, self.parse_int, self.parse_float, self.parse_str
+        )
+
+        entry_decoder = value_decoder
+        node_factory = self.node_factory
+        if self.lazy:
+            entry_decoder = make_lazy_value_decoder(value_decoder, default_factories)
+            node_factory = cast(Type[Node], make_lazy_node_factory(node_factory, value_decoder))
+
+        intern: Optional[Interner] = None
+        if self.intern_identifiers == "sys":
+            intern = sys.intern
+        elif self.intern_identifiers:
+            intern = InternTable().__getitem__
+
+        make_engine_parser: Callable[..., Callable[[str], List[Node]]]
+        if self.engine == "tatsu":
+            from ._tatsu import make_tatsu_parser as make_engine_parser
+        else:
+            make_engine_parser = make_parser
+
+        plan = self._plan = _DecoderPlan(
+            settings,
+            default_factories,
+            value_decoder,
+            entry_decoder,
+            node_factory,
+            intern,
+            make_engine_parser(entry_decoder, node_factory, self.node_list_factory, _intern=intern),
+            make_event_parser(value_decoder, intern),
+        )
+        return plan
+
+    def decode(self, s: str, /, *, select: Optional[NodeSelector] = None) -> Document:
+        if select is not None:
+            return self._decode_selected(s, _make_node_matcher(select))
+        if self.cache is not None:
+            # A FrozenDocument if the cache was made with copy="frozen".
+            return self.cache.decode(self, s)  # type: ignore[return-value]
+        return self._decode_document(s)
+
+    def _decode_selected(self, s: str, match: NodeMatcher, /) -> Document:
+        selected: List[Node] = []
+        if self.engine == "tatsu":
+            # The TatSu engine can only produce a complete tree, which is then pruned.
+            _select_built_nodes(self._decode_nodes(s), match, (), selected)
+        else:
+            plan = self._get_plan()
+            parse = make_parser(
+                plan.decode_entry, plan.node_factory, self.node_list_factory, match, plan.intern
+            )
+            try:
+                selected = parse(s)
+            except ParseFailure as e:
+                raise KDLDecodeError("Failed to parse the document.") from e
+        return Document(self.node_list_factory(selected))
+
+    def decode_buffer(self, buffer: Buffer, /, *, chunk_size: int = 1048576) -> Document:
+        # Decode the UTF-8 buffer a piece at a time, so the text of the whole document
+        # never needs to be held in memory at once.
+        nodes: List[Node] = []
+        with memoryview(buffer) as view:
+            for chunk in iter_complete_chunks(_make_buffer_reader(view), chunk_size):
+                nodes.extend(self._decode_nodes(chunk))
+        return Document(self.node_list_factory(nodes))
+
+    def decode_binary(self, data: Buffer, /) -> Document:
+        plan = self._get_plan()
+        decoder = make_binary_decoder(
+            plan.decode_entry,
+            plan.default_factories,
+            plan.node_factory,
+            self.node_list_factory,
         )
+        return decoder(bytes(data))
+
+    def decode_columnar(self, s: str, /) -> ColumnarDocument:
+        from .columnar import build_columnar
+
+        return build_columnar(self.iterparse(s))
+
+    def decode_parallel(
+        self,
+        s: str,
+        /,
+        *,
+        workers: Optional[int] = None,
+        min_chunk_size: int = 1048576,
+    ) -> Document:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            return self._decode_document(s)
+
+        # A few chunks per worker keeps the workers evenly loaded.
+        chunk_size = max(min_chunk_size, -(-len(s) // (workers * 4)))
+        try:
+            chunks = split_complete_chunks(s, chunk_size)
+        except ParseFailure as e:
+            raise KDLDecodeError("Failed to parse the document.") from e
+        if len(chunks) <= 1:
+            return self._decode_document(s)
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        nodes: List[Node] = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            for chunk_nodes in executor.map(partial(_decode_chunk, self), chunks):
+                nodes.extend(chunk_nodes)
+        return Document(self.node_list_factory(nodes))
+
+    def _decode_document(self, s: str, /) -> Document:
+        return Document(self.node_list_factory(self._decode_nodes(s)))
+
+    def _decode_nodes(self, s: str, /) -> List[Node]:
+        parse = self._get_plan().parse
+        try:
+            return parse(s)
+        except ParseFailure as e:
+            raise KDLDecodeError("Failed to parse the document.") from e
+
+    def iterparse(self, s: str, /) -> Iterator[ParseEvent]:
+        if self.engine == "tatsu":
+            # The TatSu engine can only produce a complete tree.
+            yield from _iter_node_events(self.decode(s))
+            return
+
+        events = self._get_plan().iterparse(s)
+        try:
+            yield from events
+        except ParseFailure as e:
+            raise KDLDecodeError("Failed to parse the document.") from e
+
+
+def _decode_chunk(decoder: KDLDecoder, s: str, /) -> List[Node]:
+    return decoder._decode_nodes(s)
+
+
+# The TatSu-based parser classes used to be defined here. They're now only imported when
+# they're first used.
+def __getattr__(name: str) -> Any:
+    if name in ("KDLParser", "KDLParserSemanticActions"):
+        from . import _tatsu
 
-        return Document(self.node_list_factory(decoder(ast)))
+        return getattr(_tatsu, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = (
     "KDLDecoder",
+    "ParserEngine",
+    "InternMode",
+    "ParseEvent",
+    "Buffer",
+    "NodePath",
+    "NodePredicate",
+    "NodeSelector",
     "NullFactory",
     "BoolFactory",
     "IntFactory",
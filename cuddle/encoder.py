@@ -1,20 +1,24 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Iterable, Optional, Tuple, Union
-
-import regex
+import re
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Optional, Tuple, Union
 
 from ._escaping import named_escape_inverse
 from .exception import KDLEncodeTypeError
+from .registry import default_registry
 from .structure import Document, Node
 
 
+if TYPE_CHECKING:
+    from .columnar import ColumnarDocument
+
 IdentifierFormatter = Callable[[str], str]
 ValueEncoderResult = Union[None, str, Tuple[Optional[str], str]]
 ValueEncoder = Callable[[Any, IdentifierFormatter], ValueEncoderResult]
 
 
-ident_re = regex.compile(
+ident_re = re.compile(
     r'^[^/\\<{;\[=,"0-9\t \u00A0\u1680\u2000-\u200A\u202F\u205F\u3000\uFFEF\r\n\u0085\u000C\u2028\u2029][^/\\;=,"\t \u00A0\u1680\u2000-\u200A\u202F\u205F\u3000\uFFEF\r\n\u0085\u000C\u2028\u2029]*$'
 )
 
@@ -22,23 +26,26 @@ _intstr = int.__repr__
 _floatstr = float.__repr__
 
 
+def _format_string(val: str, /) -> str:
+    if "\\" in val and '"' not in val:
+        return 'r#"%s"#' % val
+
+    inner = "".join("\\" + named_escape_inverse[c] if c in named_escape_inverse else c for c in val)
+    return f'"{inner}"'
+
+
+def _format_identifier(ident: str, /) -> str:
+    if ident_re.match(ident) and ident not in ("true", "false", "null"):
+        return ident
+    else:
+        return _format_string(ident)
+
+
 def _make_encoder(
     _indent: str, _value_encoder: ValueEncoder
-) -> Callable[[Document], Iterable[str]]:
-    def format_string(val: str, /) -> str:
-        if "\\" in val and '"' not in val:
-            return 'r#"%s"#' % val
-
-        inner = "".join(
-            "\\" + named_escape_inverse[c] if c in named_escape_inverse else c for c in val
-        )
-        return f'"{inner}"'
-
-    def format_identifier(ident: str, /) -> str:
-        if ident_re.match(ident) and ident not in ("true", "false", "null"):
-            return ident
-        else:
-            return format_string(ident)
+) -> Tuple[Callable[[Document], Iterable[str]], Callable[[ColumnarDocument], Iterable[str]]]:
+    format_string = _format_string
+    format_identifier = _format_identifier
 
     def format_value(val: Any, /) -> str:
         result = _value_encoder(val, format_identifier)
@@ -67,26 +74,66 @@ def _make_encoder(
             yield f"({format_identifier(node.node_type)})"
         yield format_identifier(node.name)
 
-        for val in node.arguments:
-            yield " " + format_value(val)
+        if node._arguments:
+            for val in node._arguments:
+                yield " " + format_value(val)
 
-        for key, val in node.properties.items():
-            yield " {0}={1}".format(format_identifier(key), format_value(val))
+        if node._properties:
+            for key, val in node._properties.items():
+                yield " {0}={1}".format(format_identifier(key), format_value(val))
 
-        if node.children:
+        if node._children:
             yield " {\n"
-            for child in node.children:
+            for child in node._children:
                 yield indent
                 yield from format_node(child)
                 yield "\n"
             yield indent + "}"
 
+    def format_columnar(doc: ColumnarDocument, /) -> Iterable[str]:
+        # Writes the nodes straight from the columns, without making any views of them.
+        strings = doc.strings
+        values = doc.values
+        names = doc.names
+        types = doc.types
+        ends = doc.ends
+        arg_starts = doc.arg_starts
+        arg_values = doc.arg_values
+        count = len(names)
+
+        # The ends of the nodes whose children are being written.
+        open_ends: List[int] = []
+        for index in range(count):
+            indent = _indent * len(open_ends)
+            if indent:
+                yield indent
+            node_type = types[index]
+            if node_type != -1:
+                yield f"({format_identifier(strings[node_type])})"
+            yield format_identifier(strings[names[index]])
+
+            arg_end = arg_starts[index + 1] if index + 1 < count else len(arg_values)
+            for i in range(arg_starts[index], arg_end):
+                yield " " + format_value(values[arg_values[i]])
+
+            for key, val in doc._properties(index).items():
+                yield " {0}={1}".format(format_identifier(key), format_value(val))
+
+            if ends[index] != index + 1:
+                yield " {\n"
+                open_ends.append(ends[index])
+                continue
+            yield "\n"
+            while open_ends and open_ends[-1] == index + 1:
+                open_ends.pop()
+                yield _indent * len(open_ends) + "}\n"
+
     def format_document(document: Document, /) -> Iterable[str]:
         for node in document:
             yield from format_node(node, top_level=True)
             yield "\n"
 
-    return format_document
+    return format_document, format_columnar
 
 
 def default_value_encoder(val: Any, _ident_fmt: IdentifierFormatter, /) -> ValueEncoderResult:
@@ -102,9 +149,9 @@ def default_value_encoder(val: Any, _ident_fmt: IdentifierFormatter, /) -> Value
     if isinstance(val, str):
         return None, val
 
-    from decimal import Decimal
-
-    if isinstance(val, Decimal):
+    # Like regex patterns, decimals can only exist if their module has been imported.
+    decimal = sys.modules.get("decimal")
+    if decimal is not None and isinstance(val, decimal.Decimal):
         return "decimal", str(val)
 
     return None
@@ -115,33 +162,18 @@ def extended_value_encoder(val: Any, ident_fmt: IdentifierFormatter, /) -> Value
     if default_result is not None:
         return default_result
 
-    from base64 import b64encode
-    from datetime import date, datetime, time
-    from ipaddress import IPv4Address, IPv6Address
-    from re import Pattern as RePattern
-    from urllib.parse import DefragResult as UrlDefragResult
-    from urllib.parse import ParseResult as UrlParseResult
-    from urllib.parse import SplitResult as UrlSplitResult
-    from uuid import UUID
-
-    if isinstance(val, bytes):
-        return "base64", b64encode(val).decode("utf-8")
-    elif isinstance(val, datetime):
-        return "date-time", val.isoformat()
-    elif isinstance(val, date):
-        return "date", val.isoformat()
-    elif isinstance(val, time):
-        return "time", val.isoformat()
-    elif isinstance(val, IPv4Address):
-        return "ipv4", str(val)
-    elif isinstance(val, IPv6Address):
-        return "ipv6", str(val)
-    elif isinstance(val, (RePattern, regex.Pattern)):
+    entry = default_registry.get_encoder(val.__class__)
+    if entry is not None:
+        val_type, encoder = entry
+        return val_type, encoder(val)
+
+    # Patterns from the third-party regex module can only exist if it's been imported, and
+    # registering them would mean importing it.
+    regex = sys.modules.get("regex")
+    if regex is not None and isinstance(val, regex.Pattern):
         return "regex", val.pattern
-    elif isinstance(val, (UrlDefragResult, UrlParseResult, UrlSplitResult)):
-        return "url", val.geturl()
-    elif isinstance(val, UUID):
-        return "uuid", str(val)
+
+    return None
 
 
 class KDLEncoder:
@@ -172,7 +204,20 @@ class KDLEncoder:
         return "".join(chunks)
 
     def iterencode(self, doc: Document) -> Iterable[str]:
-        encoder = _make_encoder(self.indent, self.value_encoder)
+        encoder, _ = _make_encoder(self.indent, self.value_encoder)
+        return encoder(doc)
+
+    def encode_columnar(self, doc: ColumnarDocument) -> str:
+        return "".join(self.iterencode_columnar(doc))
+
+    def iterencode_columnar(self, doc: ColumnarDocument) -> Iterable[str]:
+        _, encoder = _make_encoder(self.indent, self.value_encoder)
+        return encoder(doc)
+
+    def encode_binary(self, doc: Document) -> bytes:
+        from ._binary import make_binary_encoder
+
+        encoder = make_binary_encoder(self.value_encoder)
         return encoder(doc)
 
 
@@ -6,7 +6,12 @@ class KDLEncodeTypeError(TypeError):
     pass
 
 
+class KQLSyntaxError(ValueError):
+    pass
+
+
 __all__ = (
     "KDLDecodeError",
     "KDLEncodeTypeError",
+    "KQLSyntaxError",
 )
@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .structure import Document, Node, NodeList
+
+
+# Steps in a path to a node: a position among the siblings, or the name of the first sibling
+# with that name.
+PathStep = Union[int, str]
+FrozenPath = Sequence[PathStep]
+
+_no_properties: Mapping[str, Any] = MappingProxyType({})
+_unset: Any = object()
+
+
+def _make_name_index(nodes: Tuple[FrozenNode, ...], /) -> Dict[str, Tuple[FrozenNode, ...]]:
+    index: Dict[str, List[FrozenNode]] = {}
+    for node in nodes:
+        index.setdefault(node.name, []).append(node)
+    return {name: tuple(named) for name, named in index.items()}
+
+
+# An immutable node. Frozen nodes can be shared between documents and threads, so changing
+# a document makes new nodes along the path to the change and reuses all the others. Derived
+# data, like the hash of a node and the index of its children by name, is worked out once and
+# kept with the node.
+class FrozenNode:
+    __slots__ = (
+        "name",
+        "node_type",
+        "_arguments",
+        "_properties",
+        "_children",
+        "_hash",
+        "_name_index",
+    )
+
+    name: str
+    node_type: Optional[str]
+    _arguments: Tuple[Any, ...]
+    _properties: Mapping[str, Any]
+    _children: Tuple[FrozenNode, ...]
+    _hash: Optional[int]
+    _name_index: Optional[Dict[str, Tuple[FrozenNode, ...]]]
+
+    def __init__(
+        self,
+        name: str,
+        node_type: Optional[str],
+        /,
+        *,
+        arguments: Iterable[Any] = (),
+        properties: Optional[Mapping[str, Any]] = None,
+        children: Iterable[FrozenNode] = (),
+    ):
+        children = tuple(children)
+        for child in children:
+            if not isinstance(child, FrozenNode):
+                raise TypeError("The children of frozen nodes must be frozen nodes.")
+
+        setattr_ = object.__setattr__
+        setattr_(self, "name", name)
+        setattr_(self, "node_type", node_type)
+        setattr_(self, "_arguments", tuple(arguments))
+        setattr_(
+            self,
+            "_properties",
+            MappingProxyType(dict(properties)) if properties else _no_properties,
+        )
+        setattr_(self, "_children", children)
+        setattr_(self, "_hash", None)
+        setattr_(self, "_name_index", None)
+
+    def __setattr__(self, name: str, val: Any) -> None:
+        raise AttributeError("Frozen nodes can't be changed.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Frozen nodes can't be changed.")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _make_frozen_node, (
+            self.name,
+            self.node_type,
+            self._arguments,
+            dict(self._properties),
+            self._children,
+        )
+
+    def __repr__(self) -> str:
+        details = [f"name={self.name!r}"]
+        if self.node_type:
+            details.append(f"type={self.node_type!r}")
+        if self._arguments:
+            details.append(f"arguments={self._arguments!r}")
+        if self._properties:
+            details.append(f"properties={dict(self._properties)!r}")
+        if self._children:
+            details.append(f"children={self._children!r}")
+        return f"FrozenNode({', '.join(details)})"
+
+    def __iter__(self):
+        raise TypeError("KDL nodes are not iterable.")
+
+    def __getitem__(self, name: Union[int, str]) -> Any:
+        if isinstance(name, int):
+            return self._arguments[name]
+        else:
+            return self._properties[name]
+
+    def __hash__(self) -> int:
+        node_hash = self._hash
+        if node_hash is None:
+            node_hash = _hash_tree(self)
+        return node_hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenNode):
+            return NotImplemented
+        return _trees_equal(self, other)
+
+    @property
+    def arguments(self) -> Tuple[Any, ...]:
+        return self._arguments
+
+    @property
+    def properties(self) -> Mapping[str, Any]:
+        return self._properties
+
+    @property
+    def children(self) -> Tuple[FrozenNode, ...]:
+        return self._children
+
+    def get_children_by_name(self, name: str, /) -> Tuple[FrozenNode, ...]:
+        index = self._name_index
+        if index is None:
+            index = _make_name_index(self._children)
+            object.__setattr__(self, "_name_index", index)
+        return index.get(name, ())
+
+    def replace(
+        self,
+        *,
+        name: str = _unset,
+        node_type: Optional[str] = _unset,
+        arguments: Iterable[Any] = _unset,
+        properties: Mapping[str, Any] = _unset,
+        children: Iterable[FrozenNode] = _unset,
+    ) -> FrozenNode:
+        return FrozenNode(
+            self.name if name is _unset else name,
+            self.node_type if node_type is _unset else node_type,
+            arguments=self._arguments if arguments is _unset else arguments,
+            properties=self._properties if properties is _unset else properties,
+            children=self._children if children is _unset else children,
+        )
+
+    def with_property(self, key: str, val: Any, /) -> FrozenNode:
+        properties = dict(self._properties)
+        properties[key] = val
+        return self.replace(properties=properties)
+
+    def without_property(self, key: str, /) -> FrozenNode:
+        properties = dict(self._properties)
+        del properties[key]
+        return self.replace(properties=properties)
+
+    def with_child(self, node: FrozenNode, /) -> FrozenNode:
+        return self.replace(children=self._children + (node,))
+
+
+def _make_frozen_node(
+    name: str,
+    node_type: Optional[str],
+    arguments: Tuple[Any, ...],
+    properties: Dict[str, Any],
+    children: Tuple[FrozenNode, ...],
+    /,
+) -> FrozenNode:
+    return FrozenNode(
+        name, node_type, arguments=arguments, properties=properties, children=children
+    )
+
+
+def _hash_tree(root: FrozenNode, /) -> int:
+    # Hashes the nodes below the root first, without recursion, keeping every hash it works
+    # out. Unchanged nodes shared with other documents have usually been hashed already.
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        pending = [child for child in node._children if child._hash is None]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        if node._hash is None:
+            node_hash = hash(
+                (
+                    node.name,
+                    node.node_type,
+                    tuple((val.__class__, val) for val in node._arguments),
+                    frozenset((key, val.__class__, val) for key, val in node._properties.items()),
+                    tuple(child._hash for child in node._children),
+                )
+            )
+            object.__setattr__(node, "_hash", node_hash)
+    return root._hash  # type: ignore[return-value]
+
+
+def _same_classes(first: FrozenNode, second: FrozenNode, /) -> bool:
+    # Equal values of different classes, like 1, 1.0 and true, aren't the same value.
+    if any(
+        val.__class__ is not other.__class__
+        for val, other in zip(first._arguments, second._arguments)
+    ):
+        return False
+    other_properties = second._properties
+    return all(
+        val.__class__ is other_properties[key].__class__ for key, val in first._properties.items()
+    )
+
+
+def _trees_equal(first: FrozenNode, second: FrozenNode, /) -> bool:
+    stack = [(first, second)]
+    while stack:
+        first, second = stack.pop()
+        # Versions of a document share most of their nodes.
+        if first is second:
+            continue
+        if first._hash is not None and second._hash is not None and first._hash != second._hash:
+            return False
+        if (
+            first.name != second.name
+            or first.node_type != second.node_type
+            or first._arguments != second._arguments
+            or first._properties != second._properties
+            or len(first._children) != len(second._children)
+            or not _same_classes(first, second)
+        ):
+            return False
+        stack.extend(zip(first._children, second._children))
+    return True
+
+
+class FrozenDocument:
+    __slots__ = ("nodes", "_hash", "_name_index")
+
+    nodes: Tuple[FrozenNode, ...]
+    _hash: Optional[int]
+    _name_index: Optional[Dict[str, Tuple[FrozenNode, ...]]]
+
+    def __init__(self, nodes: Iterable[FrozenNode] = (), /):
+        nodes = tuple(nodes)
+        for node in nodes:
+            if not isinstance(node, FrozenNode):
+                raise TypeError("The nodes of frozen documents must be frozen nodes.")
+        object.__setattr__(self, "nodes", nodes)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_name_index", None)
+
+    def __setattr__(self, name: str, val: Any) -> None:
+        raise AttributeError("Frozen documents can't be changed.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Frozen documents can't be changed.")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return FrozenDocument, (self.nodes,)
+
+    def __repr__(self) -> str:
+        return f"FrozenDocument({list(self.nodes)!r})"
+
+    def __iter__(self) -> Iterator[FrozenNode]:
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __hash__(self) -> int:
+        doc_hash = self._hash
+        if doc_hash is None:
+            doc_hash = hash(tuple(hash(node) for node in self.nodes))
+            object.__setattr__(self, "_hash", doc_hash)
+        return doc_hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenDocument):
+            return NotImplemented
+        return len(self.nodes) == len(other.nodes) and all(
+            _trees_equal(first, second) for first, second in zip(self.nodes, other.nodes)
+        )
+
+    @classmethod
+    def from_document(cls, doc: Union[Document, NodeList, Iterable[Node]], /) -> FrozenDocument:
+        # Freezes the nodes bottom up, without recursion.
+        top_level: List[FrozenNode] = []
+        # Each entry holds a node, its frozen children so far and an iterator over the rest.
+        stack: List[Tuple[Optional[Node], List[FrozenNode], Iterator[Node]]] = [
+            (None, top_level, iter(doc))
+        ]
+        while stack:
+            node, frozen_children, children = stack[-1]
+            child = next(children, None)
+            if child is not None:
+                stack.append((child, [], iter(child._children or ())))
+                continue
+
+            stack.pop()
+            if node is not None:
+                stack[-1][1].append(
+                    FrozenNode(
+                        node.name,
+                        node.node_type,
+                        arguments=node._arguments or (),
+                        properties=node._properties,
+                        children=frozen_children,
+                    )
+                )
+        return cls(top_level)
+
+    def to_document(
+        self,
+        *,
+        node_factory: Type[Node] = Node,
+        node_list_factory: Type[NodeList] = NodeList,
+    ) -> Document:
+        custom_nodes = node_factory is not Node
+        custom_children = custom_nodes or node_list_factory is not NodeList
+        top_level: List[Node] = []
+        stack: List[Tuple[Optional[FrozenNode], List[Node], Iterator[FrozenNode]]] = [
+            (None, top_level, iter(self.nodes))
+        ]
+        while stack:
+            frozen, children, frozen_children = stack[-1]
+            child = next(frozen_children, None)
+            if child is not None:
+                stack.append((child, [], iter(child._children)))
+                continue
+
+            stack.pop()
+            if frozen is not None:
+                arguments = frozen._arguments
+                properties = frozen._properties
+                stack[-1][1].append(
+                    node_factory(
+                        frozen.name,
+                        frozen.node_type,
+                        arguments=list(arguments) if arguments or custom_nodes else None,
+                        properties=dict(properties) if properties or custom_nodes else None,
+                        children=(
+                            node_list_factory(children) if children or custom_children else None
+                        ),
+                    )
+                )
+        return Document(node_list_factory(top_level))
+
+    def get_nodes_by_name(self, name: str, /) -> Tuple[FrozenNode, ...]:
+        index = self._name_index
+        if index is None:
+            index = _make_name_index(self.nodes)
+            object.__setattr__(self, "_name_index", index)
+        return index.get(name, ())
+
+    def get_in(self, path: FrozenPath, /) -> FrozenNode:
+        siblings, idx = self._resolve(path)[-1]
+        return siblings[idx]
+
+    def set_in(self, path: FrozenPath, node: FrozenNode, /) -> FrozenDocument:
+        if not isinstance(node, FrozenNode):
+            raise TypeError("Only frozen nodes can be put in frozen documents.")
+        return self._rebuild(
+            self._resolve(path), lambda siblings, idx: _replaced(siblings, idx, node)
+        )
+
+    def update_in(
+        self,
+        path: FrozenPath,
+        update: Callable[[FrozenNode], FrozenNode],
+        /,
+    ) -> FrozenDocument:
+        return self.set_in(path, update(self.get_in(path)))
+
+    def with_node(self, node: FrozenNode, /, *, parent: FrozenPath = ()) -> FrozenDocument:
+        if not isinstance(node, FrozenNode):
+            raise TypeError("Only frozen nodes can be put in frozen documents.")
+        if not parent:
+            return FrozenDocument(self.nodes + (node,))
+        return self.update_in(parent, lambda parent_node: parent_node.with_child(node))
+
+    def without_node(self, path: FrozenPath, /) -> FrozenDocument:
+        return self._rebuild(
+            self._resolve(path), lambda siblings, idx: siblings[:idx] + siblings[idx + 1 :]
+        )
+
+    def _resolve(self, path: FrozenPath, /) -> List[Tuple[Tuple[FrozenNode, ...], int]]:
+        # Returns the siblings and position of each node along the path.
+        if isinstance(path, str):
+            raise TypeError("Node paths must be sequences of steps, not strings.")
+        if not path:
+            raise ValueError("Node paths must contain at least one step.")
+
+        steps = []
+        siblings = self.nodes
+        parent: Optional[FrozenNode] = None
+        for depth, step in enumerate(path):
+            if isinstance(step, str):
+                named = (
+                    self.get_nodes_by_name(step)
+                    if parent is None
+                    else parent.get_children_by_name(step)
+                )
+                if not named:
+                    raise KeyError(f"No node named {step!r} at {tuple(path[:depth])!r}.")
+                idx = _position(siblings, named[0])
+            else:
+                if not -len(siblings) <= step < len(siblings):
+                    raise IndexError(f"No node at position {step} at {tuple(path[:depth])!r}.")
+                idx = step % len(siblings)
+            steps.append((siblings, idx))
+            parent = siblings[idx]
+            siblings = parent._children
+        return steps
+
+    def _rebuild(
+        self,
+        steps: List[Tuple[Tuple[FrozenNode, ...], int]],
+        change: Callable[[Tuple[FrozenNode, ...], int], Tuple[FrozenNode, ...]],
+        /,
+    ) -> FrozenDocument:
+        # Copies the nodes along the path, from the changed one up to the top level. Everything
+        # else is shared with this document.
+        siblings, idx = steps[-1]
+        children = change(siblings, idx)
+        for siblings, idx in reversed(steps[:-1]):
+            children = _replaced(siblings, idx, siblings[idx].replace(children=children))
+        return FrozenDocument(children)
+
+
+def _position(siblings: Tuple[FrozenNode, ...], node: FrozenNode, /) -> int:
+    for idx, sibling in enumerate(siblings):
+        if sibling is node:
+            return idx
+    raise ValueError("Node not found.")  # pragma: no cover
+
+
+def _replaced(
+    siblings: Tuple[FrozenNode, ...],
+    idx: int,
+    node: FrozenNode,
+    /,
+) -> Tuple[FrozenNode, ...]:
+    return siblings[:idx] + (node,) + siblings[idx + 1 :]
+
+
+__all__ = (
+    "FrozenDocument",
+    "FrozenNode",
+    "FrozenPath",
+    "PathStep",
+)
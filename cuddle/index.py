@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+
+if TYPE_CHECKING:
+    from .structure import Node
+
+
+def _value_key(val: Any, /) -> Hashable:
+    # true and false would otherwise find the nodes with the values 1 and 0.
+    return val.__class__ is bool, val
+
+
+# Maps (node name, property key, value) to the nodes with that property, at any depth or down
+# to a given number of levels. Nodes whose indexed values can't be hashed are kept apart and
+# scanned on lookup.
+class PropertyIndex:
+    def __init__(
+        self, nodes: Iterable[Node], keys: Iterable[str], /, *, depth: Optional[int] = None
+    ):
+        if isinstance(keys, str):
+            raise TypeError("The keys to index must be a collection of strings, not a string.")
+        if depth is not None and depth < 1:
+            raise ValueError("The index depth must be at least 1.")
+
+        self.keys: FrozenSet[str] = frozenset(keys)
+        self.depth = depth
+        self._nodes = nodes
+        self._build()
+
+    def _build(self) -> None:
+        self._entries: Dict[Tuple[str, str, Hashable], List[Node]] = {}
+        self._unhashable: Dict[Tuple[str, str], List[Node]] = {}
+        # The level of every indexed node, by id, so nodes added under it later can be placed.
+        self._levels: Dict[int, int] = {}
+        self._stale = False
+        # Whether every list of nodes in the index is still in document order. Nodes added
+        # anywhere but the end of the document, and changed properties, go at the end of the
+        # lists they're added to.
+        self._ordered = True
+        self._add_tree(self._nodes, 1)
+
+    def __len__(self) -> int:
+        if self._stale:
+            self._build()
+        return len(self._levels)
+
+    @property
+    def in_document_order(self) -> bool:
+        # The index is rebuilt in document order if it's stale.
+        return self._stale or self._ordered
+
+    def invalidate(self) -> None:
+        # Rebuilds the index on the next lookup, after changes made without going through
+        # Document's methods.
+        self._stale = True
+
+    def find(self, name: str, key: str, val: Any, /) -> List[Node]:
+        if key not in self.keys:
+            raise KeyError(f"Property {key!r} isn't indexed.")
+        if self._stale:
+            self._build()
+
+        try:
+            nodes = self._entries.get((name, key, _value_key(val)), ())
+        except TypeError:
+            return [
+                node
+                for node in self._unhashable.get((name, key), ())
+                if node.properties[key] == val
+            ]
+        return list(nodes)
+
+    def node_added(self, node: Node, parent: Optional[Node], /) -> None:
+        if self._stale:
+            return
+        if parent is None:
+            level = 1
+        else:
+            parent_level = self._levels.get(id(parent))
+            if parent_level is None:
+                # The parent is below the indexed levels.
+                return
+            level = parent_level + 1
+        if self.depth is None or level <= self.depth:
+            if parent is not None:
+                self._ordered = False
+            self._add_tree((node,), level)
+
+    def node_removed(self, node: Node, /) -> None:
+        if self._stale or id(node) not in self._levels:
+            return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if self._levels.pop(id(node), None) is None:
+                continue
+            self._remove_properties(node)
+            stack.extend(node._children or ())
+
+    def property_changing(self, node: Node, key: str, /) -> None:
+        if (
+            not self._stale
+            and key in self.keys
+            and key in (node._properties or ())
+            and id(node) in self._levels
+        ):
+            self._remove_property(node, key)
+
+    def property_changed(self, node: Node, key: str, /) -> None:
+        if not self._stale and key in self.keys and id(node) in self._levels:
+            self._ordered = False
+            self._add_property(node, key)
+
+    def _add_tree(self, nodes: Iterable[Node], level: int, /) -> None:
+        # Walks the nodes depth first, without recursion, so that each list of nodes in the
+        # index is in document order.
+        depth = self.depth
+        levels = self._levels
+        stack = [(iter(nodes), level)]
+        while stack:
+            siblings, level = stack[-1]
+            node = next(siblings, None)
+            if node is None:
+                stack.pop()
+                continue
+
+            levels[id(node)] = level
+            properties = node._properties
+            if properties:
+                for key in self.keys:
+                    if key in properties:
+                        self._add_property(node, key)
+            children = node._children
+            if children and (depth is None or level < depth):
+                stack.append((iter(children), level + 1))
+
+    def _add_property(self, node: Node, key: str, /) -> None:
+        val = node.properties[key]
+        try:
+            self._entries.setdefault((node.name, key, _value_key(val)), []).append(node)
+        except TypeError:
+            self._unhashable.setdefault((node.name, key), []).append(node)
+
+    def _remove_properties(self, node: Node, /) -> None:
+        properties = node._properties
+        if properties:
+            for key in self.keys:
+                if key in properties:
+                    self._remove_property(node, key)
+
+    def _remove_property(self, node: Node, key: str, /) -> None:
+        val = node.properties[key]
+        try:
+            entry_key = (node.name, key, _value_key(val))
+            removed = _remove_identical(self._entries, entry_key, node)
+        except TypeError:
+            removed = _remove_identical(self._unhashable, (node.name, key), node)
+        if not removed:
+            # The node was changed since it was indexed.
+            self._stale = True
+
+
+def _remove_identical(entries: Dict[Any, List[Node]], entry_key: Any, node: Node, /) -> bool:
+    nodes = entries.get(entry_key, [])
+    for position, other in enumerate(nodes):
+        if other is node:
+            del nodes[position]
+            if not nodes:
+                del entries[entry_key]
+            return True
+    return False
+
+
+__all__ = ("PropertyIndex",)
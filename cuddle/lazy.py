@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from collections.abc import MutableMapping, MutableSequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from ._parser import ValueDecoder
+from .structure import Node, NodeList
+
+
+# A value that hasn't been decoded yet. The literal's text is kept as the parser sliced it out
+# of the source, rather than as a span of the source, so a lazily decoded document doesn't
+# hold on to the text of the whole document for as long as any of its values are alive.
+class LazyValue:
+    __slots__ = ("val_type", "kind", "raw")
+
+    def __init__(self, val_type: Optional[str], kind: str, raw: str, /):
+        self.val_type = val_type
+        self.kind = kind
+        self.raw = raw
+
+    def __repr__(self) -> str:
+        return f"LazyValue({self.val_type!r}, {self.kind!r}, {self.raw!r})"
+
+
+# Node arguments that are decoded on first access. Decoded values replace the lazy ones, so
+# each value is only ever decoded once.
+class LazyArguments(MutableSequence):
+    __slots__ = ("_items", "_decode_value")
+
+    def __init__(self, items: List[Any], decode_value: ValueDecoder, /):
+        self._items = items
+        self._decode_value = decode_value
+
+    def _resolve(self, idx: int, /) -> Any:
+        item = self._items[idx]
+        if item.__class__ is LazyValue:
+            item = self._items[idx] = self._decode_value(item.val_type, item.kind, item.raw)
+        return item
+
+    def __getitem__(self, idx: Union[int, slice]) -> Any:
+        if isinstance(idx, slice):
+            return [self._resolve(i) for i in range(*idx.indices(len(self._items)))]
+        return self._resolve(idx)
+
+    def __setitem__(self, idx: Any, val: Any) -> None:
+        self._items[idx] = val
+
+    def __delitem__(self, idx: Any) -> None:
+        del self._items[idx]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        for idx in range(len(self._items)):
+            yield self._resolve(idx)
+
+    def insert(self, idx: int, val: Any) -> None:
+        self._items.insert(idx, val)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, LazyArguments)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    # Copies keep the values that haven't been decoded yet. Pickles are plain lists of decoded
+    # values, since the function that decodes them can't be pickled.
+    def __copy__(self) -> LazyArguments:
+        return LazyArguments(self._items.copy(), self._decode_value)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> LazyArguments:
+        import copy
+
+        return LazyArguments(copy.deepcopy(self._items, memo), self._decode_value)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return list, (list(self),)
+
+
+# Node properties that are decoded on first access.
+class LazyProperties(MutableMapping):
+    __slots__ = ("_items", "_decode_value")
+
+    def __init__(self, items: Dict[str, Any], decode_value: ValueDecoder, /):
+        self._items = items
+        self._decode_value = decode_value
+
+    def __getitem__(self, key: str) -> Any:
+        item = self._items[key]
+        if item.__class__ is LazyValue:
+            item = self._items[key] = self._decode_value(item.val_type, item.kind, item.raw)
+        return item
+
+    def __setitem__(self, key: str, val: Any) -> None:
+        self._items[key] = val
+
+    def __delitem__(self, key: str) -> None:
+        del self._items[key]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._items
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (dict, LazyProperties)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    # Like LazyArguments, copies keep the values that haven't been decoded yet and pickles are
+    # plain dicts of decoded values.
+    def __copy__(self) -> LazyProperties:
+        return LazyProperties(self._items.copy(), self._decode_value)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> LazyProperties:
+        import copy
+
+        return LazyProperties(copy.deepcopy(self._items, memo), self._decode_value)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return dict, (dict(self.items()),)
+
+
+def make_lazy_value_decoder(
+    _decode_value: ValueDecoder,
+    _default_factories: bool,
+) -> ValueDecoder:
+    def defer_value(val_type: Optional[str], kind: str, raw_value: str, /) -> Any:
+        # Untyped values are as cheap to decode with the default factories as they are to
+        # defer, so they're decoded straight away.
+        if val_type is None and _default_factories:
+            return _decode_value(val_type, kind, raw_value)
+        return LazyValue(val_type, kind, raw_value)
+
+    return defer_value
+
+
+def make_lazy_node_factory(
+    _node_factory: Type[Node],
+    _decode_value: ValueDecoder,
+) -> Callable[..., Node]:
+    # The parsers give this factory empty containers, since it isn't Node. They're dropped
+    # again for plain nodes, which allocate them when they're first used.
+    _custom_nodes = _node_factory is not Node
+
+    def make_node(
+        name: str,
+        node_type: Optional[str],
+        /,
+        *,
+        arguments: Optional[List[Any]],
+        properties: Optional[Dict[str, Any]],
+        children: Optional[Union[NodeList, Iterable[Node]]],
+    ) -> Node:
+        if not _custom_nodes and not children and children.__class__ is NodeList:
+            children = None
+        return _node_factory(
+            name,
+            node_type,
+            arguments=(
+                LazyArguments(arguments, _decode_value)  # type: ignore[arg-type]
+                if arguments
+                else (arguments if _custom_nodes else None)
+            ),
+            properties=(
+                LazyProperties(properties, _decode_value)  # type: ignore[arg-type]
+                if properties
+                else (properties if _custom_nodes else None)
+            ),
+            children=children,  # type: ignore[arg-type]
+        )
+
+    return make_node
+
+
+__all__ = (
+    "LazyArguments",
+    "LazyProperties",
+    "LazyValue",
+)
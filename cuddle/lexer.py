@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import re
+from typing import Iterator, NamedTuple
+
+from ._parser import (
+    ParseFailure,
+    bare_identifier_re,
+    escaped_string_re,
+    keywords,
+    line_comment_re,
+    newline_re,
+    number_re,
+    raw_string_start_re,
+    scan_escline,
+    scan_raw_string,
+    skip_block_comment,
+    ws_re,
+)
+from .exception import KDLDecodeError
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+punctuation_kinds = {
+    "(": "open_paren",
+    ")": "close_paren",
+    "{": "open_brace",
+    "}": "close_brace",
+    "=": "equals",
+    ";": "semicolon",
+}
+
+token_re = re.compile(
+    "|".join(
+        (
+            f"(?P<ws>{ws_re.pattern})",
+            f"(?P<newline>{newline_re.pattern})",
+            f"(?P<line_comment>{line_comment_re.pattern})",
+            r"(?P<block_comment>/\*)",
+            r"(?P<slashdash>/-)",
+            r"(?P<escline>\\)",
+            f"(?P<raw_string>{raw_string_start_re.pattern})",
+            f"(?P<string>(?s:{escaped_string_re.pattern}))",
+            number_re.pattern,
+            f"(?P<identifier>{bare_identifier_re.pattern})",
+            r"(?P<punctuation>[(){}=;])",
+        )
+    )
+)
+
+
+def tokenize(s: str, /) -> Iterator[Token]:
+    pos = 0
+    end = len(s)
+    match_token = token_re.match
+    while pos < end:
+        match = match_token(s, pos)
+        if match is None:
+            raise KDLDecodeError(f"Unexpected character {s[pos]!r} at offset {pos}.")
+
+        kind = match.lastgroup
+        token_end = match.end()
+        try:
+            if kind == "block_comment":
+                token_end = skip_block_comment(s, pos)
+            elif kind == "raw_string":
+                token_end = scan_raw_string(s, pos, match.group("raw_string")[1:-1])[1]
+            elif kind == "escline":
+                token_end = scan_escline(s, pos)
+                if token_end == -1:
+                    raise ParseFailure("Expected newline after line continuation", pos)
+        except ParseFailure as e:
+            raise KDLDecodeError(f"Failed to tokenize the document at offset {e.pos}.") from e
+
+        text = s[pos:token_end]
+        if kind == "identifier" and text in keywords:
+            kind = "keyword"
+        elif kind == "punctuation":
+            kind = punctuation_kinds[text]
+
+        yield Token(kind, text, pos)  # type: ignore[arg-type]
+        pos = token_end
+
+
+__all__ = (
+    "Token",
+    "tokenize",
+)
@@ -0,0 +1,590 @@
+from __future__ import annotations
+
+import operator
+import re
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from ._parser import (
+    ParseFailure,
+    _newline_chars,
+    _non_identifier_chars,
+    _ws_chars,
+    keywords,
+    scan_string,
+    scan_value,
+)
+from .decoder import (
+    _make_value_decoder,
+    default_bool_parser,
+    default_float_parser,
+    default_int_parser,
+    default_null_parser,
+    default_str_parser,
+)
+from .exception import KQLSyntaxError
+from .structure import Node, NodeList
+
+
+if TYPE_CHECKING:
+    from .index import PropertyIndex
+
+# An implementation of the KDL Query Language. A query is one or more selectors separated by
+# "||". A selector is a chain of filters joined by combinators:
+#
+#   a > b    b is a child of a
+#   a >> b   b is a descendant of a
+#   a + b    b immediately follows its sibling a
+#   a ~ b    b follows its sibling a
+#
+# A filter is top(), or any of a type annotation matcher like (type) or (), a node name and
+# any number of [accessor] or [accessor op value] matchers. The accessors are val() (the
+# same as val(0)), val(index), prop(key), a bare key (the same as prop(key)), name() and
+# tag(), and the operators are =, !=, <, <=, >, >=, ^=, $= and *=.
+
+NodeMatcher = Callable[[Node], bool]
+
+_query_ws_re = re.compile(f"[{_ws_chars}{_newline_chars}]*")
+# Characters that are part of the query syntax can't appear in bare node names in queries.
+_query_syntax_chars = r"+~|!^$*"
+_query_identifier_re = re.compile(
+    f"[^+\\-0-9{_non_identifier_chars}{_newline_chars}{_ws_chars}{re.escape(_query_syntax_chars)}]"
+    f"[^{_non_identifier_chars}{_newline_chars}{_ws_chars}{re.escape(_query_syntax_chars)}]*"
+)
+_combinator_re = re.compile(r">>|>|\+|~")
+_comparison_re = re.compile(r"!=|<=|>=|\^=|\$=|\*=|=|<|>")
+_index_re = re.compile(r"[0-9]+")
+
+_decode_literal = _make_value_decoder(
+    default_null_parser,
+    default_bool_parser,
+    default_int_parser,
+    default_float_parser,
+    default_str_parser,
+    False,
+)
+
+
+# A property key and the value a filter requires it to equal.
+_Equality = Tuple[str, Any]
+
+
+# A filter's matcher, the node name it requires, the properties it requires to equal a value,
+# and the end offset.
+_ScannedFilter = Tuple[NodeMatcher, Optional[str], Tuple[_Equality, ...], int]
+
+
+class _Selector(NamedTuple):
+    # Filters from the first to the last, with combinators[i] joining filters[i] and
+    # filters[i + 1]. For each filter, names holds the node name it requires, if any, and
+    # equalities the properties it requires to equal a value, which indexes can look up.
+    filters: Tuple[NodeMatcher, ...]
+    combinators: Tuple[str, ...]
+    names: Tuple[Optional[str], ...]
+    equalities: Tuple[Tuple[_Equality, ...], ...]
+
+
+def _is_boolean(val: Any, /) -> bool:
+    return val is True or val is False
+
+
+def _equal(left: Any, right: Any, /) -> bool:
+    # true and false aren't the numbers 1 and 0 in KDL.
+    if _is_boolean(left) or _is_boolean(right):
+        return left is right
+    return left == right
+
+
+def _not_equal(left: Any, right: Any, /) -> bool:
+    return not _equal(left, right)
+
+
+def _make_ordering(compare: Callable[[Any, Any], bool], /) -> Callable[[Any, Any], bool]:
+    def ordering(left: Any, right: Any, /) -> bool:
+        if _is_boolean(left) or _is_boolean(right):
+            return False
+        if isinstance(left, str) or isinstance(right, str):
+            return False
+        try:
+            return compare(left, right)
+        except TypeError:
+            return False
+
+    return ordering
+
+
+def _make_string_test(test: Callable[[str, str], bool], /) -> Callable[[Any, Any], bool]:
+    def string_test(left: Any, right: Any, /) -> bool:
+        return isinstance(left, str) and isinstance(right, str) and test(left, right)
+
+    return string_test
+
+
+_comparisons = {
+    "=": _equal,
+    "!=": _not_equal,
+    "<": _make_ordering(operator.lt),
+    "<=": _make_ordering(operator.le),
+    ">": _make_ordering(operator.gt),
+    ">=": _make_ordering(operator.ge),
+    "^=": _make_string_test(str.startswith),
+    "$=": _make_string_test(str.endswith),
+    "*=": _make_string_test(operator.contains),
+}
+
+_missing = object()
+Accessor = Callable[[Node], Any]
+
+
+def _make_argument_accessor(index: int, /) -> Accessor:
+    def access_argument(node: Node, /) -> Any:
+        arguments = node._arguments
+        return arguments[index] if arguments and index < len(arguments) else _missing
+
+    return access_argument
+
+
+def _make_property_accessor(key: str, /) -> Accessor:
+    def access_property(node: Node, /) -> Any:
+        properties = node._properties
+        return properties.get(key, _missing) if properties else _missing
+
+    return access_property
+
+
+def _access_name(node: Node, /) -> Any:
+    return node.name
+
+
+def _access_tag(node: Node, /) -> Any:
+    return node.node_type if node.node_type is not None else _missing
+
+
+def _make_comparison_matcher(
+    accessor: Accessor,
+    compare: Callable[[Any, Any], bool],
+    expected: Any,
+    /,
+) -> NodeMatcher:
+    def match_comparison(node: Node, /) -> bool:
+        val = accessor(node)
+        return val is not _missing and compare(val, expected)
+
+    return match_comparison
+
+
+def _make_exists_matcher(accessor: Accessor, /) -> NodeMatcher:
+    def match_exists(node: Node, /) -> bool:
+        return accessor(node) is not _missing
+
+    return match_exists
+
+
+def _make_filter(matchers: List[NodeMatcher], /) -> NodeMatcher:
+    if not matchers:
+        return _match_any
+    elif len(matchers) == 1:
+        return matchers[0]
+
+    def match_all(node: Node, /) -> bool:
+        for matcher in matchers:
+            if not matcher(node):
+                return False
+        return True
+
+    return match_all
+
+
+def _match_any(node: Node, /) -> bool:
+    return True
+
+
+# Stands for top(), which is the document itself rather than any of its nodes.
+def _match_top(node: Node, /) -> bool:
+    return False
+
+
+def _make_name_matcher(name: str, /) -> NodeMatcher:
+    def match_name(node: Node, /) -> bool:
+        return node.name == name
+
+    return match_name
+
+
+def _make_type_matcher(node_type: Optional[str], /) -> NodeMatcher:
+    if node_type is None:
+        # () matches any node with a type annotation.
+        def match_any_type(node: Node, /) -> bool:
+            return node.node_type is not None
+
+        return match_any_type
+
+    def match_type(node: Node, /) -> bool:
+        return node.node_type == node_type
+
+    return match_type
+
+
+def _skip_ws(q: str, pos: int, /) -> int:
+    return _query_ws_re.match(q, pos).end()  # type: ignore[union-attr]
+
+
+def _scan_identifier(q: str, pos: int, /) -> Tuple[str, int]:
+    string = scan_string(q, pos)
+    if string is not None:
+        return string
+
+    match = _query_identifier_re.match(q, pos)
+    if match is None:
+        raise ParseFailure("Expected identifier", pos)
+    ident = match.group()
+    if ident in keywords:
+        raise ParseFailure(f"Illegal bare identifier {ident!r}", pos)
+    return ident, match.end()
+
+
+def _scan_type_annotation(q: str, pos: int, /) -> Tuple[Optional[str], int]:
+    # The caller has already confirmed the opening parenthesis.
+    pos = _skip_ws(q, pos + 1)
+    node_type: Optional[str] = None
+    if not q.startswith(")", pos):
+        node_type, pos = _scan_identifier(q, pos)
+        pos = _skip_ws(q, pos)
+    if not q.startswith(")", pos):
+        raise ParseFailure("Expected ')'", pos)
+    return node_type, pos + 1
+
+
+def _scan_call(q: str, pos: int, name: str, /) -> int:
+    # Returns the offset just past "name(", or -1.
+    if not q.startswith(name, pos):
+        return -1
+    end = _skip_ws(q, pos + len(name))
+    if not q.startswith("(", end):
+        return -1
+    return _skip_ws(q, end + 1)
+
+
+def _scan_close_call(q: str, pos: int, /) -> int:
+    pos = _skip_ws(q, pos)
+    if not q.startswith(")", pos):
+        raise ParseFailure("Expected ')'", pos)
+    return pos + 1
+
+
+def _scan_accessor(q: str, pos: int, /) -> Tuple[Accessor, Optional[str], bool, int]:
+    # Returns the accessor, the property key it reads if any, whether it's tag(), and the end
+    # offset.
+    start = _scan_call(q, pos, "val")
+    if start != -1:
+        match = _index_re.match(q, start)
+        index = 0
+        if match is not None:
+            index = int(match.group())
+            start = match.end()
+        return _make_argument_accessor(index), None, False, _scan_close_call(q, start)
+
+    start = _scan_call(q, pos, "prop")
+    if start != -1:
+        key, start = _scan_identifier(q, start)
+        return _make_property_accessor(key), key, False, _scan_close_call(q, start)
+
+    for name, accessor, is_tag in (("name", _access_name, False), ("tag", _access_tag, True)):
+        start = _scan_call(q, pos, name)
+        if start != -1:
+            return accessor, None, is_tag, _scan_close_call(q, start)
+
+    for name in ("values", "props"):
+        if _scan_call(q, pos, name) != -1:
+            raise ParseFailure(
+                f"{name}() can only be used in mappings, which aren't supported", pos
+            )
+
+    key, pos = _scan_identifier(q, pos)
+    return _make_property_accessor(key), key, False, pos
+
+
+def _scan_accessor_matcher(q: str, pos: int, /) -> Tuple[NodeMatcher, Optional[_Equality], int]:
+    # The caller has already confirmed the opening bracket.
+    pos = _skip_ws(q, pos + 1)
+    if q.startswith("]", pos):
+        return _match_any, None, pos + 1
+
+    accessor, key, is_tag, pos = _scan_accessor(q, pos)
+    pos = _skip_ws(q, pos)
+    equality: Optional[_Equality] = None
+    match = _comparison_re.match(q, pos)
+    if match is None:
+        matcher = _make_exists_matcher(accessor)
+    else:
+        compare = _comparisons[match.group()]
+        pos = _skip_ws(q, match.end())
+
+        expected: Any
+        if q.startswith("(", pos):
+            if not is_tag:
+                raise ParseFailure("Only tag() can be compared to a type annotation", pos)
+            expected, pos = _scan_type_annotation(q, pos)
+            if expected is None:
+                raise ParseFailure("Expected a type annotation", pos)
+        else:
+            val_type, kind, raw_value, pos = scan_value(q, pos)
+            if val_type is not None:
+                raise ParseFailure("Values in queries can't have type annotations", pos)
+            expected = _decode_literal(val_type, kind, raw_value)
+            if key is not None and compare is _equal:
+                equality = key, expected
+        matcher = _make_comparison_matcher(accessor, compare, expected)
+
+    pos = _skip_ws(q, pos)
+    if not q.startswith("]", pos):
+        raise ParseFailure("Expected ']'", pos)
+    return matcher, equality, pos + 1
+
+
+def _scan_filter(q: str, pos: int, /) -> _ScannedFilter:
+    end = _scan_call(q, pos, "top")
+    if end != -1:
+        return _match_top, None, (), _scan_close_call(q, end)
+
+    start = pos
+    matchers: List[NodeMatcher] = []
+    name: Optional[str] = None
+    equalities: List[_Equality] = []
+    if q.startswith("(", pos):
+        node_type, pos = _scan_type_annotation(q, pos)
+        matchers.append(_make_type_matcher(node_type))
+    if not q.startswith("[", pos) and (
+        scan_string(q, pos) is not None or _query_identifier_re.match(q, pos) is not None
+    ):
+        name, pos = _scan_identifier(q, pos)
+        # The name is the cheapest thing to check, so it goes first.
+        matchers.insert(0, _make_name_matcher(name))
+    while q.startswith("[", pos):
+        matcher, equality, pos = _scan_accessor_matcher(q, pos)
+        if matcher is not _match_any:
+            matchers.append(matcher)
+        if equality is not None:
+            equalities.append(equality)
+
+    if pos == start:
+        raise ParseFailure("Expected a filter", pos)
+    return _make_filter(matchers), name, tuple(equalities), pos
+
+
+def _scan_selector(q: str, pos: int, /) -> Tuple[_Selector, int]:
+    matcher, name, equality, pos = _scan_filter(q, pos)
+    filters = [matcher]
+    names = [name]
+    equalities = [equality]
+    combinators: List[str] = []
+
+    while True:
+        end = _skip_ws(q, pos)
+        match = _combinator_re.match(q, end)
+        if match is None:
+            break
+        combinator = match.group()
+        if filters[-1] is _match_top and combinator not in (">", ">>"):
+            raise ParseFailure("top() can only be followed by '>' or '>>'", end)
+
+        matcher, name, equality, pos = _scan_filter(q, _skip_ws(q, match.end()))
+        if matcher is _match_top:
+            raise ParseFailure("top() can only start a selector", end)
+        combinators.append(combinator)
+        filters.append(matcher)
+        names.append(name)
+        equalities.append(equality)
+
+    if filters[-1] is _match_top:
+        # top() on its own is the same as top() > [].
+        filters.append(_match_any)
+        names.append(None)
+        equalities.append(())
+        combinators.append(">")
+    selector = _Selector(tuple(filters), tuple(combinators), tuple(names), tuple(equalities))
+    return selector, pos
+
+
+class Query:
+    def __init__(self, query: str, /):
+        self.query = query
+
+        selectors = []
+        try:
+            pos = _skip_ws(query, 0)
+            while True:
+                selector, pos = _scan_selector(query, pos)
+                selectors.append(selector)
+                pos = _skip_ws(query, pos)
+                if pos == len(query):
+                    break
+                if not query.startswith("||", pos):
+                    raise ParseFailure("Expected a combinator or '||'", pos)
+                pos = _skip_ws(query, pos + 2)
+        except ParseFailure as e:
+            raise KQLSyntaxError(f"Invalid query {query!r}: {e}.") from e
+        self._selectors: Tuple[_Selector, ...] = tuple(selectors)
+
+    def __repr__(self) -> str:
+        return f"Query({self.query!r})"
+
+    def select(
+        self,
+        nodes: Union[NodeList, Iterable[Node]],
+        /,
+        *,
+        property_index: Optional[PropertyIndex] = None,
+    ) -> List[Node]:
+        # Results from several selectors would have to be merged back into document order,
+        # so indexes are only used for queries with a single selector.
+        if len(self._selectors) == 1:
+            selector = self._selectors[0]
+            if property_index is not None:
+                found = _select_by_property(selector, nodes, property_index)
+                if found is not None:
+                    return found
+            if selector.filters[0] is _match_top and all(
+                combinator == ">" for combinator in selector.combinators
+            ):
+                return _select_children(selector, nodes)
+
+        top_nodes = nodes.nodes if isinstance(nodes, NodeList) else list(nodes)
+        selectors = self._selectors
+        results: List[Node] = []
+
+        # The tree is walked depth first without recursion. Each frame holds a list of
+        # siblings and the index of the node being visited among them, so the frames are
+        # the path from the top level to the current node.
+        frames: List[List[Any]] = [[top_nodes, -1]]
+        while frames:
+            frame = frames[-1]
+            frame[1] += 1
+            siblings, index = frame
+            if index == len(siblings):
+                frames.pop()
+                continue
+
+            node = siblings[index]
+            for selector in selectors:
+                if selector.filters[-1](node) and _matches_path(selector, frames):
+                    results.append(node)
+                    break
+
+            children = node._children
+            if children:
+                frames.append([children.nodes, -1])
+
+        return results
+
+
+def _select_by_property(
+    selector: _Selector,
+    nodes: Union[NodeList, Iterable[Node]],
+    index: PropertyIndex,
+    /,
+) -> Optional[List[Node]]:
+    # A lone filter like name[key=value] is looked up in a property index covering the key,
+    # as long as the index was built from these nodes and covers every level.
+    name = selector.names[0]
+    if len(selector.filters) != 1 or name is None:
+        return None
+    if index._nodes is not nodes or index.depth is not None:
+        return None
+
+    for key, val in selector.equalities[0]:
+        if key in index.keys:
+            candidates = index.find(name, key, val)
+            # Nodes indexed after the index was built may be out of document order.
+            if not index.in_document_order:
+                return None
+            matcher = selector.filters[0]
+            return [node for node in candidates if matcher(node)]
+    return None
+
+
+def _select_children(selector: _Selector, nodes: Union[NodeList, Iterable[Node]], /) -> List[Node]:
+    # A selector like top() > a > b only needs the nodes along the path, so each step looks
+    # its name up in the name index of the node lists it reaches, rather than walking the
+    # whole tree. The nodes matched at each level stay in document order.
+    matched: List[Node] = []
+    levels: List[Union[NodeList, Iterable[Node]]] = [nodes]
+    for matcher, name in zip(selector.filters[1:], selector.names[1:]):
+        matched = []
+        for siblings in levels:
+            if name is not None and isinstance(siblings, NodeList):
+                candidates = siblings.get_nodes_by_name(name)
+            else:
+                candidates = siblings
+            matched.extend(node for node in candidates if matcher(node))
+        levels = [node._children for node in matched if node._children]
+    return matched
+
+
+def _matches_path(selector: _Selector, frames: List[List[Any]], /) -> bool:
+    # Checks the rest of the selector, from right to left, against the ancestors and siblings
+    # of the current node, which already matches the last filter. Combinators like >> and ~
+    # can be satisfied by more than one node, so the candidates are tried with a stack. A
+    # candidate that has already failed fails the same way every time, so each is only tried
+    # once.
+    filters = selector.filters
+    combinators = selector.combinators
+    depth = len(frames) - 1
+    stack = [(depth, frames[depth][1], len(filters) - 1)]
+    seen: Set[Tuple[int, int, int]] = set()
+    while stack:
+        state = stack.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        depth, index, filter_idx = state
+        if filter_idx == 0:
+            return True
+
+        combinator = combinators[filter_idx - 1]
+        matcher = filters[filter_idx - 1]
+        if matcher is _match_top:
+            # The document is the parent of the top-level nodes.
+            if combinator == ">>" or depth == 0:
+                return True
+        elif combinator == ">":
+            if depth > 0:
+                parent_index = frames[depth - 1][1]
+                if matcher(frames[depth - 1][0][parent_index]):
+                    stack.append((depth - 1, parent_index, filter_idx - 1))
+        elif combinator == ">>":
+            for ancestor_depth in range(depth - 1, -1, -1):
+                ancestor_index = frames[ancestor_depth][1]
+                if matcher(frames[ancestor_depth][0][ancestor_index]):
+                    stack.append((ancestor_depth, ancestor_index, filter_idx - 1))
+        elif combinator == "+":
+            if index > 0 and matcher(frames[depth][0][index - 1]):
+                stack.append((depth, index - 1, filter_idx - 1))
+        else:
+            siblings = frames[depth][0]
+            for sibling_index in range(index - 1, -1, -1):
+                if matcher(siblings[sibling_index]):
+                    stack.append((depth, sibling_index, filter_idx - 1))
+    return False
+
+
+@lru_cache(maxsize=256)
+def compile_query(query: str, /) -> Query:
+    return Query(query)
+
+
+__all__ = (
+    "Query",
+    "compile_query",
+)
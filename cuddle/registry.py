@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import threading
+from operator import methodcaller
+from typing import Any, Callable, Dict, Literal, Optional, Tuple, Type
+
+
+ValueKind = Literal["string", "int", "float"]
+# String and float decoders are called with the literal's text, int decoders with its text
+# and base.
+TypeDecoder = Callable[..., Any]
+TypeEncoder = Callable[[Any], str]
+
+
+class TypeRegistry:
+    def __init__(self, *, builtins: bool = True):
+        self._decoders: Dict[str, Dict[str, TypeDecoder]] = {"string": {}, "int": {}, "float": {}}
+        self._encoders: Dict[type, Tuple[str, TypeEncoder]] = {}
+        # Maps every class an encoder has been looked up for to the entry registered for the
+        # nearest class in its MRO, or None.
+        self._encoder_cache: Dict[type, Optional[Tuple[str, TypeEncoder]]] = {}
+        self._builtins_pending = builtins
+        self._builtins_lock = threading.Lock()
+
+    def register_decoder(
+        self, annotation: str, decoder: TypeDecoder, /, *, kind: ValueKind = "string"
+    ) -> None:
+        if kind not in self._decoders:
+            raise ValueError(f"Unknown value kind {kind!r}.")
+        self._decoders[kind][annotation] = decoder
+
+    def register_encoder(self, cls: type, annotation: str, encoder: TypeEncoder = str, /) -> None:
+        self._encoders[cls] = (annotation, encoder)
+        self._encoder_cache.clear()
+
+    def register(
+        self,
+        cls: Type[Any],
+        annotation: str,
+        /,
+        *,
+        decoder: Optional[TypeDecoder] = None,
+        encoder: TypeEncoder = str,
+    ) -> None:
+        self.register_decoder(annotation, cls if decoder is None else decoder)
+        self.register_encoder(cls, annotation, encoder)
+
+    def get_decoder(self, kind: ValueKind, annotation: str, /) -> Optional[TypeDecoder]:
+        decoder = self._decoders[kind].get(annotation)
+        if decoder is None and self._builtins_pending:
+            self._register_builtins()
+            decoder = self._decoders[kind].get(annotation)
+        return decoder
+
+    def get_encoder(self, cls: type, /) -> Optional[Tuple[str, TypeEncoder]]:
+        try:
+            return self._encoder_cache[cls]
+        except KeyError:
+            pass
+
+        if self._builtins_pending:
+            self._register_builtins()
+
+        entry = None
+        for base in cls.__mro__:
+            entry = self._encoders.get(base)
+            if entry is not None:
+                break
+        self._encoder_cache[cls] = entry
+        return entry
+
+    def _register_builtins(self) -> None:
+        # The built-in types are only registered on the first lookup, so that importing cuddle
+        # doesn't have to import all of their modules. Types registered before then win.
+        # Lookups made by other threads in the meantime wait here until they're all in.
+        with self._builtins_lock:
+            if self._builtins_pending:
+                self._add_builtins()
+                self._builtins_pending = False
+
+    def _add_builtins(self) -> None:
+        from datetime import date, datetime, time
+        from decimal import Decimal
+        from ipaddress import IPv4Address, IPv6Address
+        from re import Pattern
+        from re import compile as re_compile
+        from urllib.parse import DefragResult, ParseResult, SplitResult, urlparse
+        from uuid import UUID
+
+        int_decoders = self._decoders["int"]
+        for annotation in ("i8", "i16", "i32", "i64", "u8", "u16", "u32", "u64", "isize", "usize"):
+            int_decoders.setdefault(annotation, int)
+
+        float_decoders = self._decoders["float"]
+        for annotation in ("f32", "f64"):
+            float_decoders.setdefault(annotation, float)
+        for annotation in ("decimal64", "decimal128"):
+            float_decoders.setdefault(annotation, Decimal)
+
+        str_decoders = self._decoders["string"]
+        str_decoders.setdefault("base64", _decode_base64)
+        str_decoders.setdefault("date-time", datetime.fromisoformat)
+        str_decoders.setdefault("datetime", datetime.fromisoformat)
+        str_decoders.setdefault("date", date.fromisoformat)
+        str_decoders.setdefault("time", time.fromisoformat)
+        str_decoders.setdefault("decimal", Decimal)
+        str_decoders.setdefault("ipv4", IPv4Address)
+        str_decoders.setdefault("ipv6", IPv6Address)
+        str_decoders.setdefault("regex", re_compile)
+        str_decoders.setdefault("url", urlparse)
+        str_decoders.setdefault("uuid", UUID)
+
+        isoformat = methodcaller("isoformat")
+        geturl = methodcaller("geturl")
+        builtin_encoders: Dict[type, Tuple[str, TypeEncoder]] = {
+            bytes: ("base64", _encode_base64),
+            datetime: ("date-time", isoformat),
+            date: ("date", isoformat),
+            time: ("time", isoformat),
+            Decimal: ("decimal", str),
+            IPv4Address: ("ipv4", str),
+            IPv6Address: ("ipv6", str),
+            Pattern: ("regex", _pattern_source),
+            DefragResult: ("url", geturl),
+            ParseResult: ("url", geturl),
+            SplitResult: ("url", geturl),
+            UUID: ("uuid", str),
+        }
+        for cls, entry in builtin_encoders.items():
+            self._encoders.setdefault(cls, entry)
+        self._encoder_cache.clear()
+
+
+def _decode_base64(val: str, /) -> bytes:
+    from base64 import b64decode
+
+    return b64decode(val, validate=True)
+
+
+def _encode_base64(val: bytes, /) -> str:
+    from base64 import b64encode
+
+    return b64encode(val).decode("utf-8")
+
+
+def _pattern_source(val: Any, /) -> str:
+    return val.pattern
+
+
+default_registry = TypeRegistry()
+
+
+__all__ = (
+    "TypeRegistry",
+    "TypeDecoder",
+    "TypeEncoder",
+    "ValueKind",
+    "default_registry",
+)
@@ -1,9 +1,48 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from bisect import insort
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+
+if TYPE_CHECKING:
+    from .frozen import FrozenDocument
+    from .index import PropertyIndex
+
 
+_no_properties: MappingProxyType = MappingProxyType({})
 
+# Counts the nodes renamed since the module was imported. A node doesn't know which node
+# lists hold it, so renaming any node marks every name index as out of date.
+_renames = 0
+
+_set_slot = object.__setattr__
+
+
+# Nodes and node lists have no instance dictionaries, and a node only allocates its arguments,
+# properties and children the first time they're asked for. Until then those slots hold None,
+# which is how most leaf nodes of a large document stay. Code in cuddle that only reads them
+# goes through the slots directly, so reading a document doesn't allocate anything.
 class Node:
+    __slots__ = ("name", "node_type", "_arguments", "_properties", "_children")
+
+    name: str
+    node_type: Optional[str]
+    _arguments: Optional[List[Any]]
+    _properties: Optional[Dict[str, Any]]
+    _children: Optional[NodeList]
+
     def __init__(
         self,
         name: str,
@@ -14,39 +53,67 @@ class Node:
         properties: Optional[Dict[str, Any]] = None,
         children: Optional[Union[NodeList, list]] = None,
     ):
-        self.name = name
-        self.node_type = node_type
-
-        self.arguments: List[Any]
-        if arguments is not None:
-            self.arguments = arguments
+        # A new node isn't in any node list yet, so this skips __setattr__.
+        _set_slot(self, "name", name)
+        _set_slot(self, "node_type", node_type)
+        _set_slot(self, "_arguments", arguments)
+        _set_slot(self, "_properties", properties)
+        if isinstance(children, list):
+            _set_slot(self, "_children", NodeList(children))
         else:
-            self.arguments = []
+            _set_slot(self, "_children", children)
 
-        self.properties: Dict[str, Any]
-        if properties is not None:
-            self.properties = properties
-        else:
-            self.properties = {}
+    def __setattr__(self, attr: str, value: Any) -> None:
+        # Names are read far more often than they're changed, so `name` stays a plain slot
+        # and renames are counted here.
+        global _renames
+        if attr == "name":
+            _renames += 1
+        _set_slot(self, attr, value)
+
+    @property
+    def arguments(self) -> List[Any]:
+        arguments = self._arguments
+        if arguments is None:
+            arguments = self._arguments = []
+        return arguments
+
+    @arguments.setter
+    def arguments(self, arguments: List[Any]) -> None:
+        self._arguments = arguments
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        properties = self._properties
+        if properties is None:
+            properties = self._properties = {}
+        return properties
+
+    @properties.setter
+    def properties(self, properties: Dict[str, Any]) -> None:
+        self._properties = properties
 
-        self.children: NodeList
+    @property
+    def children(self) -> NodeList:
+        children = self._children
         if children is None:
-            self.children = NodeList([])
-        elif isinstance(children, list):
-            self.children = NodeList(children)
-        else:
-            self.children = children
+            children = self._children = NodeList([])
+        return children
+
+    @children.setter
+    def children(self, children: NodeList) -> None:
+        self._children = children
 
     def __repr__(self) -> str:
         details = [f"name={self.name!r}"]
         if self.node_type:
             details.append(f"type={self.node_type!r}")
-        if self.arguments:
-            details.append(f"arguments={self.arguments!r}")
-        if self.properties:
-            details.append(f"properties={self.properties!r}")
-        if self.children:
-            details.append(f"children={self.children!r}")
+        if self._arguments:
+            details.append(f"arguments={self._arguments!r}")
+        if self._properties:
+            details.append(f"properties={self._properties!r}")
+        if self._children:
+            details.append(f"children={self._children!r}")
         return f"Node({', '.join(details)})"
 
     def __iter__(self):
@@ -54,15 +121,83 @@ class Node:
 
     def __getitem__(self, name: Union[int, str]):
         if isinstance(name, int):
-            return self.arguments[name]
+            return (self._arguments or ())[name]
         else:
-            return self.properties[name]
+            return (self._properties or _no_properties)[name]
+
+
+class _NodeListItems(list):
+    # The list behind NodeList.nodes. Its methods count up `version` before changing it, which
+    # is how a node list notices nodes added, removed or replaced in it directly.
+    __slots__ = ("version",)
+
+    def __init__(self, nodes: Iterable[Node] = (), /):
+        super().__init__(nodes)
+        self.version = 0
+
+    def __reduce__(self) -> Tuple[type, Tuple[List[Node]]]:
+        return _NodeListItems, (list(self),)
+
+
+def _counts_change(method: Callable[..., Any], /) -> Callable[..., Any]:
+    def counted(self: _NodeListItems, /, *args: Any, **kwargs: Any) -> Any:
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    counted.__name__ = method.__name__
+    return counted
+
+
+for _method in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(_NodeListItems, _method, _counts_change(getattr(list, _method)))
 
 
 class NodeList:
+    # _index maps each node name to the positions of the nodes with that name, in order. It's
+    # built on the first lookup by name and kept up to date by the methods below. Changes
+    # made any other way, to the list in `nodes` or to the name of any node, leave it out of
+    # date, and it's rebuilt on the next lookup. `nodes` holds a copy of the list it's given,
+    # so that changes to it can be seen.
+    __slots__ = ("_nodes", "_index", "_indexed_version", "_indexed_renames")
+
     def __init__(self, nodes: List[Node]):
         self.nodes = nodes
 
+    @property
+    def nodes(self) -> List[Node]:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: List[Node]) -> None:
+        self._nodes = nodes if isinstance(nodes, _NodeListItems) else _NodeListItems(nodes)
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._indexed_version = 0
+        self._indexed_renames = 0
+
+    def __getstate__(self) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        # The index is quick to rebuild, so it isn't worth copying or pickling. Subclasses may
+        # have instance dictionaries of their own.
+        slots = {
+            "_nodes": self._nodes,
+            "_index": None,
+            "_indexed_version": 0,
+            "_indexed_renames": 0,
+        }
+        return getattr(self, "__dict__", None), slots
+
     def __repr__(self) -> str:
         return repr(self.nodes)
 
@@ -78,21 +213,187 @@ class NodeList:
     def __getitem__(self, idx: int) -> Node:
         return self.nodes[idx]
 
+    def __setitem__(self, idx: int, node: Node) -> None:
+        index = self._get_fresh_index()
+        nodes = self._nodes
+        if index is None or not isinstance(idx, int):
+            nodes[idx] = node
+            return
+
+        if idx < 0:
+            idx += len(nodes)
+        old_node = nodes[idx]
+        nodes[idx] = node
+        if old_node.name != node.name:
+            positions = index[old_node.name]
+            positions.remove(idx)
+            if not positions:
+                del index[old_node.name]
+            insort(index.setdefault(node.name, []), idx)
+        self._indexed_version = nodes.version
+
+    def append(self, node: Node) -> None:
+        index = self._get_fresh_index()
+        nodes = self._nodes
+        nodes.append(node)
+        if index is not None:
+            index.setdefault(node.name, []).append(len(nodes) - 1)
+            self._indexed_version = nodes.version
+
+    def extend(self, nodes: Iterable[Node]) -> None:
+        for node in nodes:
+            self.append(node)
+
+    def insert(self, idx: int, node: Node) -> None:
+        # Inserting or removing a node moves every node after it, so rebuilding the index when
+        # it's next needed costs no more than fixing it up.
+        self.nodes.insert(idx, node)
+
+    def remove(self, node: Node) -> None:
+        self.nodes.remove(node)
+
+    def _get_fresh_index(self) -> Optional[Dict[str, List[int]]]:
+        # Subclasses that don't call NodeList.__init__ start without an index.
+        index = getattr(self, "_index", None)
+        if index is not None and (
+            self._indexed_version != self._nodes.version or self._indexed_renames != _renames
+        ):
+            index = self._index = None
+        return index
+
+    def _get_index(self) -> Dict[str, List[int]]:
+        index = self._get_fresh_index()
+        if index is None:
+            index = {}
+            nodes = self._nodes
+            for position, node in enumerate(nodes):
+                positions = index.get(node.name)
+                if positions is None:
+                    index[node.name] = [position]
+                else:
+                    positions.append(position)
+            self._index = index
+            self._indexed_version = nodes.version
+            self._indexed_renames = _renames
+        return index
+
     def get_nodes_by_name(self, name: str) -> Iterable[Node]:
-        filter_func = lambda node: node.name == name
-        return filter(filter_func, self.nodes)
+        positions = self._get_index().get(name, ())
+        return map(self.nodes.__getitem__, tuple(positions))
+
+    def first_by_name(self, name: str) -> Optional[Node]:
+        positions = self._get_index().get(name)
+        return self.nodes[positions[0]] if positions else None
+
+    def count_by_name(self, name: str) -> int:
+        return len(self._get_index().get(name, ()))
+
+    def names(self) -> List[str]:
+        # In the order of their first appearance.
+        index = self._get_index()
+        return sorted(index, key=lambda name: index[name][0])
+
+    def query(self, query: str, /) -> NodeList:
+        from .query import compile_query
+
+        return NodeList(compile_query(query).select(self.nodes))
 
 
 class Document:
+    _property_index: Optional[PropertyIndex] = None
+
     def __init__(self, nodes: NodeList):
         self.nodes = nodes
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_property_index", None)
+        return state
+
     def __repr__(self) -> str:
         return f"Document({self.nodes!r})"
 
     def __iter__(self) -> Iterator[Node]:
         return self.nodes.__iter__()
 
+    def query(self, query: str, /) -> NodeList:
+        # Queries use the property index where it can answer them.
+        from .query import compile_query
+
+        selected = compile_query(query).select(self.nodes, property_index=self._property_index)
+        return NodeList(selected)
+
+    def freeze(self) -> FrozenDocument:
+        from .frozen import FrozenDocument
+
+        return FrozenDocument.from_document(self.nodes)
+
+    def build_index(self, keys: Iterable[str], *, depth: Optional[int] = None) -> PropertyIndex:
+        from .index import PropertyIndex
+
+        self._property_index = PropertyIndex(self.nodes, keys, depth=depth)
+        return self._property_index
+
+    def drop_index(self) -> None:
+        self._property_index = None
+
+    def invalidate_index(self) -> None:
+        if self._property_index is not None:
+            self._property_index.invalidate()
+
+    def find_nodes(self, name: str, key: str, val: Any, /) -> List[Node]:
+        # With an index that covers the key, only the levels it was built for are searched.
+        index = self._property_index
+        if index is not None and key in index.keys:
+            return index.find(name, key, val)
+
+        results = []
+        stack = [iter(self.nodes)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            properties = node._properties
+            if node.name == name and properties and key in properties:
+                found = properties[key]
+                if found.__class__ is bool or val.__class__ is bool:
+                    if found is val:
+                        results.append(node)
+                elif found == val:
+                    results.append(node)
+            if node._children:
+                stack.append(iter(node._children))
+        return results
+
+    # The methods below change the document and keep its index up to date. Any other change
+    # to the indexed nodes needs a call to invalidate_index().
+
+    def add_node(self, node: Node, /, *, parent: Optional[Node] = None) -> None:
+        siblings = self.nodes if parent is None else parent.children
+        siblings.append(node)
+        if self._property_index is not None:
+            self._property_index.node_added(node, parent)
+
+    def remove_node(self, node: Node, /, *, parent: Optional[Node] = None) -> None:
+        siblings = self.nodes if parent is None else parent.children
+        siblings.remove(node)
+        if self._property_index is not None:
+            self._property_index.node_removed(node)
+
+    def set_property(self, node: Node, key: str, val: Any, /) -> None:
+        index = self._property_index
+        if index is not None:
+            index.property_changing(node, key)
+        node.properties[key] = val
+        if index is not None:
+            index.property_changed(node, key)
+
+    def delete_property(self, node: Node, key: str, /) -> None:
+        if self._property_index is not None:
+            self._property_index.property_changing(node, key)
+        del node.properties[key]
+
 
 __all__ = (
     "Node",
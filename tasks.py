@@ -16,13 +16,13 @@ in_pkg = os.environ.get("PACKAGING") == "true"
 
 @task
 def reformat(c):
-    c.run("isort --skip grammar.py cuddle tests tasks.py", pty=pty)
-    c.run("black --exclude grammar.py cuddle tests tasks.py", pty=pty)
+    c.run("isort --skip grammar.py cuddle tests benchmarks tasks.py", pty=pty)
+    c.run("black --exclude grammar.py cuddle tests benchmarks tasks.py", pty=pty)
 
 
 @task
 def lint(c):
-    c.run("flake8 --show-source --statistics cuddle tests", pty=pty)
+    c.run("flake8 --show-source --statistics cuddle tests benchmarks", pty=pty)
 
 
 @task
@@ -52,6 +52,11 @@ def test(c, verbose=False, onefile=""):
     c.run(" ".join(pytest_args), pty=pty)
 
 
+@task
+def benchmark(c, name):
+    c.run(f"python benchmarks/{shlex.quote(name)}.py", pty=pty)
+
+
 @task
 def type_check(c):
     c.run("mypy cuddle tests", pty=pty)
@@ -0,0 +1,124 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from cuddle import (
+    Document,
+    KDLDecodeError,
+    KDLDecoder,
+    KDLEncoder,
+    Node,
+    dump_many,
+    dumps,
+    load,
+    load_many,
+    loads,
+    plain_str_parser,
+)
+
+
+fixtures_path = Path(__file__).parent
+
+
+def _write_docs(tmp_path: Path, count: int):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"doc{i}.kdl"
+        path.write_text(f'node{i} {i} key="{i}" {{\n    child (date)"2021-10-03"\n}}\n')
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("workers", (1, 2, None))
+def test_load_many(tmp_path: Path, workers):
+    paths = _write_docs(tmp_path, 20)
+    paths.append(fixtures_path / "complex.kdl")
+
+    docs = load_many(paths, workers=workers)
+
+    assert [repr(doc) for doc in docs] == [repr(load(path)) for path in paths]
+
+
+def test_load_many_errors(tmp_path: Path):
+    paths = _write_docs(tmp_path, 20)
+    (tmp_path / "doc3.kdl").write_text("invalid {")
+    (tmp_path / "doc7.kdl").unlink()
+
+    docs = load_many(paths, workers=2)
+
+    assert len(docs) == 20
+    assert isinstance(docs[3], KDLDecodeError)
+    assert isinstance(docs[7], FileNotFoundError)
+    for i, doc in enumerate(docs):
+        if i not in (3, 7):
+            assert isinstance(doc, Document)
+            assert doc.nodes[0].name == f"node{i}"
+
+
+def test_load_many_factories(tmp_path: Path):
+    paths = _write_docs(tmp_path, 10)
+
+    docs = load_many(paths, workers=2, parse_str=plain_str_parser)
+
+    for doc in docs:
+        assert isinstance(doc, Document)
+        assert doc.nodes[0].children[0].arguments == ["2021-10-03"]
+
+
+def test_load_many_small_batch_in_process(tmp_path: Path):
+    # A class defined locally can't be pickled, so this only works without worker processes.
+    class LocalNode(Node):
+        pass
+
+    paths = _write_docs(tmp_path, 3)
+
+    docs = load_many(paths, workers=4, node_factory=LocalNode)
+
+    for doc in docs:
+        assert isinstance(doc, Document)
+        assert isinstance(doc.nodes[0], LocalNode)
+
+
+def test_load_many_unpicklable_config(tmp_path: Path):
+    paths = _write_docs(tmp_path, 20)
+
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        load_many(paths, workers=2, parse_str=lambda _, val: val)
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_dump_many(tmp_path: Path, workers: int):
+    docs = [loads(f"node {i} {{\n    child {i * 2}\n}}") for i in range(20)]
+    paths = [tmp_path / f"out{i}.kdl" for i in range(20)]
+
+    results = dump_many(zip(docs, paths), workers=workers, indent=4)
+
+    assert results == [None] * 20
+    for doc, path in zip(docs, paths):
+        assert path.read_text() == dumps(doc, indent=4)
+
+
+def test_dump_many_errors(tmp_path: Path):
+    docs = [loads(f"node {i}") for i in range(10)]
+    docs[2].nodes[0].arguments.append(object())
+    paths = [tmp_path / f"out{i}.kdl" for i in range(10)]
+    paths[5] = tmp_path / "missing" / "out5.kdl"
+
+    results = dump_many(zip(docs, paths), workers=2)
+
+    assert isinstance(results[2], TypeError)
+    assert isinstance(results[5], FileNotFoundError)
+    assert [i for i, result in enumerate(results) if result is None] == [0, 1, 3, 4, 6, 7, 8, 9]
+
+
+def test_pickle_round_trip():
+    doc = load(fixtures_path / "complex.kdl")
+    assert repr(pickle.loads(pickle.dumps(doc))) == repr(doc)
+
+    decoder = pickle.loads(pickle.dumps(KDLDecoder(parse_str=plain_str_parser, engine="tatsu")))
+    assert decoder.parse_str is plain_str_parser
+    assert decoder.engine == "tatsu"
+
+    encoder = pickle.loads(pickle.dumps(KDLEncoder(indent=4)))
+    assert encoder.indent == "    "
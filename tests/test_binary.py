@@ -0,0 +1,167 @@
+import re
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import pytest
+
+from cuddle import (
+    Document,
+    IdentifierFormatter,
+    KDLDecodeError,
+    KDLEncodeTypeError,
+    Node,
+    NodeList,
+    ValueEncoderResult,
+    default_value_encoder,
+    dumpb,
+    dumps,
+    load,
+    loadb,
+    loads,
+)
+
+
+fixtures_path = Path(__file__).parent
+FIXTURES_DIR = fixtures_path / "upstream_fixtures"
+VALID_INPUT_FIXTURES = sorted(
+    FIXTURES_DIR / "input" / output_file.name
+    for output_file in (FIXTURES_DIR / "expected_kdl").glob("*.kdl")
+)
+
+
+def _text_round_trip(doc: Document, **kwargs) -> str:
+    return repr(loads(dumps(doc), **kwargs))
+
+
+def test_round_trip_complex():
+    doc = load(fixtures_path / "complex.kdl")
+
+    assert repr(loadb(dumpb(doc))) == _text_round_trip(doc)
+
+
+@pytest.mark.parametrize("input_file", VALID_INPUT_FIXTURES, ids=lambda input_file: input_file.stem)
+def test_round_trip_fixtures(input_file: Path):
+    doc = load(input_file, ignore_unknown_types=True)
+
+    # This includes documents like sci_notation_large, whose values the text format can't
+    # express after decoding.
+    assert repr(loadb(dumpb(doc), ignore_unknown_types=True)) == repr(doc)
+
+
+def test_round_trip_values():
+    values = [
+        0,
+        -1,
+        63,
+        -64,
+        2**200,
+        -(2**200),
+        1.5,
+        -0.0,
+        1e300,
+        None,
+        True,
+        False,
+        "",
+        "ノード" * 100,
+        'quote"and\\backslash',
+        Decimal("1.10"),
+        date(2021, 10, 3),
+        UUID("12345678-1234-5678-1234-567812345678"),
+    ]
+    names = [f"name{i}" for i in range(300)]
+    doc = Document(
+        NodeList(
+            [
+                Node("(weird name)", "type", arguments=values, properties={"key": 1}),
+                Node("many", None, children=[Node(name, name) for name in names]),
+            ]
+        )
+    )
+
+    decoded = loadb(dumpb(doc))
+
+    assert decoded.nodes[0].name == "(weird name)"
+    assert decoded.nodes[0].node_type == "type"
+    assert decoded.nodes[0].arguments == values
+    assert decoded.nodes[0].properties == {"key": 1}
+    assert [(node.name, node.node_type) for node in decoded.nodes[1].children] == [
+        (name, name) for name in names
+    ]
+    assert repr(decoded) == _text_round_trip(doc)
+
+
+def test_typed_literals():
+    def encoder(val: Any, ident_fmt: IdentifierFormatter, /) -> ValueEncoderResult:
+        if isinstance(val, int) and not isinstance(val, bool):
+            return f"({ident_fmt('u8')})0x{val:x}"
+        if val is None:
+            return "(nothing)null"
+        return default_value_encoder(val, ident_fmt)
+
+    doc = Document(NodeList([Node("node", None, arguments=[255, None, "x"])]))
+    data = dumpb(doc, value_encoder=encoder)
+
+    assert loadb(data, ignore_unknown_types=True).nodes[0].arguments == [255, None, "x"]
+    with pytest.raises(KDLDecodeError, match="with type 'nothing'"):
+        loadb(data)
+    assert b"0xff" in data
+
+
+def test_invalid_literal():
+    doc = Document(NodeList([Node("node", None, arguments=[1])]))
+
+    errmsg = "^" + re.escape("Value encoder returned invalid KDL '1 2'.") + "$"
+    with pytest.raises(KDLEncodeTypeError, match=errmsg):
+        dumpb(doc, value_encoder=lambda val, _: "1 2")
+    with pytest.raises(KDLEncodeTypeError, match="is not KDL serializable"):
+        dumpb(Document(NodeList([Node("node", None, arguments=[object()])])))
+
+
+def test_factories():
+    class CustomNode(Node):
+        pass
+
+    doc = loads('parent 1 1.5 "str" true {\n    child (date)"2021-10-03"\n}')
+    decoded = loadb(
+        dumpb(doc),
+        parse_int=lambda val_type, val, base: ("int", val),
+        parse_float=lambda val_type, val: ("float", val),
+        parse_str=lambda val_type, val: ("str", val_type, val),
+        node_factory=CustomNode,
+    )
+
+    assert isinstance(decoded.nodes[0], CustomNode)
+    assert isinstance(decoded.nodes[0].children[0], CustomNode)
+    assert decoded.nodes[0].arguments == [
+        ("int", "1"),
+        ("float", "1.5"),
+        ("str", None, "str"),
+        True,
+    ]
+    assert decoded.nodes[0].children[0].arguments == [("str", "date", "2021-10-03")]
+
+
+def test_loadb_buffers():
+    data = dumpb(loads("node 1"))
+
+    assert loadb(bytearray(data)).nodes[0].arguments == [1]
+    assert loadb(memoryview(data)).nodes[0].arguments == [1]
+
+
+@pytest.mark.parametrize(
+    ("data", "errmsg"),
+    (
+        (b"KDL", "Not a binary KDL document."),
+        (b'node "text"', "Not a binary KDL document."),
+        (dumpb(loads("node 1"))[:-1], "Failed to decode the binary document."),
+        (dumpb(loads("node 1")) + b"\x00", "Unexpected data after the end of the binary document."),
+        (b"KDLB\x01\x01\x01a\x01\x00\x00\x01\x7f\x00\x00", "Unknown value tag 127 at offset 12."),
+    ),
+)
+def test_loadb_errors(data: bytes, errmsg: str):
+    with pytest.raises(KDLDecodeError, match="^" + re.escape(errmsg) + "$"):
+        loadb(data)
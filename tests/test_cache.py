@@ -0,0 +1,196 @@
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from cuddle import (
+    CacheStats,
+    FrozenDocument,
+    KDLDecoder,
+    Node,
+    ParseCache,
+    load,
+    loads,
+    plain_str_parser,
+)
+
+
+fixtures_path = Path(__file__).parent
+
+
+def test_loads_cache():
+    cache = ParseCache()
+    s = 'node 1 key="value" {\n    child (date)"2021-10-03"\n}'
+
+    first = loads(s, cache=cache)
+    second = loads(s.encode("utf-8"), cache=cache)
+
+    assert repr(first) == repr(second) == repr(loads(s))
+    assert cache.stats == CacheStats(
+        hits=1, misses=1, evictions=0, entries=1, size=cache.stats.size
+    )
+
+
+def test_cache_copies():
+    cache = ParseCache()
+    first = loads("node 1 2", cache=cache)
+    first.nodes[0].arguments.append(3)
+
+    second = loads("node 1 2", cache=cache)
+    assert second is not first
+    assert second.nodes[0].arguments == [1, 2]
+
+    second.nodes[0].arguments.clear()
+    assert loads("node 1 2", cache=cache).nodes[0].arguments == [1, 2]
+
+
+def test_cache_copies_unpicklable():
+    # A class defined locally can't be pickled, so the cache falls back to deep copies.
+    class LocalNode(Node):
+        pass
+
+    cache = ParseCache()
+    first = loads("node 1 2", cache=cache, node_factory=LocalNode)
+    first.nodes[0].arguments.append(3)
+
+    second = loads("node 1 2", cache=cache, node_factory=LocalNode)
+    assert isinstance(second.nodes[0], LocalNode)
+    assert second.nodes[0].arguments == [1, 2]
+    assert cache.stats.hits == 1
+
+
+def test_cache_shared():
+    cache = ParseCache(copy=False)
+
+    assert loads("node", cache=cache) is loads("node", cache=cache)
+
+
+def test_cache_frozen(tmp_path: Path):
+    cache = ParseCache(copy="frozen")
+    s = 'node 1 key="value" {\n    child (date)"2021-10-03"\n}'
+
+    first = loads(s, cache=cache)
+    assert isinstance(first, FrozenDocument)
+    assert first == loads(s).freeze()
+    assert loads(s, cache=cache) is first
+    assert KDLDecoder(cache=cache).decode(s) is first
+    assert cache.stats.hits == 2
+
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text(s, encoding="utf-8")
+    loaded = load(doc_file, cache=cache)
+    assert isinstance(loaded, FrozenDocument)
+    assert load(doc_file, cache=cache) is loaded
+    assert loaded == first
+
+
+def test_cache_copy_modes():
+    with pytest.raises(ValueError, match="copy mode"):
+        ParseCache(copy="deep")  # type: ignore[arg-type]
+
+    restored = pickle.loads(pickle.dumps(ParseCache(copy="frozen")))
+    assert restored.copy == "frozen"
+
+
+def test_cache_keyed_on_configuration():
+    cache = ParseCache()
+    s = 'node (date)"2021-10-03"'
+
+    typed = loads(s, cache=cache)
+    plain = loads(s, cache=cache, parse_str=plain_str_parser)
+
+    assert typed.nodes[0].arguments != plain.nodes[0].arguments
+    assert plain.nodes[0].arguments == ["2021-10-03"]
+    assert cache.stats.misses == 2
+    assert loads(s, cache=cache, engine="tatsu").nodes[0].arguments == typed.nodes[0].arguments
+    assert cache.stats.hits == 1
+
+
+def test_load_cache(tmp_path: Path):
+    cache = ParseCache()
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1")
+
+    assert load(doc_file, cache=cache).nodes[0].arguments == [1]
+    assert load(doc_file, cache=cache).nodes[0].arguments == [1]
+    assert cache.stats.hits == 1
+
+    stat = doc_file.stat()
+    doc_file.write_text("node 2")
+    os.utime(doc_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert load(doc_file, cache=cache).nodes[0].arguments == [2]
+    assert cache.stats.misses == 2
+
+
+def test_load_cache_with_compiled_cache(tmp_path: Path):
+    cache = ParseCache()
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1")
+
+    first = load(doc_file, cache=cache, compiled_cache=True)
+    assert (tmp_path / "doc.kdlc").exists()
+    assert cache.stats.misses == 1
+
+    # Hits are served from memory, without touching the compiled file.
+    (tmp_path / "doc.kdlc").unlink()
+    second = load(doc_file, cache=cache, compiled_cache=True)
+    assert repr(second) == repr(first)
+    assert cache.stats.hits == 1
+    assert not (tmp_path / "doc.kdlc").exists()
+
+
+def test_cache_max_entries():
+    cache = ParseCache(max_entries=2)
+
+    loads("a", cache=cache)
+    loads("b", cache=cache)
+    loads("a", cache=cache)
+    loads("c", cache=cache)
+
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    loads("a", cache=cache)
+    assert cache.stats.hits == 2
+    loads("b", cache=cache)
+    assert cache.stats.misses == 4
+
+
+def test_cache_max_bytes():
+    big = "node " + " ".join(str(i) for i in range(1000))
+    max_bytes = len(pickle.dumps(loads(big))) * 2 - 1
+    cache = ParseCache(max_bytes=max_bytes)
+
+    for i in range(3):
+        loads(big + f" {i}", cache=cache)
+        assert cache.stats.size <= max_bytes
+
+    assert len(cache) == 1
+    assert cache.stats.evictions == 2
+
+    cache = ParseCache(max_bytes=10)
+    loads(big, cache=cache)
+    assert len(cache) == 0
+
+
+def test_cache_clear():
+    cache = ParseCache()
+    loads("node", cache=cache)
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.stats.size == 0
+    loads("node", cache=cache)
+    assert cache.stats.misses == 2
+
+
+def test_decoder_cache_pickles_empty():
+    cache = ParseCache(max_entries=3, copy=False)
+    decoder = KDLDecoder(cache=cache)
+    decoder.decode("node")
+
+    restored = pickle.loads(pickle.dumps(decoder))
+    assert restored.cache is not None
+    assert len(restored.cache) == 0
+    assert restored.cache.max_entries == 3
+    assert restored.cache.copy is False
@@ -0,0 +1,156 @@
+import pytest
+
+from cuddle import (
+    ColumnarDocument,
+    ColumnarNode,
+    KDLDecodeError,
+    KDLDecoder,
+    KDLEncoder,
+    Node,
+    NodeList,
+    dumps,
+    loads,
+    loads_columnar,
+)
+
+
+doc = """
+sample ts=1 value=1.5 unit="ms"
+sample ts=2 value=1 unit="ms"
+(tagged)group "a" "b" key=true key=false {
+    sample ts=3 value=true
+    nested {
+        leaf null
+    }
+    last 1 1.0 true
+}
+empty
+"""
+
+
+class CustomNodeList(NodeList):
+    pass
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_columnar_matches_nodes(engine):
+    columnar = loads_columnar(doc, engine=engine)
+    assert isinstance(columnar, ColumnarDocument)
+    assert len(columnar) == 8
+    assert dumps(columnar.to_document()) == dumps(loads(doc))
+    assert KDLEncoder().encode_columnar(columnar) == dumps(loads(doc))
+    assert KDLEncoder(indent="\t").encode_columnar(columnar) == dumps(loads(doc), indent="\t")
+
+
+def test_columns():
+    columnar = loads_columnar(doc)
+    assert list(columnar.parents) == [-1, -1, -1, 2, 2, 4, 2, -1]
+    assert list(columnar.ends) == [1, 2, 7, 4, 6, 6, 7, 8]
+    assert [columnar.strings[i] for i in columnar.names[:3]] == ["sample", "sample", "group"]
+    assert columnar.types[2] != -1 and columnar.types[0] == -1
+
+    # Names and values are shared, but equal values of different classes are kept apart.
+    assert columnar.strings.count("sample") == 1
+    assert columnar.values.count("ms") == 1
+    assert [columnar.values[i] for i in columnar.arg_values[-3:]] == [1, 1.0, True]
+    assert [type(columnar.values[i]) for i in columnar.arg_values[-3:]] == [int, float, bool]
+
+
+def test_views():
+    columnar = loads_columnar(doc)
+    top_level = list(columnar)
+    assert [node.name for node in top_level] == ["sample", "sample", "group", "empty"]
+
+    first = top_level[0]
+    assert isinstance(first, ColumnarNode)
+    assert first.properties == {"ts": 1, "value": 1.5, "unit": "ms"}
+    assert first["unit"] == "ms"
+    assert first.arguments == []
+    assert first.children == []
+    assert first.parent is None
+
+    group = top_level[2]
+    assert group.node_type == "tagged"
+    assert group.arguments == ["a", "b"]
+    assert group[1] == "b"
+    # The last value of a repeated property wins.
+    assert group.properties == {"key": False}
+    assert [child.name for child in group.children] == ["sample", "nested", "last"]
+    leaf = group.children[1].children[0]
+    assert leaf.name == "leaf"
+    assert leaf.arguments == [None]
+    assert leaf.parent == group.children[1]
+    assert leaf.parent.parent == group
+    assert columnar.node(5) == leaf
+    assert hash(columnar.node(5)) == hash(leaf)
+    assert repr(leaf) == "ColumnarNode(name='leaf', arguments=[None])"
+
+    with pytest.raises(IndexError):
+        columnar.node(8)
+    with pytest.raises(TypeError):
+        iter(leaf)
+
+
+def test_to_document_factories():
+    class CustomNode(Node):
+        pass
+
+    columnar = loads_columnar(doc)
+    converted = columnar.to_document(node_factory=CustomNode, node_list_factory=CustomNodeList)
+    group = converted.nodes[2]
+    assert isinstance(group, CustomNode)
+    assert isinstance(converted.nodes, CustomNodeList)
+    assert isinstance(group.children, CustomNodeList)
+    assert isinstance(group.children[0]._children, CustomNodeList)
+
+    plain = columnar.to_document()
+    assert plain.nodes[0]._arguments is None
+    assert plain.nodes[0]._children is None
+
+
+def test_empty_document():
+    columnar = loads_columnar("")
+    assert len(columnar) == 0
+    assert list(columnar) == []
+    assert KDLEncoder().encode_columnar(columnar) == ""
+    assert len(columnar.to_document().nodes) == 0
+
+
+def test_factories():
+    columnar = KDLDecoder(parse_int=lambda val_type, val, base: int(val, base) * 2).decode_columnar(
+        "node 1 2"
+    )
+    assert list(columnar)[0].arguments == [2, 4]
+
+
+def test_unhashable_values():
+    columnar = loads_columnar("node 1 1", parse_int=lambda val_type, val, base: [int(val, base)])
+    assert list(columnar)[0].arguments == [[1], [1]]
+    assert len(columnar.values) == 2
+
+
+def test_equal_values_kept_apart():
+    s = (
+        'node 0.0 -0.0 0.0 (decimal64)1.0 (decimal64)1.00 (date-time)"2021-01-01T12:00:00+02:00" '
+        '(date-time)"2021-01-01T10:00:00Z" 1 1.0 true "a" "a"'
+    )
+    columnar = loads_columnar(s)
+    assert dumps(columnar.to_document()) == dumps(loads(s))
+    args = list(columnar)[0].arguments
+    assert [str(arg) for arg in args[:5]] == ["0.0", "-0.0", "0.0", "1.0", "1.00"]
+    assert args[5].utcoffset() != args[6].utcoffset()
+    assert len(columnar.values) == 10
+
+
+def test_invalid_document():
+    with pytest.raises(KDLDecodeError):
+        loads_columnar("node {")
+
+
+def test_deep_document():
+    depth = 200
+    s = "node {\n" * depth + "}\n" * depth
+    columnar = loads_columnar(s)
+    assert len(columnar) == depth
+    assert KDLEncoder(indent="").encode_columnar(columnar).count("{") == depth - 1
+    assert len(columnar.to_document().nodes) == 1
@@ -0,0 +1,170 @@
+import marshal
+import os
+from pathlib import Path
+
+import pytest
+
+from cuddle import KDLDecodeError, Node, load, plain_str_parser
+from cuddle._compiled import _header, compiled_path
+
+
+fixtures_path = Path(__file__).parent
+
+
+def _copy_complex(tmp_path: Path) -> Path:
+    doc_file = tmp_path / "complex.kdl"
+    doc_file.write_text((fixtures_path / "complex.kdl").read_text(encoding="utf-8"))
+    return doc_file
+
+
+def _touch(doc_file: Path, content: str):
+    stat = doc_file.stat()
+    doc_file.write_text(content)
+    os.utime(doc_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+
+def test_compiled_next_to_source(tmp_path: Path):
+    doc_file = _copy_complex(tmp_path)
+    expected = repr(load(doc_file))
+
+    assert repr(load(doc_file, compiled_cache=True)) == expected
+    assert (tmp_path / "complex.kdlc").exists()
+    assert repr(load(doc_file, compiled_cache=True)) == expected
+
+
+def test_compiled_cache_directory(tmp_path: Path):
+    doc_file = _copy_complex(tmp_path)
+    cache_dir = tmp_path / "cache"
+    expected = repr(load(doc_file))
+
+    assert repr(load(doc_file, compiled_cache=cache_dir)) == expected
+    assert [path.suffix for path in cache_dir.iterdir()] == [".kdlc"]
+    assert repr(load(doc_file, compiled_cache=str(cache_dir))) == expected
+
+
+def test_compiled_paths(tmp_path: Path):
+    assert compiled_path("a/doc.kdl", True) == "a/doc.kdlc"
+    assert compiled_path("a/doc.txt", True) == "a/doc.txt.kdlc"
+    assert compiled_path("a/doc.kdl", tmp_path) != compiled_path("b/doc.kdl", tmp_path)
+
+
+def test_compiled_is_used(tmp_path: Path):
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1")
+    load(doc_file, compiled_cache=True)
+
+    # Replace the source without changing its size or modification time. Only the compiled
+    # file still knows about the old content.
+    stat = doc_file.stat()
+    doc_file.write_text("node 2")
+    os.utime(doc_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert load(doc_file, compiled_cache=True).nodes[0].arguments == [1]
+    assert load(doc_file).nodes[0].arguments == [2]
+
+
+def test_compiled_invalidated(tmp_path: Path):
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1")
+    load(doc_file, compiled_cache=True)
+
+    _touch(doc_file, "node 2 3")
+    assert load(doc_file, compiled_cache=True).nodes[0].arguments == [2, 3]
+    _touch(doc_file, "node 4 5")
+    assert load(doc_file, compiled_cache=True).nodes[0].arguments == [4, 5]
+
+
+def test_compiled_factories(tmp_path: Path):
+    class CustomNode(Node):
+        pass
+
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text('parent (date)"2021-10-03" {\n    child (u8)0xff\n}')
+    typed = load(doc_file, compiled_cache=True)
+
+    plain = load(doc_file, compiled_cache=True, parse_str=plain_str_parser, node_factory=CustomNode)
+    assert plain.nodes[0].arguments == ["2021-10-03"]
+    assert isinstance(plain.nodes[0], CustomNode)
+    assert isinstance(plain.nodes[0].children[0], CustomNode)
+    assert plain.nodes[0].children[0].arguments == [255]
+
+    assert repr(load(doc_file, compiled_cache=True)) == repr(typed)
+
+
+def test_compiled_corrupt(tmp_path: Path):
+    doc_file = _copy_complex(tmp_path)
+    load(doc_file, compiled_cache=True)
+
+    compiled_file = tmp_path / "complex.kdlc"
+    compiled_file.write_bytes(compiled_file.read_bytes()[:40])
+    assert repr(load(doc_file, compiled_cache=True)) == repr(load(doc_file))
+
+    compiled_file.write_bytes(b"KD")
+    assert repr(load(doc_file, compiled_cache=True)) == repr(load(doc_file))
+
+
+def test_compiled_other_interpreter(tmp_path: Path):
+    doc_file = _copy_complex(tmp_path)
+    load(doc_file, compiled_cache=True)
+
+    compiled_file = tmp_path / "complex.kdlc"
+    data = bytearray(compiled_file.read_bytes())
+    # The interpreter tag follows the magic, the format version and the marshal version.
+    data[12:44] = b"otherpython-99".ljust(32, b"\0")
+    compiled_file.write_bytes(bytes(data))
+    assert repr(load(doc_file, compiled_cache=True)) == repr(load(doc_file))
+    assert compiled_file.read_bytes()[12:44] != bytes(data[12:44])
+
+
+@pytest.mark.parametrize(
+    "payload",
+    (
+        {"not": "events"},
+        [("argument", 1)],
+        [("start_node", "node", None)],
+        [("end_node",)],
+        [("start_node", 1, None), ("end_node",)],
+        [("start_node", "node", None), ("property", "key", (None, "string")), ("end_node",)],
+        [("unknown",)],
+        [()],
+    ),
+)
+def test_compiled_wrong_shape(tmp_path: Path, payload):
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1")
+    load(doc_file, compiled_cache=True)
+
+    compiled_file = tmp_path / "doc.kdlc"
+    header = compiled_file.read_bytes()[: _header.size]
+    compiled_file.write_bytes(header + marshal.dumps(payload))
+    assert load(doc_file, compiled_cache=True).nodes[0].arguments == [1]
+
+
+def test_compiled_unsupported_arguments(tmp_path: Path):
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1\nother 2")
+
+    with open(doc_file) as f, pytest.raises(ValueError, match="needs a path"):
+        load(f, compiled_cache=True)
+    with pytest.raises(ValueError, match="select"):
+        load(doc_file, compiled_cache=True, select=["node"])
+    assert load(doc_file, compiled_cache=True, workers=2).nodes[1].arguments == [2]
+    assert (tmp_path / "doc.kdlc").exists()
+
+
+def test_compiled_invalid(tmp_path: Path):
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node {")
+
+    with pytest.raises(KDLDecodeError):
+        load(doc_file, compiled_cache=True)
+    assert not (tmp_path / "doc.kdlc").exists()
+
+
+def test_compiled_unwritable_location(tmp_path: Path):
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text("node 1")
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+
+    assert load(doc_file, compiled_cache=blocker / "cache").nodes[0].arguments == [1]
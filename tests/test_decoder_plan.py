@@ -0,0 +1,103 @@
+import pickle
+from typing import Any, Optional
+
+import pytest
+
+from cuddle import KDLDecodeError, KDLDecoder
+from cuddle.decoder import (
+    default_bool_parser,
+    default_float_parser,
+    default_int_parser,
+    default_null_parser,
+    default_str_parser,
+)
+
+
+doc = """
+node "string" r#"raw"# 1 1_000 -2 1.5 1e3 2E-2 0x1_f 0o17 0b101 true false null {
+    child key="value" other=3 (date)"2021-10-17"
+}
+"""
+
+
+def _wrapped_decoder() -> KDLDecoder:
+    # Factories that behave like the defaults but aren't, so the fast path isn't used.
+    def parse_null(val_type: Optional[str], val: str) -> Any:
+        return default_null_parser(val_type, val)
+
+    def parse_bool(val_type: Optional[str], val: str) -> Any:
+        return default_bool_parser(val_type, val)
+
+    def parse_int(val_type: Optional[str], val: str, base: int) -> Any:
+        return default_int_parser(val_type, val, base)
+
+    def parse_float(val_type: Optional[str], val: str) -> Any:
+        return default_float_parser(val_type, val)
+
+    def parse_str(val_type: Optional[str], val: str) -> Any:
+        return default_str_parser(val_type, val)
+
+    return KDLDecoder(
+        parse_null=parse_null,
+        parse_bool=parse_bool,
+        parse_int=parse_int,
+        parse_float=parse_float,
+        parse_str=parse_str,
+    )
+
+
+def test_plan_is_reused():
+    decoder = KDLDecoder()
+    plan = decoder._get_plan()
+    decoder.decode(doc)
+    decoder.decode(doc)
+    assert decoder._get_plan() is plan
+
+
+def test_plan_follows_settings():
+    decoder = KDLDecoder()
+    plan = decoder._get_plan()
+    assert decoder.decode("node 1").nodes[0].arguments == [1]
+
+    decoder.parse_int = lambda val_type, val, base: str(int(val, base))
+    assert decoder._get_plan() is not plan
+    assert decoder.decode("node 1").nodes[0].arguments == ["1"]
+
+
+def test_fast_path_matches_factories():
+    fast = KDLDecoder()
+    slow = _wrapped_decoder()
+    assert fast._get_plan().default_factories
+    assert not slow._get_plan().default_factories
+
+    fast_doc = fast.decode(doc)
+    slow_doc = slow.decode(doc)
+    assert repr(fast_doc) == repr(slow_doc)
+
+    args = fast_doc.nodes[0].arguments
+    assert args == ["string", "raw", 1, 1000, -2, 1.5, 1000.0, 0.02, 31, 15, 5, True, False, None]
+    assert [type(arg) for arg in args[2:7]] == [int, int, int, float, float]
+
+
+def test_fast_path_matches_iterparse():
+    decoder = KDLDecoder()
+    assert list(decoder.iterparse(doc)) == list(_wrapped_decoder().iterparse(doc))
+
+
+@pytest.mark.parametrize("factories", ("default", "wrapped"))
+def test_unknown_types(factories: str):
+    decoder = KDLDecoder() if factories == "default" else _wrapped_decoder()
+    with pytest.raises(KDLDecodeError, match="with type 'nope'"):
+        decoder.decode("node (nope)1")
+
+    decoder.ignore_unknown_types = True
+    assert decoder.decode("node (nope)1 (nope)0x10").nodes[0].arguments == [1, 16]
+
+
+def test_pickle():
+    decoder = KDLDecoder(ignore_unknown_types=True)
+    decoder.decode(doc)
+
+    clone = pickle.loads(pickle.dumps(decoder))
+    assert clone.ignore_unknown_types
+    assert repr(clone.decode(doc)) == repr(decoder.decode(doc))
@@ -0,0 +1,216 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from cuddle import FrozenDocument, FrozenNode, KDLDecoder, Node, NodeList, dumps, loads
+
+
+doc = """
+server "main" {
+    listen port=80 host="localhost"
+    listen port=443 host="localhost" tls=true
+    (path)root "/srv"
+}
+database {
+    pool size=10
+}
+logging level="info"
+"""
+
+
+class CustomNodeList(NodeList):
+    pass
+
+
+def test_round_trip():
+    original = loads(doc)
+    frozen = original.freeze()
+    assert isinstance(frozen, FrozenDocument)
+    assert frozen == FrozenDocument.from_document(original)
+    assert dumps(frozen.to_document()) == dumps(original)
+
+    server = frozen.nodes[0]
+    assert server.name == "server"
+    assert server.arguments == ("main",)
+    assert server.children[2].node_type == "path"
+    assert server.children[1]["tls"] is True
+    assert server.children[2][0] == "/srv"
+
+
+def test_lazy_values_are_decoded_when_frozen():
+    decoder = KDLDecoder(lazy=True)
+    frozen = decoder.decode('node (date)"2021-01-01" key=(date)"2021-01-02"').freeze()
+    assert frozen.nodes[0].arguments == (date(2021, 1, 1),)
+    assert frozen.nodes[0].properties == {"key": date(2021, 1, 2)}
+
+
+def test_to_document_factories():
+    thawed = loads(doc).freeze().to_document(node_list_factory=CustomNodeList)
+    assert isinstance(thawed.nodes, CustomNodeList)
+    assert isinstance(thawed.nodes[2].children, CustomNodeList)
+    # Thawed nodes can be changed without touching the frozen ones.
+    thawed.nodes[0].arguments.append("extra")
+    assert dumps(thawed) != dumps(loads(doc))
+
+
+def test_immutable():
+    frozen = loads(doc).freeze()
+    node = frozen.nodes[0]
+    with pytest.raises(AttributeError):
+        node.name = "other"
+    with pytest.raises(AttributeError):
+        del node.node_type
+    with pytest.raises(AttributeError):
+        frozen.nodes = ()
+    with pytest.raises(TypeError):
+        node.properties["key"] = 1  # type: ignore[index]
+    with pytest.raises(AttributeError):
+        node.children.append(node)  # type: ignore[attr-defined]
+    with pytest.raises(TypeError):
+        iter(node)
+
+
+def test_construction_checks():
+    with pytest.raises(TypeError):
+        FrozenNode("node", None, children=[Node("child", None)])  # type: ignore[list-item]
+    with pytest.raises(TypeError):
+        FrozenDocument([Node("node", None)])  # type: ignore[list-item]
+
+    properties = {"key": 1}
+    node = FrozenNode("node", None, properties=properties)
+    properties["key"] = 2
+    assert node["key"] == 1
+
+
+def test_set_in_shares_structure():
+    frozen = loads(doc).freeze()
+    listen = frozen.get_in(("server", 1))
+    changed = frozen.set_in(("server", 1), listen.with_property("port", 8443))
+
+    assert changed.get_in(["server", 1])["port"] == 8443
+    assert frozen.get_in(["server", 1])["port"] == 443
+    # Only the nodes along the path are new.
+    assert changed.nodes[0] is not frozen.nodes[0]
+    assert changed.nodes[0].children[0] is frozen.nodes[0].children[0]
+    assert changed.nodes[0].children[2] is frozen.nodes[0].children[2]
+    assert changed.nodes[1] is frozen.nodes[1]
+    assert changed.nodes[2] is frozen.nodes[2]
+
+
+def test_update_in():
+    frozen = loads(doc).freeze()
+    changed = frozen.update_in(("database", "pool"), lambda node: node.without_property("size"))
+    assert changed.get_in(("database", "pool")).properties == {}
+    assert frozen.get_in(("database", "pool")).properties == {"size": 10}
+    assert changed.nodes[0] is frozen.nodes[0]
+
+
+def test_with_node_and_without_node():
+    frozen = loads(doc).freeze()
+    extra = FrozenNode("cache", None, arguments=["redis"])
+
+    changed = frozen.with_node(extra)
+    assert changed.nodes[-1] is extra
+    assert len(frozen) == 3
+
+    nested = frozen.with_node(extra, parent=("database",))
+    assert nested.get_in(("database", "cache")) is extra
+    assert nested.nodes[0] is frozen.nodes[0]
+
+    removed = frozen.without_node(("server", -1))
+    assert [node.name for node in removed.nodes[0].children] == ["listen", "listen"]
+    assert len(frozen.nodes[0].children) == 3
+
+
+def test_paths():
+    frozen = loads(doc).freeze()
+    assert frozen.get_in((2,)).name == "logging"
+    assert frozen.get_in(("server", "listen"))["port"] == 80
+    with pytest.raises(KeyError):
+        frozen.get_in(("server", "missing"))
+    with pytest.raises(IndexError):
+        frozen.get_in((0, 5))
+    with pytest.raises(ValueError):
+        frozen.get_in(())
+    with pytest.raises(TypeError):
+        frozen.get_in("server")
+    with pytest.raises(TypeError):
+        frozen.set_in(("server",), Node("server", None))  # type: ignore[arg-type]
+
+
+def test_name_lookups():
+    frozen = loads(doc).freeze()
+    assert [node.name for node in frozen.get_nodes_by_name("server")] == ["server"]
+    assert frozen.get_nodes_by_name("missing") == ()
+    listens = frozen.nodes[0].get_children_by_name("listen")
+    assert [node["port"] for node in listens] == [80, 443]
+    # The lookups are kept with the node.
+    assert frozen.nodes[0].get_children_by_name("listen") is listens
+
+
+def test_hash_and_equality():
+    first = loads(doc).freeze()
+    second = loads(doc).freeze()
+    assert first == second
+    assert hash(first) == hash(second)
+    assert hash(first.nodes[0]) == hash(second.nodes[0])
+    assert len({first, second}) == 1
+
+    changed = first.update_in(("logging",), lambda node: node.with_property("level", "debug"))
+    assert changed != first
+    assert hash(changed) != hash(first)
+    assert first.nodes[0] != "server"
+
+
+def test_equal_values_of_different_classes():
+    first = loads("n 1.0 k=0").freeze()
+    second = loads("n 1 k=false").freeze()
+    assert first != second
+    assert first.nodes[0] != second.nodes[0]
+    assert hash(first) != hash(second)
+    assert len({first: 1, second: 2}) == 2
+    assert loads("n 1.0 k=0").freeze() == first
+
+
+def test_unhashable_values():
+    node = FrozenNode("node", None, arguments=[[1, 2]])
+    assert node == FrozenNode("node", None, arguments=[[1, 2]])
+    with pytest.raises(TypeError):
+        hash(node)
+
+
+def test_deep_documents():
+    depth = 5000
+    node = FrozenNode("leaf", None)
+    for _ in range(depth):
+        node = FrozenNode("level", None, children=[node])
+    frozen = FrozenDocument([node])
+    copy = frozen.set_in((0,), node.replace())
+
+    assert copy == frozen
+    assert hash(copy) == hash(frozen)
+    assert len(frozen.to_document().freeze().nodes) == 1
+
+
+def test_pickle():
+    frozen = loads(doc).freeze()
+    frozen.nodes[0].get_children_by_name("listen")
+    restored = pickle.loads(pickle.dumps(frozen))
+    assert restored == frozen
+    assert restored.nodes[0]._name_index is None
+
+
+def test_shared_between_threads():
+    frozen = loads(doc).freeze()
+
+    def bump(port: int) -> FrozenDocument:
+        return frozen.update_in(("server", 0), lambda node: node.with_property("port", port))
+
+    with ThreadPoolExecutor(4) as executor:
+        versions = list(executor.map(bump, range(100)))
+
+    assert [version.get_in(("server", 0))["port"] for version in versions] == list(range(100))
+    assert frozen.get_in(("server", 0))["port"] == 80
+    assert len({hash(version) for version in versions}) == 100
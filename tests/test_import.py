@@ -0,0 +1,60 @@
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+
+HEAVY_MODULES = (
+    "tatsu",
+    "regex",
+    "cuddle.grammar",
+    "cuddle._tatsu",
+    "concurrent.futures",
+    "pickle",
+    "tempfile",
+)
+
+
+def _import_times(code: str) -> Dict[str, int]:
+    # Runs the code in a fresh interpreter and returns the cumulative import time in
+    # microseconds of every module it imported.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_is_light():
+    modules = _import_times("import cuddle")
+
+    assert "cuddle" in modules
+    assert [module for module in HEAVY_MODULES if module in modules] == []
+
+
+def test_native_round_trip_is_light():
+    modules = _import_times(
+        "import cuddle; cuddle.dumps(cuddle.loads('node (date)\"2021-10-03\"'))"
+    )
+
+    assert [module for module in HEAVY_MODULES if module in modules] == []
+
+
+@pytest.mark.parametrize("module", ("cuddle.grammar", "tatsu"))
+def test_tatsu_engine_imported_on_demand(module: str):
+    assert module in _import_times("import cuddle; cuddle.loads('node 1', engine='tatsu')")
+
+
+def test_query_engine_imported_on_demand():
+    assert "cuddle.query" not in _import_times("import cuddle")
+    assert "cuddle.query" in _import_times("import cuddle; cuddle.compile_query('node')")
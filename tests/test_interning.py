@@ -0,0 +1,105 @@
+import sys
+
+import pytest
+
+from cuddle import KDLDecoder, iterparse, load, loads
+from cuddle._parser import InternTable
+
+
+doc = """
+(tagged)node key=(u8)1 {
+    child other=2
+}
+(tagged)node key=3 {
+    child other=4
+}
+"""
+
+
+def _identifiers(doc):
+    first, second = doc.nodes
+    return [
+        (first.name, second.name),
+        (first.node_type, second.node_type),
+        (next(iter(first.properties)), next(iter(second.properties))),
+        (first.children[0].name, second.children[0].name),
+        (next(iter(first.children[0].properties)), next(iter(second.children[0].properties))),
+    ]
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+@pytest.mark.parametrize("mode", (True, "sys"))
+def test_identifiers_are_shared(engine, mode):
+    for first, second in _identifiers(loads(doc, engine=engine, intern_identifiers=mode)):
+        assert first == second
+        assert first is second
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_interning_off(engine):
+    parsed = loads(doc, engine=engine, intern_identifiers=False)
+    assert all(first == second for first, second in _identifiers(parsed))
+    if engine == "native":
+        # The native engine slices each identifier out of the document.
+        assert all(first is not second for first, second in _identifiers(parsed))
+
+
+def test_sys_intern():
+    name = "".join(["sys", "-interned"])
+    parsed = loads(f"{name} {name}=1", intern_identifiers="sys")
+    assert parsed.nodes[0].name is sys.intern(name)
+
+
+def test_interning_with_other_decoders(tmp_path):
+    selected = loads(doc, select=["node/child"])
+    assert selected.nodes[0].name is selected.nodes[1].name
+
+    lazy = loads(doc, lazy=True)
+    assert lazy.nodes[0].name is lazy.nodes[1].name
+
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text(doc)
+    for _ in range(2):
+        compiled = load(doc_file, compiled_cache=True)
+        assert _identifiers(compiled)[0][0] is _identifiers(compiled)[0][1]
+
+    events = [event for event in iterparse(doc) if event[0] == "start_node"]
+    assert events[0][1] is events[2][1]
+
+
+def test_value_types_interned_from_compiled(tmp_path):
+    seen = []
+
+    def parse_str(val_type, val):
+        seen.append(val_type)
+        return val
+
+    doc_file = tmp_path / "typed.kdl"
+    doc_file.write_text('a (my-type)"x" key=(my-type)"y"\nb (my-type)"z"\n')
+    for _ in range(2):
+        seen.clear()
+        load(doc_file, compiled_cache=True, parse_str=parse_str)
+        assert seen == ["my-type"] * 3
+        assert seen[0] is seen[1] is seen[2]
+
+
+def test_table_is_shared_between_decodes():
+    decoder = KDLDecoder()
+    first = decoder.decode("some-node")
+    second = decoder.decode("some-node")
+    assert first.nodes[0].name is second.nodes[0].name
+
+
+def test_table_is_bounded(monkeypatch):
+    monkeypatch.setattr("cuddle._parser.max_interned", 3)
+    table = InternTable()
+    for ident in ("a", "b", "c"):
+        assert table[ident] == ident
+    assert len(table) == 3
+    assert table["d"] == "d"
+    assert list(table) == ["d"]
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError, match=r"^Unknown identifier interning mode 'yes'\.$"):
+        KDLDecoder(intern_identifiers="yes")  # type: ignore[arg-type]
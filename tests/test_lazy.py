@@ -0,0 +1,154 @@
+import copy
+import pickle
+from datetime import date
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from cuddle import (
+    KDLDecodeError,
+    KDLDecoder,
+    LazyArguments,
+    LazyProperties,
+    LazyValue,
+    ParseCache,
+    ParserEngine,
+    default_str_parser,
+    dumpb,
+    dumps,
+    load,
+    loads,
+)
+
+
+doc = """
+node "plain" 1 (date)"2021-10-17" id=(uuid)"6f1a1c2e-7a2b-4c55-9b0e-8a1c9d9e7f10" n=2.5 {
+    child (u8)0x1f "esc\\taped"
+}
+"""
+
+
+def _counting_str_parser(calls):
+    def parse_str(val_type, val):
+        calls.append(val)
+        return default_str_parser(val_type, val)
+
+    return parse_str
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_lazy_matches_eager(engine: ParserEngine):
+    lazy = loads(doc, lazy=True, engine=engine)
+    eager = loads(doc, engine=engine)
+
+    node = lazy.nodes[0]
+    assert isinstance(node.arguments, LazyArguments)
+    assert isinstance(node.properties, LazyProperties)
+    assert repr(lazy) == repr(eager)
+    assert node.arguments == eager.nodes[0].arguments
+    assert node.properties == eager.nodes[0].properties
+    assert node.children[0].arguments == [31, "esc\taped"]
+    assert dumps(lazy) == dumps(eager)
+
+
+def test_values_decoded_on_access():
+    calls: list = []
+    lazy = loads(doc, lazy=True, parse_str=_counting_str_parser(calls))
+    assert calls == []
+
+    node = lazy.nodes[0]
+    assert node.arguments[2] == date(2021, 10, 17)
+    assert calls == ["2021-10-17"]
+
+    # Decoded values are kept.
+    assert node.arguments[2] is node.arguments[2]
+    assert calls == ["2021-10-17"]
+
+    assert node["id"] == UUID("6f1a1c2e-7a2b-4c55-9b0e-8a1c9d9e7f10")
+    assert node.arguments[:2] == ["plain", 1]
+    assert calls == ["2021-10-17", "6f1a1c2e-7a2b-4c55-9b0e-8a1c9d9e7f10", "plain"]
+
+
+def test_untyped_values_decoded_eagerly():
+    # With the default factories, untyped values aren't worth deferring.
+    node = loads('node 1 (date)"2021-10-17" key="value"', lazy=True).nodes[0]
+    args, props = node.arguments, node.properties
+    assert isinstance(args, LazyArguments) and isinstance(props, LazyProperties)
+    assert args._items[0] == 1
+    assert isinstance(args._items[1], LazyValue)
+    assert props._items["key"] == "value"
+
+
+def test_decode_errors_deferred():
+    node = loads("node 1 (nope)2", lazy=True).nodes[0]
+    assert node.arguments[0] == 1
+    with pytest.raises(KDLDecodeError, match="with type 'nope'"):
+        node.arguments[1]
+
+
+def test_lazy_mutation():
+    node = loads("node (u8)1 (u8)2 a=(u8)3", lazy=True).nodes[0]
+    node.arguments.append(4)
+    node.arguments[0] = 0
+    del node.arguments[1]
+    node.properties["b"] = 5
+    assert node.arguments == [0, 4]
+    assert node.properties == {"a": 3, "b": 5}
+    assert list(node.properties) == ["a", "b"]
+    assert "a" in node.properties
+
+
+def test_lazy_pickles_are_plain():
+    node = loads(doc, lazy=True).nodes[0]
+    clone = pickle.loads(pickle.dumps(node))
+    assert type(clone.arguments) is list
+    assert type(clone.properties) is dict
+    assert clone.arguments == node.arguments
+    assert clone.properties == node.properties
+
+
+@pytest.mark.parametrize("clone", (copy.copy, copy.deepcopy))
+def test_lazy_copies_stay_lazy(clone):
+    node = loads("node 1 (nope)2 a=(nope)3", lazy=True).nodes[0]
+    args = clone(node.arguments)
+    props = clone(node.properties)
+    assert isinstance(args, LazyArguments) and isinstance(props, LazyProperties)
+    assert args[0] == 1
+    with pytest.raises(KDLDecodeError):
+        args[1]
+    with pytest.raises(KDLDecodeError):
+        props["a"]
+
+
+@pytest.mark.parametrize("copy_mode", (True, False))
+def test_lazy_with_cache(copy_mode):
+    cache = ParseCache(copy=copy_mode)
+    for _ in range(2):
+        node = loads('n (uuid)"bad" 1', lazy=True, cache=cache).nodes[0]
+        assert isinstance(node.arguments, LazyArguments)
+        assert node.arguments[1] == 1
+        with pytest.raises(ValueError, match="badly formed"):
+            node.arguments[0]
+    assert cache.stats.hits == 1
+
+
+def test_lazy_binary_and_compiled(tmp_path: Path):
+    eager = loads(doc)
+    assert repr(KDLDecoder(lazy=True).decode_binary(dumpb(eager))) == repr(eager)
+
+    path = tmp_path / "doc.kdl"
+    path.write_text(doc, encoding="utf-8")
+    for _ in range(2):
+        compiled = load(path, lazy=True, compiled_cache=True)
+        assert isinstance(compiled.nodes[0].arguments, LazyArguments)
+        assert repr(compiled) == repr(eager)
+
+
+def test_lazy_select_and_iterparse():
+    selected = loads(doc, lazy=True, select=["node/child"])
+    assert isinstance(selected.nodes[0].arguments, LazyArguments)
+    assert selected.nodes[0].arguments == [31, "esc\taped"]
+
+    decoder = KDLDecoder(lazy=True)
+    assert list(decoder.iterparse(doc)) == list(KDLDecoder().iterparse(doc))
@@ -0,0 +1,114 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from cuddle import KDLDecodeError
+from cuddle.lexer import Token, tokenize
+
+
+fixtures_path = Path(__file__).parent
+FIXTURES_DIR = fixtures_path / "upstream_fixtures"
+VALID_INPUT_FIXTURES = sorted(
+    FIXTURES_DIR / "input" / output_file.name
+    for output_file in (FIXTURES_DIR / "expected_kdl").glob("*.kdl")
+)
+
+
+def _kinds(s: str):
+    return [(token.kind, token.text) for token in tokenize(s)]
+
+
+def test_tokenize_node():
+    assert _kinds('(t)node r#"x"# -1.5e3 true key="a\\"b"\n') == [
+        ("open_paren", "("),
+        ("identifier", "t"),
+        ("close_paren", ")"),
+        ("identifier", "node"),
+        ("ws", " "),
+        ("raw_string", 'r#"x"#'),
+        ("ws", " "),
+        ("decimal", "-1.5e3"),
+        ("ws", " "),
+        ("keyword", "true"),
+        ("ws", " "),
+        ("identifier", "key"),
+        ("equals", "="),
+        ("string", '"a\\"b"'),
+        ("newline", "\n"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("s", "kind"),
+    (
+        ("0x1f_ff", "hex"),
+        ("-0o17", "octal"),
+        ("+0b1_01", "binary"),
+        ("12_3.4_5E-6", "decimal"),
+        ("null", "keyword"),
+        ("r", "identifier"),
+        ("r#x", "identifier"),
+        ('r##"a"#b"##', "raw_string"),
+        ("/* a /* b */ c */", "block_comment"),
+        ("// comment", "line_comment"),
+        ("\\ // comment\n", "escline"),
+        ("\\ /* ws */ \r\n", "escline"),
+        ("/-", "slashdash"),
+        ("\r\n", "newline"),
+        ("\t\u3000", "ws"),
+        ("{", "open_brace"),
+        ("}", "close_brace"),
+        (";", "semicolon"),
+    ),
+)
+def test_tokenize_single(s: str, kind: str):
+    assert list(tokenize(s)) == [Token(kind, s, 0)]
+
+
+def test_token_offsets():
+    s = "a 1;\nb"
+    tokens = list(tokenize(s))
+    assert [(token.start, token.end) for token in tokens] == [
+        (0, 1),
+        (1, 2),
+        (2, 3),
+        (3, 4),
+        (4, 5),
+        (5, 6),
+    ]
+    for token in tokens:
+        assert s[token.start : token.end] == token.text
+
+
+@pytest.mark.parametrize("input_file", VALID_INPUT_FIXTURES, ids=lambda input_file: input_file.stem)
+def test_tokens_cover_source(input_file: Path):
+    s = input_file.read_text(encoding="utf-8")
+    assert "".join(token.text for token in tokenize(s)) == s
+
+
+@pytest.mark.parametrize(
+    ("s", "errmsg"),
+    (
+        ("node [", "Unexpected character '[' at offset 5."),
+        ('node "unterminated', "Unexpected character '\"' at offset 5."),
+        ('node r#"unterminated"', "Failed to tokenize the document at offset 5."),
+        ("node /* unterminated", "Failed to tokenize the document at offset 5."),
+        ("node \\ 1", "Failed to tokenize the document at offset 5."),
+    ),
+)
+def test_tokenize_errors(s: str, errmsg: str):
+    with pytest.raises(KDLDecodeError, match="^" + re.escape(errmsg) + "$"):
+        list(tokenize(s))
+
+
+def test_tokenize_repeated_document():
+    base = (fixtures_path / "complex.kdl").read_text(encoding="utf-8")
+    tokens = list(tokenize(base))
+    repeated = list(tokenize(base * 4))
+
+    assert len(repeated) == len(tokens) * 4
+    assert [(token.kind, token.text) for token in repeated] == [
+        (token.kind, token.text) for token in tokens
+    ] * 4
+    assert repeated[-1].end == len(base) * 4
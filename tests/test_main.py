@@ -1,6 +1,20 @@
+import re
 from io import StringIO
 
-from cuddle import Document, KDLDecoder, KDLEncoder, Node, NodeList, dump, dumps, load, loads
+import pytest
+
+from cuddle import (
+    Document,
+    KDLDecoder,
+    KDLEncoder,
+    Node,
+    NodeList,
+    ParserEngine,
+    dump,
+    dumps,
+    load,
+    loads,
+)
 
 
 def test_loads_bytes():
@@ -17,6 +31,35 @@ def test_loads_bytes():
     assert node.properties["key"] == "value"
 
 
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_loads_engine(engine: ParserEngine):
+    doc = loads('parent 1 /- 2 key=r#"value"# {\n    child (u8)0xff\n}', engine=engine)
+
+    assert len(doc.nodes) == 1
+    node = doc.nodes[0]
+    assert node.arguments == [1]
+    assert node.properties == {"key": "value"}
+    assert len(node.children) == 1
+    assert node.children[0].name == "child"
+    assert node.children[0].arguments == [255]
+
+
+def test_decoder_unknown_engine():
+    errmsg = "^" + re.escape("Unknown parser engine 'yacc'.") + "$"
+    with pytest.raises(ValueError, match=errmsg):
+        KDLDecoder(engine="yacc")  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("buffer_type", (bytearray, memoryview))
+def test_loads_buffer(buffer_type):
+    doc = loads(buffer_type('node "ノード" key=1'.encode("utf-8")))
+
+    assert len(doc.nodes) == 1
+    node = doc.nodes[0]
+    assert node.arguments == ["ノード"]
+    assert node.properties == {"key": 1}
+
+
 class CustomKDLDecoder(KDLDecoder):
     pass
 
@@ -0,0 +1,151 @@
+import copy
+import pickle
+
+import pytest
+
+from cuddle import Node, NodeList, loads
+
+
+def _names(nodes):
+    return [(node.name, node.arguments) for node in nodes]
+
+
+def _nodes(*names):
+    return NodeList([Node(name, None, arguments=[i]) for i, name in enumerate(names)])
+
+
+def test_lookup_by_name():
+    nodes = _nodes("a", "b", "a", "c", "a")
+    assert _names(nodes.get_nodes_by_name("a")) == [("a", [0]), ("a", [2]), ("a", [4])]
+    assert _names(nodes.get_nodes_by_name("missing")) == []
+    assert nodes.first_by_name("c").arguments == [3]
+    assert nodes.first_by_name("missing") is None
+    assert nodes.count_by_name("a") == 3
+    assert nodes.count_by_name("missing") == 0
+    assert nodes.names() == ["a", "b", "c"]
+
+
+def test_lookup_in_document():
+    doc = loads('package "cuddle" { dependency "tatsu"; dependency "regex"; }')
+    package = doc.nodes.first_by_name("package")
+    assert package is not None
+    assert package.children.count_by_name("dependency") == 2
+
+
+def test_mutations_update_index():
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("a") == 1
+
+    nodes.append(Node("a", None, arguments=[2]))
+    nodes.extend([Node("c", None, arguments=[3]), Node("a", None, arguments=[4])])
+    assert _names(nodes.get_nodes_by_name("a")) == [("a", [0]), ("a", [2]), ("a", [4])]
+    assert nodes.names() == ["a", "b", "c"]
+
+    nodes.insert(0, Node("c", None, arguments=[-1]))
+    assert _names(nodes.get_nodes_by_name("c")) == [("c", [-1]), ("c", [3])]
+    assert nodes.names() == ["c", "a", "b"]
+
+    nodes.remove(nodes.first_by_name("c"))
+    assert nodes.first_by_name("c").arguments == [3]
+
+    nodes[1] = Node("c", None, arguments=[5])
+    assert _names(nodes.get_nodes_by_name("c")) == [("c", [5]), ("c", [3])]
+    assert nodes.names() == ["a", "c"]
+    assert nodes.count_by_name("b") == 0
+
+    nodes[-1] = Node("d", None, arguments=[6])
+    assert nodes.names() == ["a", "c", "d"]
+    assert _names(nodes.get_nodes_by_name("a")) == [("a", [0]), ("a", [2])]
+
+    nodes[0:2] = [Node("e", None)]
+    assert nodes.names() == ["e", "a", "c", "d"]
+
+
+def test_set_item_out_of_range():
+    nodes = _nodes("a")
+    assert nodes.count_by_name("a") == 1
+    with pytest.raises(IndexError):
+        nodes[1] = Node("b", None)
+    assert nodes.names() == ["a"]
+
+
+def test_direct_append_rebuilds_index():
+    nodes = _nodes("a")
+    assert nodes.count_by_name("a") == 1
+    nodes.nodes.append(Node("a", None))
+    assert nodes.count_by_name("a") == 2
+
+
+def test_assigning_nodes_rebuilds_index():
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("a") == 1
+    nodes.nodes = [Node("x", None), Node("y", None)]
+    assert _names(nodes.get_nodes_by_name("a")) == []
+    assert nodes.first_by_name("x") is nodes.nodes[0]
+    assert nodes.names() == ["x", "y"]
+
+
+def test_direct_replacement_rebuilds_index():
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("a") == 1
+    nodes.nodes[0] = Node("c", None)
+    assert nodes.first_by_name("a") is None
+    assert nodes.count_by_name("c") == 1
+
+    nodes = _nodes("a", "b")
+    assert nodes.names() == ["a", "b"]
+    nodes.nodes[1] = Node("c", None)
+    assert nodes.names() == ["a", "c"]
+
+
+def test_renaming_rebuilds_index():
+    nodes = _nodes("a", "b", "a")
+    assert nodes.count_by_name("a") == 2
+    nodes.nodes[0].name = "b"
+    assert _names(nodes.get_nodes_by_name("a")) == [("a", [2])]
+    assert _names(nodes.get_nodes_by_name("b")) == [("b", [0]), ("b", [1])]
+
+
+def test_renaming_to_name_rebuilds_index():
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("a") == 1
+    nodes.nodes[1].name = "a"
+    assert nodes.count_by_name("a") == 2
+    assert nodes.names() == ["a"]
+
+
+def test_replacing_with_name_rebuilds_index():
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("a") == 1
+    nodes.nodes[1] = Node("a", None)
+    assert nodes.count_by_name("a") == 2
+
+
+def test_direct_changes_keeping_length_rebuild_index():
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("c") == 0
+    nodes.nodes.pop()
+    nodes.nodes.append(Node("c", None))
+    assert nodes.count_by_name("c") == 1
+    assert nodes.count_by_name("b") == 0
+
+    nodes.nodes.reverse()
+    assert nodes.first_by_name("c") is nodes.nodes[0]
+
+
+def test_query_sees_direct_changes():
+    doc = loads("a { b 1; c 2; }")
+    assert len(doc.query("top() > a > b")) == 1
+    doc.nodes[0].children.nodes[1].name = "b"
+    assert len(doc.query("top() > a > b")) == 2
+
+
+@pytest.mark.parametrize(
+    "clone", (copy.copy, copy.deepcopy, lambda x: pickle.loads(pickle.dumps(x)))
+)
+def test_copies_leave_out_index(clone):
+    nodes = _nodes("a", "b")
+    assert nodes.count_by_name("a") == 1
+    cloned = clone(nodes)
+    assert cloned._index is None
+    assert cloned.count_by_name("a") == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from cuddle import KDLDecodeError, ParserEngine, loads
+
+
+engines = ("native", "tatsu")
+
+
+@pytest.mark.parametrize("engine", engines)
+@pytest.mark.parametrize(
+    ("s", "expected"),
+    (
+        ("0", 0),
+        ("-12", -12),
+        ("+12", 12),
+        ("1_000__000_", 1000000),
+        ("007", 7),
+        ("1.5", 1.5),
+        ("-1_0.2_5", -10.25),
+        ("1e3", 1000.0),
+        ("1.5E-2", 0.015),
+        ("2e+1_0", 2e10),
+        ("0x1f", 31),
+        ("-0xAB_cd", -0xABCD),
+        ("0o17", 15),
+        ("+0o1_7", 15),
+        ("0b101", 5),
+        ("-0b1_0", -2),
+    ),
+)
+def test_numbers(engine: ParserEngine, s: str, expected: object):
+    node = loads(f"node {s} key={s}", engine=engine).nodes[0]
+    assert node.arguments == [expected]
+    assert node.properties == {"key": expected}
+    assert type(node.arguments[0]) is type(expected)
+
+
+@pytest.mark.parametrize("engine", engines)
+@pytest.mark.parametrize(
+    "s",
+    (
+        "0x",
+        "0xg",
+        "0o8",
+        "0b2",
+        "1.",
+        "1.e5",
+        "1e",
+        "_1",
+        "1a",
+        "--1",
+    ),
+)
+def test_invalid_numbers(engine: ParserEngine, s: str):
+    with pytest.raises(KDLDecodeError):
+        loads(f"node {s}", engine=engine)
+
+
+@pytest.mark.parametrize("engine", engines)
+def test_typed_numbers(engine: ParserEngine):
+    def parse_int(val_type, val, base):
+        return (val_type, val, base)
+
+    node = loads("node 1_0 (u8)0x1_f (i32)-0o17 0b1", engine=engine, parse_int=parse_int).nodes[0]
+    assert node.arguments == [(None, "10", 10), ("u8", "1f", 16), ("i32", "-17", 8), (None, "1", 2)]
@@ -0,0 +1,101 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from cuddle import KDLDecodeError, KDLDecoder, Node, load, loads
+from cuddle._parser import split_complete_chunks
+
+
+fixtures_path = Path(__file__).parent
+FIXTURES_DIR = fixtures_path / "upstream_fixtures"
+VALID_INPUT_FIXTURES = sorted(
+    FIXTURES_DIR / "input" / output_file.name
+    for output_file in (FIXTURES_DIR / "expected_kdl").glob("*.kdl")
+)
+
+TRICKY_DOC = """\
+first 1; second "a;b\\n}" r##"raw "# }
+{"## {
+    /* { */ child // }
+}
+/- skipped 1 \\
+    2 {
+    nested { deeper; }
+}
+kept /- 3 4 \\ // comment
+    5
+/* multi-line
+   comment */ after
+"""
+
+
+@pytest.mark.parametrize("input_file", VALID_INPUT_FIXTURES, ids=lambda input_file: input_file.stem)
+def test_split_matches_whole_document(input_file: Path):
+    s = input_file.read_text(encoding="utf-8")
+    decoder = KDLDecoder(ignore_unknown_types=True)
+
+    nodes: List[Node] = []
+    for chunk in split_complete_chunks(s, 1):
+        nodes.extend(decoder.decode(chunk))
+
+    assert repr(nodes) == repr(decoder.decode(s).nodes)
+
+
+def test_split_min_size():
+    s = "a\nb\nccc\nd\n"
+
+    assert split_complete_chunks(s, 1) == ["a\n", "b\n", "ccc\n", "d\n"]
+    assert split_complete_chunks(s, 3) == ["a\nb\n", "ccc\n", "d\n"]
+    assert split_complete_chunks(s, 100) == [s]
+
+
+def test_split_tricky():
+    chunks = split_complete_chunks(TRICKY_DOC, 1)
+
+    assert "".join(chunks) == TRICKY_DOC
+    assert [chunk.split()[0] for chunk in chunks] == [
+        "first",
+        "second",
+        "/-",
+        "kept",
+        "/*",
+    ]
+
+
+@pytest.mark.parametrize("min_chunk_size", (1, 64))
+def test_decode_parallel(min_chunk_size: int):
+    s = (fixtures_path / "complex.kdl").read_text(encoding="utf-8") + TRICKY_DOC * 20
+    decoder = KDLDecoder()
+
+    doc = decoder.decode_parallel(s, workers=2, min_chunk_size=min_chunk_size)
+
+    assert repr(doc) == repr(decoder.decode(s))
+
+
+def test_decode_parallel_invalid():
+    s = "valid\n" * 100 + "invalid {\n" + "valid\n" * 100
+
+    with pytest.raises(KDLDecodeError):
+        KDLDecoder().decode_parallel(s, workers=2, min_chunk_size=16)
+
+
+@pytest.mark.parametrize(
+    "invalid",
+    ("invalid \\ /* unterminated\n", "invalid \\ /* closed */ /* unterminated\n"),
+)
+def test_decode_parallel_unterminated_escline_comment(invalid: str):
+    s = "valid\n" * 100 + invalid + "valid\n" * 100
+
+    with pytest.raises(KDLDecodeError):
+        KDLDecoder().decode_parallel(s, workers=2, min_chunk_size=16)
+    with pytest.raises(KDLDecodeError):
+        loads(s, workers=2)
+
+
+def test_loads_workers():
+    complex_file = fixtures_path / "complex.kdl"
+    s = complex_file.read_text(encoding="utf-8") * 1000
+
+    assert repr(loads(s, workers=2)) == repr(loads(s))
+    assert repr(load(complex_file, workers=None)) == repr(load(complex_file))
@@ -0,0 +1,161 @@
+import pickle
+
+import pytest
+
+from cuddle import Document, Node, NodeList, PropertyIndex, loads
+
+
+doc_text = """
+service name="api" port=8080 {
+    user id=1 admin=true
+    user id=2 admin=false
+}
+service name="web" port=80 {
+    user id=1 { user id=3; }
+}
+user id=1
+"""
+
+
+def _ids(nodes):
+    return [(node.name, node.properties.get("id")) for node in nodes]
+
+
+@pytest.fixture
+def doc():
+    return loads(doc_text)
+
+
+@pytest.mark.parametrize("indexed", (False, True))
+def test_find_nodes(doc: Document, indexed: bool):
+    if indexed:
+        doc.build_index(["name", "id", "admin"])
+
+    assert [node.properties["port"] for node in doc.find_nodes("service", "name", "web")] == [80]
+    assert _ids(doc.find_nodes("user", "id", 1)) == [("user", 1), ("user", 1), ("user", 1)]
+    assert _ids(doc.find_nodes("user", "id", 3)) == [("user", 3)]
+    assert doc.find_nodes("user", "id", 4) == []
+    assert doc.find_nodes("service", "id", 1) == []
+    # true and false aren't 1 and 0.
+    assert _ids(doc.find_nodes("user", "admin", True)) == [("user", 1)]
+    assert doc.find_nodes("user", "id", True) == []
+
+
+def test_index_depth(doc: Document):
+    index = doc.build_index(["id"], depth=2)
+    assert len(index) == 6
+    assert _ids(doc.find_nodes("user", "id", 1)) == [("user", 1), ("user", 1), ("user", 1)]
+    assert doc.find_nodes("user", "id", 3) == []
+
+    with pytest.raises(ValueError, match=r"^The index depth must be at least 1\.$"):
+        doc.build_index(["id"], depth=0)
+
+
+def test_index_keys(doc: Document):
+    index = doc.build_index(["id"])
+    assert index.keys == frozenset({"id"})
+    with pytest.raises(KeyError, match="'name'"):
+        index.find("service", "name", "api")
+    # Lookups on other keys walk the document.
+    assert len(doc.find_nodes("service", "name", "api")) == 1
+
+    with pytest.raises(TypeError):
+        doc.build_index("id")
+
+
+def test_unhashable_values():
+    doc = Document(
+        NodeList(
+            [
+                Node("a", None, properties={"tags": ["x", "y"]}),
+                Node("a", None, properties={"tags": ["z"]}),
+                Node("a", None, properties={"tags": "x"}),
+            ]
+        )
+    )
+    doc.build_index(["tags"])
+    assert [node.properties["tags"] for node in doc.find_nodes("a", "tags", ["z"])] == [["z"]]
+    assert [node.properties["tags"] for node in doc.find_nodes("a", "tags", "x")] == ["x"]
+
+    doc.set_property(doc.nodes[0], "tags", "x")
+    assert len(doc.find_nodes("a", "tags", "x")) == 2
+    assert doc.find_nodes("a", "tags", ["x", "y"]) == []
+
+
+def test_mutations_update_index(doc: Document):
+    doc.build_index(["id"], depth=2)
+    api = doc.find_nodes("service", "name", "api")[0]
+
+    doc.add_node(Node("user", None, properties={"id": 4}), parent=api)
+    assert _ids(doc.find_nodes("user", "id", 4)) == [("user", 4)]
+
+    added = Node(
+        "user", None, properties={"id": 5}, children=[Node("user", None, properties={"id": 6})]
+    )
+    doc.add_node(added)
+    assert _ids(doc.find_nodes("user", "id", 5)) == [("user", 5)]
+    assert _ids(doc.find_nodes("user", "id", 6)) == [("user", 6)]
+
+    # Nodes added below the indexed levels stay out of the index.
+    doc.add_node(
+        Node("user", None, properties={"id": 7}), parent=doc.find_nodes("user", "id", 6)[0]
+    )
+    assert doc.find_nodes("user", "id", 7) == []
+
+    doc.set_property(added, "id", 8)
+    assert doc.find_nodes("user", "id", 5) == []
+    assert doc.find_nodes("user", "id", 8) == [added]
+
+    doc.delete_property(added, "id")
+    assert doc.find_nodes("user", "id", 8) == []
+    assert "id" not in added.properties
+
+    doc.set_property(added, "id", 9)
+    assert doc.find_nodes("user", "id", 9) == [added]
+
+    doc.remove_node(added)
+    assert doc.find_nodes("user", "id", 9) == []
+    assert doc.find_nodes("user", "id", 6) == []
+    assert added not in doc.nodes.nodes
+
+    doc.remove_node(api.children[0], parent=api)
+    assert _ids(doc.find_nodes("user", "id", 1)) == [("user", 1), ("user", 1)]
+
+
+def test_invalidate_index(doc: Document):
+    index = doc.build_index(["id"])
+    node = doc.find_nodes("user", "id", 3)[0]
+
+    node.properties["id"] = 10
+    assert doc.find_nodes("user", "id", 10) == []
+    doc.invalidate_index()
+    assert doc.find_nodes("user", "id", 10) == [node]
+
+    # A change the index missed is noticed when it's next updated.
+    node.properties["id"] = 11
+    doc.set_property(node, "id", 12)
+    assert doc.find_nodes("user", "id", 12) == [node]
+    assert index.find("user", "id", 10) == []
+
+    doc.drop_index()
+    node.properties["id"] = 13
+    assert doc.find_nodes("user", "id", 13) == [node]
+
+
+def test_index_is_not_pickled(doc: Document):
+    doc.build_index(["id"])
+    unpickled = pickle.loads(pickle.dumps(doc))
+    assert "_property_index" not in unpickled.__dict__
+    assert len(unpickled.find_nodes("user", "id", 1)) == 3
+
+
+def test_deep_document():
+    node = Node("leaf", None, properties={"id": 1})
+    for _ in range(5000):
+        node = Node("branch", None, children=[node])
+    doc = Document(NodeList([node]))
+
+    assert len(doc.find_nodes("leaf", "id", 1)) == 1
+    index = doc.build_index(["id"])
+    assert isinstance(index, PropertyIndex)
+    assert len(doc.find_nodes("leaf", "id", 1)) == 1
@@ -0,0 +1,251 @@
+import sys
+
+import pytest
+
+from cuddle import Document, KQLSyntaxError, Node, NodeList, Query, compile_query, loads
+
+
+DOC = """
+package "cuddle" version="1.0.6" {
+    dependency "tatsu" optional=false
+    (dev)dependency "pytest" optional=true
+    dependency "regex" optional=true
+    maintainers { person "ashe"; }
+}
+dependency "top-level" 3
+script "build" {
+    step "lint" 1
+    step "test" 2
+    (manual)step "release" 3
+}
+"""
+doc = loads(DOC)
+
+
+def _names(nodes):
+    return [(node.name, node.arguments) for node in nodes]
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    (
+        (
+            "dependency",
+            [
+                ("dependency", ["tatsu"]),
+                ("dependency", ["pytest"]),
+                ("dependency", ["regex"]),
+                ("dependency", ["top-level", 3]),
+            ],
+        ),
+        ("package > person", []),
+        ("package >> person", [("person", ["ashe"])]),
+        ("package > maintainers > person", [("person", ["ashe"])]),
+        (
+            "top()",
+            [("package", ["cuddle"]), ("dependency", ["top-level", 3]), ("script", ["build"])],
+        ),
+        ("top() > dependency", [("dependency", ["top-level", 3])]),
+        ("top() >> person", [("person", ["ashe"])]),
+        ("step + step", [("step", ["test", 2]), ("step", ["release", 3])]),
+        ('step[val() = "lint"] + step', [("step", ["test", 2])]),
+        ('step[val() = "lint"] ~ step', [("step", ["test", 2]), ("step", ["release", 3])]),
+        ("dependency ~ maintainers", [("maintainers", [])]),
+        ("maintainers ~ dependency", []),
+        ("script || person", [("person", ["ashe"]), ("script", ["build"])]),
+        ("(dev)", [("dependency", ["pytest"])]),
+        ("(manual)step", [("step", ["release", 3])]),
+        ("()", [("dependency", ["pytest"]), ("step", ["release", 3])]),
+        ("[tag() = (dev)]", [("dependency", ["pytest"])]),
+        ("[tag() != (dev)]", [("step", ["release", 3])]),
+        ("package[version]", [("package", ["cuddle"])]),
+        ('package[prop(version) = "1.0.6"]', [("package", ["cuddle"])]),
+        ("dependency[optional = true]", [("dependency", ["pytest"]), ("dependency", ["regex"])]),
+        ("dependency[optional = false]", [("dependency", ["tatsu"])]),
+        ("dependency[val(1)]", [("dependency", ["top-level", 3])]),
+        ("step[val(1) >= 2]", [("step", ["test", 2]), ("step", ["release", 3])]),
+        ("step[val(1) < 2]", [("step", ["lint", 1])]),
+        ('step[val() ^= "re"]', [("step", ["release", 3])]),
+        ('step[val() $= "t"]', [("step", ["lint", 1]), ("step", ["test", 2])]),
+        ('step[val() *= "es"]', [("step", ["test", 2])]),
+        ('[name() ^= "main"]', [("maintainers", [])]),
+        ('"step"[val(1) = 2.0]', [("step", ["test", 2])]),
+        ("script > [val(1) > 1][val(1) < 3]", [("step", ["test", 2])]),
+        ("script > []", [("step", ["lint", 1]), ("step", ["test", 2]), ("step", ["release", 3])]),
+        ("missing", []),
+    ),
+)
+def test_query(query, expected):
+    assert _names(doc.query(query)) == expected
+
+
+def test_query_results():
+    results = doc.query('dependency || package >> dependency || [val() = "tatsu"]')
+    assert isinstance(results, NodeList)
+    # Nodes matched by several selectors are only returned once, in document order.
+    assert _names(results) == [
+        ("dependency", ["tatsu"]),
+        ("dependency", ["pytest"]),
+        ("dependency", ["regex"]),
+        ("dependency", ["top-level", 3]),
+    ]
+
+    script = doc.query("script")[0]
+    assert _names(script.children.query("step[val(1) = 3]")) == [("step", ["release", 3])]
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    (
+        ("[val() = 1]", [("a", [1])]),
+        ("[val() = true]", [("b", [True])]),
+        ("[val() = null]", [("c", [None])]),
+        ("[val() > 0]", [("a", [1])]),
+        ("[val() < true]", []),
+    ),
+)
+def test_query_booleans_are_not_numbers(query, expected):
+    values = loads("a 1; b true; c null")
+    assert _names(values.query(query)) == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    (
+        "",
+        "a >",
+        "a b",
+        "a [b]",
+        "a || ",
+        "[",
+        "a[b",
+        "a[b = ]",
+        "a[b = c]",
+        "a[val() = (t)]",
+        "a[tag() = ()]",
+        "a[val(x)]",
+        "a[b = (t)1]",
+        "a[values()]",
+        "a[props()]",
+        "a > top()",
+        "top() + a",
+        "top() ~ a",
+        "true",
+    ),
+)
+def test_query_syntax_error(query):
+    with pytest.raises(KQLSyntaxError):
+        compile_query(query)
+
+
+def test_query_syntax_error_is_value_error():
+    with pytest.raises(ValueError, match=r"^Invalid query 'a >': Expected a filter"):
+        Query("a >")
+
+
+def test_compile_query_is_cached():
+    assert compile_query("a > b") is compile_query("a > b")
+    assert repr(compile_query("a > b")) == "Query('a > b')"
+
+
+def test_query_select():
+    nodes = [Node("a", None, children=[Node("b", None)]), Node("b", None)]
+    assert [node.name for node in Query("a > b").select(nodes)] == ["b"]
+    assert [node.name for node in Query("b").select(NodeList(nodes))] == ["b", "b"]
+
+
+def test_query_deep_tree():
+    depth = sys.getrecursionlimit() * 2
+    node = Node("leaf", None)
+    for _ in range(depth):
+        node = Node("branch", None, children=[node])
+    deep = Document(NodeList([node]))
+
+    assert _names(deep.query("top() > branch >> leaf")) == [("leaf", [])]
+    assert len(deep.query("branch > branch")) == depth - 1
+
+
+def _walked(document, query):
+    # A second selector that matches nothing keeps the query from using any index.
+    return _names(document.query(f"{query} || missing-node"))
+
+
+@pytest.mark.parametrize(
+    "query",
+    (
+        "top() > script > step",
+        "top() > script > (manual)step",
+        "top() > package > []",
+        "top() > package > maintainers > person",
+        "top() > dependency[val(1) = 3]",
+        "top() > missing > step",
+        "top()",
+    ),
+)
+def test_query_child_paths(query):
+    indexed = loads(DOC)
+    assert _names(indexed.query(query)) == _walked(loads(DOC), query)
+
+
+def test_query_child_paths_use_name_index():
+    indexed = loads(DOC)
+    assert indexed.nodes._index is None
+    assert _names(indexed.query("top() > script > step[val(1) > 1]")) == [
+        ("step", ["test", 2]),
+        ("step", ["release", 3]),
+    ]
+    assert indexed.nodes._index is not None
+    assert indexed.nodes.first_by_name("script").children._index is not None
+
+
+@pytest.mark.parametrize(
+    "query",
+    (
+        "dependency[optional=true]",
+        'dependency[prop(optional) = true][val() = "regex"]',
+        "(dev)dependency[optional=true]",
+        "dependency[optional=false]",
+        "dependency[optional=1]",
+        "step[optional=true]",
+    ),
+)
+def test_query_uses_property_index(query, monkeypatch):
+    indexed = loads(DOC)
+    index = indexed.build_index(["optional"])
+    lookups = []
+    find = index.find
+
+    def spy(*args):
+        lookups.append(args)
+        return find(*args)
+
+    monkeypatch.setattr(index, "find", spy)
+    assert _names(indexed.query(query)) == _walked(loads(DOC), query)
+    assert len(lookups) == 1
+
+
+def test_query_property_index_order():
+    indexed = loads(DOC)
+    indexed.build_index(["optional"])
+    package = indexed.nodes[0]
+    indexed.add_node(Node("dependency", None, properties={"optional": True}), parent=package)
+    indexed.set_property(package.children[0], "optional", True)
+
+    # The index no longer holds these nodes in document order, so the tree is walked.
+    expected = _walked(indexed, "dependency[optional=true]")
+    assert _names(indexed.query("dependency[optional=true]")) == expected
+    assert [name for name, _ in expected] == ["dependency"] * 4
+    assert expected[0] == ("dependency", ["tatsu"])
+
+    indexed.invalidate_index()
+    assert _names(indexed.query("dependency[optional=true]")) == expected
+
+
+def test_query_property_index_depth():
+    indexed = loads(DOC)
+    indexed.build_index(["optional"], depth=1)
+    # The index doesn't cover the dependencies inside package.
+    assert _names(indexed.query("dependency[optional=true]")) == [
+        ("dependency", ["pytest"]),
+        ("dependency", ["regex"]),
+    ]
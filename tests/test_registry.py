@@ -0,0 +1,160 @@
+import re
+import subprocess
+import sys
+from datetime import date, datetime
+from uuid import UUID
+
+import pytest
+
+from cuddle import (
+    Document,
+    KDLDecodeError,
+    Node,
+    NodeList,
+    TypeRegistry,
+    default_registry,
+    dumps,
+    loads,
+)
+
+
+class Point:
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Point) and (self.x, self.y) == (other.x, other.y)
+
+    def __str__(self) -> str:
+        return f"{self.x},{self.y}"
+
+    @classmethod
+    def parse(cls, val: str) -> "Point":
+        x, y = val.split(",")
+        return cls(int(x), int(y))
+
+
+@pytest.fixture()
+def registry_snapshot(monkeypatch: pytest.MonkeyPatch):
+    # Undo anything a test registers with the default registry.
+    default_registry.get_decoder("string", "")
+    monkeypatch.setattr(
+        default_registry,
+        "_decoders",
+        {kind: dict(decoders) for kind, decoders in default_registry._decoders.items()},
+    )
+    monkeypatch.setattr(default_registry, "_encoders", dict(default_registry._encoders))
+    monkeypatch.setattr(default_registry, "_encoder_cache", {})
+
+
+def test_builtins_registered_lazily():
+    registry = TypeRegistry()
+    assert registry._builtins_pending
+
+    assert registry.get_decoder("string", "uuid") is UUID
+    assert registry.get_decoder("int", "u8") is int
+    assert not registry._builtins_pending
+    assert registry.get_encoder(datetime) == ("date-time", registry.get_encoder(date)[1])
+
+
+def test_without_builtins():
+    registry = TypeRegistry(builtins=False)
+
+    assert registry.get_decoder("string", "uuid") is None
+    assert registry.get_encoder(UUID) is None
+
+
+def test_registered_before_builtins_win():
+    registry = TypeRegistry()
+    registry.register_decoder("date", str)
+
+    assert registry.get_decoder("string", "date") is str
+    assert registry.get_decoder("string", "time") is not None
+
+
+def test_encoder_resolved_through_mro():
+    class Base:
+        pass
+
+    class Sub(Base):
+        pass
+
+    registry = TypeRegistry(builtins=False)
+    registry.register_encoder(Base, "base")
+    assert registry.get_encoder(Sub) == ("base", str)
+
+    registry.register_encoder(Sub, "sub", repr)
+    assert registry.get_encoder(Sub) == ("sub", repr)
+    assert registry.get_encoder(Base) == ("base", str)
+    assert registry.get_encoder(int) is None
+
+
+def test_unknown_kind():
+    errmsg = "^" + re.escape("Unknown value kind 'complex'.") + "$"
+    with pytest.raises(ValueError, match=errmsg):
+        TypeRegistry().register_decoder("c", complex, kind="complex")  # type: ignore[arg-type]
+
+
+@pytest.mark.usefixtures("registry_snapshot")
+def test_register_custom_type():
+    default_registry.register(Point, "point", decoder=Point.parse)
+
+    doc = loads('node (point)"1,2" at=(point)"3,4"')
+    assert doc.nodes[0].arguments == [Point(1, 2)]
+    assert doc.nodes[0].properties == {"at": Point(3, 4)}
+
+    doc = Document(NodeList([Node("node", None, arguments=[Point(5, 6)])]))
+    assert dumps(doc) == 'node (point)"5,6"\n'
+
+
+@pytest.mark.usefixtures("registry_snapshot")
+def test_register_number_types():
+    default_registry.register_decoder("rgb", lambda val, base: int(val, base) & 0xFF, kind="int")
+    default_registry.register_decoder("percent", lambda val: float(val) / 100, kind="float")
+
+    assert loads("node (rgb)0x1ff (percent)50.0").nodes[0].arguments == [0xFF, 0.5]
+    with pytest.raises(KDLDecodeError):
+        loads('node (rgb)"0x1ff"')
+
+
+@pytest.mark.usefixtures("registry_snapshot")
+def test_override_builtin():
+    default_registry.register_decoder("uuid", str)
+
+    assert loads('node (uuid)"abc"').nodes[0].arguments == ["abc"]
+
+
+def test_builtins_registered_once_between_threads():
+    # In a fresh interpreter, so that the first lookups race to register the built-in types.
+    code = """
+import threading
+from uuid import UUID
+
+import cuddle
+
+barrier = threading.Barrier(8)
+results = []
+
+
+def decode():
+    barrier.wait()
+    try:
+        doc = cuddle.loads('n (uuid)"12345678-1234-5678-1234-567812345678"')
+    except cuddle.KDLDecodeError:
+        results.append(False)
+    else:
+        results.append(isinstance(doc.nodes[0].arguments[0], UUID))
+
+
+threads = [threading.Thread(target=decode) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(results.count(True))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "8"
@@ -0,0 +1,126 @@
+from pathlib import Path
+
+import pytest
+
+from cuddle import KDLDecodeError, KDLDecoder, ParseCache, ParserEngine, load, loads
+
+
+fixtures_path = Path(__file__).parent
+
+doc = """
+deploy "web" {
+    image "nginx"
+    env {
+        HOST "example.com"
+        PORT 8080
+    }
+    /-disabled 1
+}
+deploy "db" {
+    image "postgres"
+    env { PORT 5432; }
+}
+metadata created=(date)"2021-10-17" {
+    owner "ops"
+}
+"""
+
+
+def _names(nodes):
+    return [(node.name, node.arguments) for node in nodes]
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+@pytest.mark.parametrize(
+    ("select", "expected"),
+    (
+        (["deploy"], [("deploy", ["web"]), ("deploy", ["db"])]),
+        (["deploy/image"], [("image", ["nginx"]), ("image", ["postgres"])]),
+        (["/deploy/env/PORT"], [("PORT", [8080]), ("PORT", [5432])]),
+        (
+            [("deploy", "env", "HOST"), "metadata/owner"],
+            [("HOST", ["example.com"]), ("owner", ["ops"])],
+        ),
+        (["deploy/disabled", "missing", "image"], []),
+        (["metadata/owner", "metadata"], [("metadata", [])]),
+    ),
+)
+def test_select_paths(engine: ParserEngine, select, expected):
+    selected = loads(doc, select=select, engine=engine)
+    assert _names(selected.nodes) == expected
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_select_predicate(engine: ParserEngine):
+    seen = []
+
+    def predicate(path, name):
+        seen.append((path, name))
+        return name == "PORT" or path == ("metadata",)
+
+    selected = loads(doc, select=predicate, engine=engine)
+    assert _names(selected.nodes) == [("PORT", [8080]), ("PORT", [5432]), ("owner", ["ops"])]
+    assert (("deploy",), "env") in seen
+    assert (("deploy", "env"), "HOST") in seen
+    # Slashdashed nodes are never offered.
+    assert (("deploy",), "disabled") not in seen
+
+
+def test_select_builds_subtrees():
+    full = loads(doc)
+    selected = loads(doc, select=["deploy", "metadata"])
+    assert repr(selected) == repr(full)
+
+    env = loads(doc, select=["deploy/env"]).nodes[0]
+    assert repr(env) == repr(full.nodes[0].children[1])
+
+
+def test_select_skips_values():
+    decoded = []
+
+    def parse_str(val_type, val):
+        decoded.append(val)
+        return val
+
+    s = 'skipped (regex)"[" { child "not decoded"; }\nkept "decoded"\n'
+    selected = loads(s, select=["kept"], parse_str=parse_str)
+    assert _names(selected.nodes) == [("kept", ["decoded"])]
+    assert decoded == ["decoded"]
+
+
+def test_select_invalid_document():
+    # Skipped nodes are still checked for syntax errors.
+    with pytest.raises(KDLDecodeError):
+        loads("skipped { child 1 \nkept 1", select=["kept"])
+    with pytest.raises(KDLDecodeError):
+        loads('skipped "unterminated\nkept 1', select=["kept"])
+
+
+@pytest.mark.parametrize("select", ([""], ["/"], [()]))
+def test_select_empty_path(select):
+    with pytest.raises(ValueError, match="^Node paths must contain at least one node name.$"):
+        loads(doc, select=select)
+
+
+def test_select_bypasses_cache():
+    cache = ParseCache()
+    decoder = KDLDecoder(cache=cache)
+    assert _names(decoder.decode(doc, select=["deploy/image"]).nodes) == [
+        ("image", ["nginx"]),
+        ("image", ["postgres"]),
+    ]
+    assert len(cache) == 0
+
+
+def test_load_select(tmp_path: Path):
+    path = tmp_path / "doc.kdl"
+    path.write_text(doc, encoding="utf-8")
+
+    selected = load(path, select=["metadata"], cache=ParseCache())
+    assert _names(selected.nodes) == [("metadata", [])]
+    with pytest.raises(ValueError, match="select"):
+        load(path, select=["metadata"], compiled_cache=True)
+    assert not (tmp_path / "doc.kdlc").exists()
+
+    with open(path, mode="r", encoding="utf-8") as f:
+        assert _names(load(f, select=["metadata/owner"]).nodes) == [("owner", ["ops"])]
@@ -0,0 +1,145 @@
+import copy
+import pickle
+
+import pytest
+
+from cuddle import Document, Node, NodeList, dumpb, dumps, load, loadb, loads, loads_columnar
+
+
+class CustomNodeList(NodeList):
+    pass
+
+
+class TaggedNode(Node):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tag = "tagged"
+
+
+# A node class that reads the containers it's given, as custom factories could before empty
+# containers were allocated lazily.
+class CountingNode(Node):
+    def __init__(self, name, node_type, /, *, arguments, properties, children):
+        super().__init__(
+            name, node_type, arguments=arguments, properties=properties, children=children
+        )
+        self.counts = (len(arguments), len(properties), len(children))
+
+
+def test_no_instance_dicts():
+    node = Node("node", None)
+    assert not hasattr(node, "__dict__")
+    assert not hasattr(NodeList([]), "__dict__")
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_empty_containers_are_not_allocated(engine):
+    doc = loads("leaf\nparent 1 key=2 { child; }", engine=engine)
+    leaf, parent = doc.nodes
+    assert leaf._arguments is None
+    assert leaf._properties is None
+    assert leaf._children is None
+    assert parent._arguments == [1]
+    assert parent._properties == {"key": 2}
+    assert parent._children is not None
+
+    # Reading the document doesn't allocate them either.
+    dumps(doc)
+    dumpb(doc)
+    doc.query("leaf[val()] || leaf[key]")
+    repr(doc)
+    assert leaf._arguments is None
+    assert leaf._properties is None
+    assert leaf._children is None
+
+
+def test_empty_containers_from_other_decoders():
+    leaf = loadb(dumpb(loads("leaf"))).nodes[0]
+    assert (leaf._arguments, leaf._properties, leaf._children) == (None, None, None)
+    lazy_leaf = loads("leaf", lazy=True).nodes[0]
+    assert (lazy_leaf._arguments, lazy_leaf._properties, lazy_leaf._children) == (None, None, None)
+
+
+def test_containers_allocated_on_first_use():
+    first = Node("first", None)
+    second = Node("second", None)
+
+    first.arguments.append(1)
+    first.properties["key"] = "value"
+    first.children.append(Node("child", None))
+    assert first.arguments == [1]
+    assert first.properties == {"key": "value"}
+    assert [child.name for child in first.children] == ["child"]
+
+    # Each node gets containers of its own.
+    assert second.arguments == []
+    assert second.properties == {}
+    assert len(second.children) == 0
+    assert second.arguments is not first.arguments
+    assert second.properties is not first.properties
+    assert second.children is not first.children
+
+    second.arguments = [2]
+    second.children = NodeList([first])
+    assert second[0] == 2
+    assert second.children[0] is first
+
+
+def test_getitem_on_empty_node():
+    node = Node("node", None)
+    with pytest.raises(IndexError):
+        node[0]
+    with pytest.raises(KeyError):
+        node["key"]
+    assert node._arguments is None
+    assert node._properties is None
+
+
+def test_custom_node_lists_on_leaves():
+    doc = loads("parent { child; }", node_list_factory=CustomNodeList)
+    child = doc.nodes[0].children[0]
+    assert isinstance(child._children, CustomNodeList)
+
+
+@pytest.mark.parametrize("clone", (copy.deepcopy, lambda x: pickle.loads(pickle.dumps(x))))
+def test_copies(clone):
+    doc = loads("leaf\nparent 1 key=2 { child; }")
+    cloned = clone(doc)
+    assert dumps(cloned) == dumps(doc)
+    assert cloned.nodes[0]._arguments is None
+    assert cloned.nodes[1].children[0].name == "child"
+
+
+def test_subclasses():
+    node = TaggedNode("node", None, arguments=[1])
+    assert node.tag == "tagged"
+    assert node[0] == 1
+    doc = Document(NodeList([node]))
+    assert pickle.loads(pickle.dumps(doc)).nodes[0].tag == "tagged"
+
+
+def test_custom_node_factories_get_containers(tmp_path):
+    s = "leaf\nparent 1 key=2 { child; }"
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text(s)
+    expected = [(0, 0, 0), (1, 1, 1), (0, 0, 0)]
+
+    docs = [
+        loads(s, node_factory=CountingNode),
+        loads(s, node_factory=CountingNode, engine="tatsu"),
+        loads(s, node_factory=CountingNode, lazy=True),
+        loads(s, node_factory=CountingNode, select=["leaf", "parent"]),
+        loadb(dumpb(loads(s)), node_factory=CountingNode),
+        load(doc_file, node_factory=CountingNode, compiled_cache=True),
+        load(doc_file, node_factory=CountingNode, compiled_cache=True),
+        loads_columnar(s).to_document(node_factory=CountingNode),
+        loads(s).freeze().to_document(node_factory=CountingNode),
+    ]
+    for doc in docs:
+        leaf, parent = doc.nodes
+        child = parent.children[0]
+        assert isinstance(leaf, CountingNode)
+        assert isinstance(parent, CountingNode)
+        assert isinstance(child, CountingNode)
+        assert [leaf.counts, parent.counts, child.counts] == expected
+        assert dumps(doc) == dumps(loads(s))
@@ -0,0 +1,238 @@
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from cuddle import (
+    KDLDecodeError,
+    Node,
+    ParserEngine,
+    iterload,
+    iterparse,
+    load,
+    load_mapped,
+    loads,
+    plain_str_parser,
+)
+
+
+fixtures_path = Path(__file__).parent
+
+
+class TrackingStringIO(StringIO):
+    def __init__(self, initial_value: str):
+        super().__init__(initial_value)
+        self.total_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.total_read += len(chunk)
+        return chunk
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, 64, 65536))
+def test_iterload_matches_load(chunk_size: int):
+    complex_file = fixtures_path / "complex.kdl"
+    expected = load(complex_file)
+
+    with complex_file.open(mode="r", encoding="utf-8") as f:
+        nodes = list(iterload(f, chunk_size=chunk_size))
+
+    assert repr(nodes) == repr(list(expected))
+
+
+def test_iterload_path():
+    complex_file = fixtures_path / "complex.kdl"
+    nodes = list(iterload(complex_file))
+
+    assert repr(nodes) == repr(list(load(complex_file)))
+
+
+def test_iterload_is_incremental():
+    doc = "".join(f'event {i} payload=r#"{{\n;}}"# {{ child; }}\n' for i in range(1000))
+    fp = TrackingStringIO(doc)
+
+    nodes = iterload(fp, chunk_size=256)
+    first = next(nodes)
+    assert first.name == "event"
+    assert first.arguments == [0]
+    assert first.properties == {"payload": "{\n;}"}
+    assert len(first.children) == 1
+    assert fp.total_read < len(doc) / 10
+
+    assert sum(1 for _ in nodes) == 999
+    assert fp.total_read == len(doc)
+
+
+def test_iterload_node_spanning_many_chunks():
+    doc = 'first\nbig "' + "x" * 10000 + '" {\n' + "child\n" * 1000 + "}\nlast\n"
+    nodes = list(iterload(StringIO(doc), chunk_size=16))
+
+    assert [node.name for node in nodes] == ["first", "big", "last"]
+    assert len(nodes[1].arguments[0]) == 10000
+    assert len(nodes[1].children) == 1000
+
+
+def test_iterload_slashdash_across_chunks():
+    doc = "a\n/- b 1 \\\n 2 {\n c\n}\nd /- 3 4\n"
+    for chunk_size in range(1, len(doc) + 1):
+        nodes = list(iterload(StringIO(doc), chunk_size=chunk_size))
+        assert [node.name for node in nodes] == ["a", "d"]
+        assert nodes[1].arguments == [4]
+
+
+@pytest.mark.parametrize(
+    "doc",
+    (
+        "a \\ /* c */\n  1\nb\n",
+        "a \\ /* c /* nested */ */ // trailing\n  1 2\nb\n",
+        "a \\ /* multi\nline */\n  1\nb { c \\ /* x */\n 3; }\n",
+    ),
+)
+def test_iterload_escline_comments_across_chunks(doc: str):
+    expected = repr(list(loads(doc)))
+    for chunk_size in range(1, len(doc) + 1):
+        assert repr(list(iterload(StringIO(doc), chunk_size=chunk_size))) == expected
+
+
+def test_iterload_factories():
+    class CustomNode(Node):
+        pass
+
+    doc = 'node (date)"2021-10-03"\nnode (uuid)"abc"\n'
+    nodes = list(
+        iterload(StringIO(doc), chunk_size=4, parse_str=plain_str_parser, node_factory=CustomNode)
+    )
+
+    assert all(isinstance(node, CustomNode) for node in nodes)
+    assert [node.arguments for node in nodes] == [["2021-10-03"], ["abc"]]
+
+
+def test_iterload_invalid():
+    nodes = iterload(StringIO("valid 1\ninvalid {\n"), chunk_size=4)
+
+    assert next(nodes).name == "valid"
+    with pytest.raises(KDLDecodeError):
+        next(nodes)
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_iterparse_events(engine: ParserEngine):
+    doc = "(t)parent 1 key=true /- 2 {\n    child null\n    /- skipped { nested; }\n}\nsibling;"
+
+    assert list(iterparse(doc, engine=engine)) == [
+        ("start_node", "parent", "t"),
+        ("argument", 1),
+        ("property", "key", True),
+        ("start_node", "child", None),
+        ("argument", None),
+        ("end_node",),
+        ("end_node",),
+        ("start_node", "sibling", None),
+        ("end_node",),
+    ]
+
+
+def test_iterparse_source_order():
+    events = list(iterparse(b"node a=1 2 a=3"))
+
+    assert events == [
+        ("start_node", "node", None),
+        ("property", "a", 1),
+        ("argument", 2),
+        ("property", "a", 3),
+        ("end_node",),
+    ]
+
+
+def test_iterparse_factories():
+    doc = 'node (date)"2021-10-03" (u8)0xff'
+    events = list(iterparse(doc, parse_str=plain_str_parser))
+
+    assert events[1:3] == [("argument", "2021-10-03"), ("argument", 255)]
+
+    with pytest.raises(KDLDecodeError):
+        list(iterparse('node (unknown)"value"'))
+    events = list(iterparse('node (unknown)"value"', ignore_unknown_types=True))
+    assert events[1] == ("argument", "value")
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, 65536))
+def test_iterparse_file(chunk_size: int):
+    complex_file = fixtures_path / "complex.kdl"
+    expected = list(iterparse(complex_file.read_text(encoding="utf-8")))
+
+    with complex_file.open(mode="r", encoding="utf-8") as f:
+        assert list(iterparse(f, chunk_size=chunk_size)) == expected
+    assert list(iterparse(complex_file, chunk_size=chunk_size)) == expected
+
+
+def test_iterparse_is_incremental():
+    doc = "".join(f"event {i}\n" for i in range(1000))
+    fp = TrackingStringIO(doc)
+
+    events = iterparse(fp, chunk_size=256)
+    assert next(events) == ("start_node", "event", None)
+    assert fp.total_read < len(doc) / 10
+
+
+def test_iterparse_invalid():
+    events = iterparse("valid\ninvalid {")
+
+    assert next(events) == ("start_node", "valid", None)
+    assert next(events) == ("end_node",)
+    with pytest.raises(KDLDecodeError):
+        list(events)
+
+
+@pytest.mark.parametrize("chunk_size", (1, 3, 64, 1048576))
+def test_load_mapped(tmp_path: Path, chunk_size: int):
+    doc = (fixtures_path / "complex.kdl").read_text(encoding="utf-8") + 'ノード お名前="☜(ﾟヮﾟ☜)"\n'
+    doc_file = tmp_path / "doc.kdl"
+    doc_file.write_text(doc, encoding="utf-8")
+
+    assert repr(load_mapped(doc_file, chunk_size=chunk_size)) == repr(loads(doc))
+
+
+def test_load_mapped_escline_comments(tmp_path: Path):
+    doc = "a \\ /* c */\n  1\nb \\ /* multi\nline */\n  2\nc\n"
+    doc_file = tmp_path / "escline.kdl"
+    doc_file.write_text(doc, encoding="utf-8")
+
+    expected = repr(loads(doc))
+    for chunk_size in range(1, len(doc) + 1):
+        assert repr(load_mapped(doc_file, chunk_size=chunk_size)) == expected
+
+
+def test_load_mapped_empty(tmp_path: Path):
+    doc_file = tmp_path / "empty.kdl"
+    doc_file.write_text("", encoding="utf-8")
+
+    assert len(load_mapped(str(doc_file)).nodes) == 0
+
+
+def test_load_mapped_invalid(tmp_path: Path):
+    doc_file = tmp_path / "invalid.kdl"
+    doc_file.write_text("valid\ninvalid {", encoding="utf-8")
+
+    with pytest.raises(KDLDecodeError):
+        load_mapped(doc_file)
+
+
+def test_load_mapped_peak_memory(tmp_path: Path):
+    doc_file = tmp_path / "commented.kdl"
+    doc_file.write_text(
+        "// A comment that takes up some space.\n" * 20000 + "node\n", encoding="utf-8"
+    )
+
+    def _peak(load_func, **kwargs) -> int:
+        tracemalloc.start()
+        try:
+            doc = load_func(doc_file, **kwargs)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            assert len(doc.nodes) == 1
+
+    assert _peak(load_mapped, chunk_size=65536) < _peak(load) / 2
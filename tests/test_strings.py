@@ -0,0 +1,56 @@
+import pytest
+
+from cuddle import KDLDecodeError, ParserEngine, loads
+
+
+engines = ("native", "tatsu")
+
+
+@pytest.mark.parametrize("engine", engines)
+@pytest.mark.parametrize(
+    ("s", "expected"),
+    (
+        ('node r"plain"', "plain"),
+        ('node r""', ""),
+        ('node r#"has "quotes""#', 'has "quotes"'),
+        ('node r##"ends "# early"##', 'ends "# early'),
+        ('node r#"multi\nline"#', "multi\nline"),
+        ('node ""', ""),
+        ('node "tab\\there"', "tab\there"),
+        ('node "\\"\\\\\\/\\b\\f\\n\\r\\t"', '"\\/\b\f\n\r\t'),
+        ('node "\\u{1F600} \\u{e9}"', "\U0001F600 \u00e9"),
+        ('node "not \\an escape"', "not \\an escape"),
+        ('node "split\nline"', "split\nline"),
+    ),
+)
+def test_strings(engine: ParserEngine, s: str, expected: str):
+    assert loads(s, engine=engine).nodes[0].arguments == [expected]
+
+
+@pytest.mark.parametrize("engine", engines)
+@pytest.mark.parametrize(
+    "s",
+    (
+        'node r"eof',
+        'node r#"str"',
+        'node r##"str"#',
+        'node r"str"#',
+        'node r#"str"##',
+        'node "eof',
+        'node "escaped quote\\"',
+    ),
+)
+def test_invalid_strings(engine: ParserEngine, s: str):
+    with pytest.raises(KDLDecodeError):
+        loads(s, engine=engine)
+
+
+@pytest.mark.parametrize("engine", engines)
+def test_long_strings(engine: ParserEngine):
+    line = "SELECT * FROM \"table\" WHERE name = 'x';"
+    raw = "\n".join([line] * 20000)
+    escaped = raw.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    doc = loads(f'raw r#"{raw}"#\nescaped "{escaped}"\n', engine=engine)
+    assert doc.nodes[0].arguments == [raw]
+    assert doc.nodes[1].arguments == [raw]
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from cuddle import KDLDecoder, ParserEngine, loads
+
+
+fixtures_path = Path(__file__).parent
+
+
+def _make_docs(engine: ParserEngine):
+    docs = []
+    for i in range(40):
+        node = f'node{i} {i} "s{i}" key{i}=r#"v{i}"# (date)"2021-10-{i % 28 + 1:02}" {{\n'
+        node += f"    child {i * 2}.5 0x{i:x}\n}}\n"
+        docs.append(node * (1 + i % 2))
+
+    # The TatSu engine is far slower, so give it less to do.
+    if engine == "native":
+        docs.append((fixtures_path / "complex.kdl").read_text(encoding="utf-8"))
+        return docs * 10
+    return docs * 2
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_concurrent_loads(engine: ParserEngine):
+    docs = _make_docs(engine)
+    sequential = [repr(loads(doc, engine=engine)) for doc in docs]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        concurrent = list(executor.map(lambda doc: repr(loads(doc, engine=engine)), docs))
+
+    assert concurrent == sequential
+
+
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
+def test_concurrent_shared_decoder(engine: ParserEngine):
+    decoder = KDLDecoder(engine=engine)
+    docs = _make_docs(engine)
+    sequential = [repr(decoder.decode(doc)) for doc in docs]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        concurrent = list(executor.map(lambda doc: repr(decoder.decode(doc)), docs))
+
+    assert concurrent == sequential
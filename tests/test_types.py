@@ -200,6 +200,15 @@ def test_encoding_re():
     assert dumps(doc) == 'node (regex)"^abcd$"\n'
 
 
+def test_encoding_regex():
+    import regex
+
+    val = regex.compile(r"^abcd$")
+    doc = Document(NodeList([Node("node", None, arguments=[val])]))
+
+    assert dumps(doc) == 'node (regex)"^abcd$"\n'
+
+
 def test_decoding_re():
     def _run(_raw: str):
         doc = loads(_raw)
@@ -7,6 +7,7 @@ import pytest
 from cuddle import (
     IdentifierFormatter,
     KDLDecodeError,
+    ParserEngine,
     ValueEncoderResult,
     default_bool_parser,
     default_float_parser,
@@ -90,16 +91,17 @@ def _custom_value_encoder(val: Any, ident_fmt: IdentifierFormatter) -> ValueEnco
     return extended_value_encoder(val, ident_fmt)
 
 
+@pytest.mark.parametrize("engine", ("native", "tatsu"))
 @pytest.mark.parametrize(
     "input_file", INPUT_FIXTURES_DIR.glob("*.kdl"), ids=lambda input_file: input_file.stem
 )
-def test_expected_kdl(input_file: Path):
+def test_expected_kdl(input_file: Path, engine: ParserEngine):
     output_file = OUTPUT_FIXTURES_DIR / input_file.name
     try:
         expected_output = output_file.read_text(encoding="utf-8")
     except FileNotFoundError:
         with pytest.raises(KDLDecodeError):
-            load(input_file)
+            load(input_file, engine=engine)
         return
 
     input_doc = load(
@@ -109,6 +111,7 @@ def test_expected_kdl(input_file: Path):
         parse_int=_custom_int_parser,
         parse_float=_custom_float_parser,
         parse_str=_custom_str_parser,
+        engine=engine,
     )
     actual_output = dumps(input_doc, indent=4, value_encoder=_custom_value_encoder)
 